@@ -2,9 +2,16 @@
 Blockchain client for connecting to local Hardhat node and interacting with Digitionary contract.
 """
 from web3 import Web3
-from typing import List, Dict, Any, Optional
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
+from eth_abi import decode as abi_decode
+from typing import Callable, List, Dict, Any, Iterable, Optional, Tuple
+from itertools import islice
 import json
 import os
+import threading
+
+from api.rpc_provider import WRITE_METHODS, PooledHTTPProvider
+from evm.utils.helpers import encode_cursor, decode_cursor
 
 # Digitionary contract ABI (extracted from deployment)
 DIGITIONARY_ABI = [
@@ -15,14 +22,17 @@ DIGITIONARY_ABI = [
     
     # Word functions
     {"inputs": [{"name": "_term", "type": "string"}, {"name": "_content", "type": "string"}, {"name": "_commitMsg", "type": "string"}], "name": "addWord", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "nonpayable", "type": "function"},
+    {"inputs": [{"name": "_terms", "type": "string[]"}, {"name": "_contents", "type": "string[]"}, {"name": "_commitMsgs", "type": "string[]"}], "name": "addWords", "outputs": [{"name": "firstWordId", "type": "uint256"}], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"name": "_wordId", "type": "uint256"}, {"name": "_content", "type": "string"}, {"name": "_commitMsg", "type": "string"}], "name": "updateWord", "outputs": [], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"name": "_wordId", "type": "uint256"}], "name": "getWord", "outputs": [{"name": "id", "type": "uint256"}, {"name": "term", "type": "string"}, {"name": "owner", "type": "address"}, {"name": "active", "type": "bool"}, {"name": "versionCount", "type": "uint256"}], "stateMutability": "view", "type": "function"},
     {"inputs": [{"name": "_wordId", "type": "uint256"}], "name": "getLatestWordContent", "outputs": [{"name": "term", "type": "string"}, {"name": "content", "type": "string"}, {"name": "commitMsg", "type": "string"}, {"name": "timestamp", "type": "uint256"}, {"name": "author", "type": "address"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [{"name": "_wordId", "type": "uint256"}, {"name": "_versionIndex", "type": "uint256"}], "name": "getWordVersion", "outputs": [{"name": "content", "type": "string"}, {"name": "commitMsg", "type": "string"}, {"name": "timestamp", "type": "uint256"}, {"name": "author", "type": "address"}], "stateMutability": "view", "type": "function"},
     {"inputs": [{"name": "_user", "type": "address"}], "name": "getUserWords", "outputs": [{"name": "", "type": "uint256[]"}], "stateMutability": "view", "type": "function"},
     
     # Dictionary functions
     {"inputs": [{"name": "_title", "type": "string"}, {"name": "_wordIds", "type": "uint256[]"}], "name": "createDictionary", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"name": "_dictId", "type": "uint256"}], "name": "getDictionary", "outputs": [{"name": "id", "type": "uint256"}, {"name": "title", "type": "string"}, {"name": "author", "type": "address"}, {"name": "wordCount", "type": "uint256"}, {"name": "timestamp", "type": "uint256"}, {"name": "published", "type": "bool"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [{"name": "_dictId", "type": "uint256"}], "name": "getDictionaryWordIds", "outputs": [{"name": "", "type": "uint256[]"}], "stateMutability": "view", "type": "function"},
     {"inputs": [{"name": "_user", "type": "address"}], "name": "getUserDictionaries", "outputs": [{"name": "", "type": "uint256[]"}], "stateMutability": "view", "type": "function"},
     
     # Stats
@@ -39,13 +49,44 @@ DIGITIONARY_ABI = [
     {"anonymous": False, "inputs": [{"indexed": True, "name": "user", "type": "address"}, {"indexed": False, "name": "amount", "type": "uint256"}], "name": "Unstaked", "type": "event"},
 ]
 
+# Multicall3 aggregate3 ABI (blockchain/packages/hardhat/contracts/Multicall3.sol)
+MULTICALL3_ABI = [
+    {"inputs": [{"components": [{"name": "target", "type": "address"}, {"name": "allowFailure", "type": "bool"}, {"name": "callData", "type": "bytes"}], "name": "calls", "type": "tuple[]"}], "name": "aggregate3", "outputs": [{"components": [{"name": "success", "type": "bool"}, {"name": "returnData", "type": "bytes"}], "name": "returnData", "type": "tuple[]"}], "stateMutability": "payable", "type": "function"},
+]
+
 # Default contract address (deployed on local Hardhat)
 DEFAULT_CONTRACT_ADDRESS = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
 DEFAULT_RPC_URL = "http://127.0.0.1:8545"
 
+# Multicall3 deployment used to batch reads (printed by `yarn deploy`); optional
+DEFAULT_MULTICALL_ADDRESS = os.environ.get("DIGITIONARY_MULTICALL_ADDRESS")
+
+# View calls per batched round trip (two per word for word listings)
+READ_BATCH_SIZE = 500
+
 # Hardhat default account for server-side transactions
 HARDHAT_ACCOUNT_PRIVATE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
 
+# JSON-RPC error code of an unknown method
+METHOD_NOT_FOUND = -32601
+
+
+class BatchUnsupported(ValueError):
+    """The node (or the Multicall3 address) cannot serve batched requests at all."""
+    pass
+
+
+def is_batch_unsupported(error: Exception) -> bool:
+    """
+    Whether a batched request failed because batching can never work here
+    (no batch support, no Multicall3 contract, unknown method), as opposed
+    to a timeout or a dropped connection worth trying again later.
+    """
+    if isinstance(error, (BatchUnsupported, BadFunctionCallOutput, ContractLogicError)):
+        return True
+    details = error.args[0] if error.args else None
+    return isinstance(details, dict) and details.get("code") == METHOD_NOT_FOUND
+
 
 class BlockchainClient:
     """Client for interacting with Digitionary smart contract on local blockchain."""
@@ -53,22 +94,37 @@ class BlockchainClient:
     def __init__(
         self, 
         rpc_url: str = DEFAULT_RPC_URL,
-        contract_address: str = DEFAULT_CONTRACT_ADDRESS
+        contract_address: str = DEFAULT_CONTRACT_ADDRESS,
+        multicall_address: Optional[str] = DEFAULT_MULTICALL_ADDRESS
     ):
         self.rpc_url = rpc_url
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+        # Keep-alive pool, retries, coalescing and block-scoped memoization
+        self.provider = PooledHTTPProvider(rpc_url)
+        self.w3 = Web3(self.provider)
         self.contract_address = Web3.to_checksum_address(contract_address)
         self.contract = self.w3.eth.contract(
             address=self.contract_address,
             abi=DIGITIONARY_ABI
         )
         
+        # Batched reads: Multicall3 if deployed, else JSON-RPC batch requests.
+        # Each is switched off once the node shows it can't serve it
+        # (is_batch_unsupported); other failures are raised.
+        self.multicall = None
+        if multicall_address:
+            self.multicall = self.w3.eth.contract(
+                address=Web3.to_checksum_address(multicall_address),
+                abi=MULTICALL3_ABI
+            )
+        self.rpc_batch_enabled = True
+        self._output_types = {
+            item["name"]: [o["type"] for o in item["outputs"]]
+            for item in DIGITIONARY_ABI if item["type"] == "function"
+        }
+        
         # Set up server account for transactions on behalf of users
         self.server_account = self.w3.eth.account.from_key(HARDHAT_ACCOUNT_PRIVATE_KEY)
         
-        # Auto-stake the server account if not already staked
-        self._ensure_staked()
-        
     def is_connected(self) -> bool:
         """Check if connected to blockchain node."""
         try:
@@ -76,8 +132,17 @@ class BlockchainClient:
         except Exception:
             return False
     
-    def _ensure_staked(self):
-        """Ensure the server account has staked ETH for publishing."""
+    def ensure_staked(self, send_stake: Optional[Callable[[int], Dict[str, Any]]] = None):
+        """
+        Ensure the server account has staked ETH for publishing.
+        
+        Not run on construction: it may send a transaction and wait for it,
+        so the API calls it in the background once the node is reachable.
+        
+        Args:
+            send_stake: Sends a stake of the given wei and waits for the
+                result (e.g. through TxPipeline); defaults to ``stake``
+        """
         try:
             if not self.is_connected():
                 print("⚠️ Blockchain not connected, skipping auto-stake")
@@ -86,7 +151,10 @@ class BlockchainClient:
             current_stake = self.get_user_stake(self.server_account.address)
             if current_stake < 0.01:
                 print("🔒 Server account not staked, staking 1 ETH...")
-                result = self.stake(1.0)
+                if send_stake is not None:
+                    result = send_stake(self.w3.to_wei(1, 'ether'))
+                else:
+                    result = self.stake(1.0)
                 if result.get("success"):
                     print(f"✅ Staked 1 ETH (tx: {result['tx_hash'][:10]}...)")
                 else:
@@ -114,7 +182,8 @@ class BlockchainClient:
                 "total_staked": self.w3.from_wei(stats[2], 'ether'),
                 "block_number": self.get_block_number(),
                 "chain_id": self.get_chain_id(),
-                "connected": self.is_connected(),
+                # The reads above just succeeded
+                "connected": True,
                 "contract_address": self.contract_address
             }
         except Exception as e:
@@ -243,71 +312,365 @@ class BlockchainClient:
         try:
             word = self.contract.functions.getWord(word_id).call()
             latest = self.contract.functions.getLatestWordContent(word_id).call()
-            return {
-                "id": word[0],
-                "term": word[1],
-                "owner": word[2],
-                "active": word[3],
-                "version_count": word[4],
-                "content": latest[1],
-                "commit_msg": latest[2],
-                "timestamp": latest[3],
-                "author": latest[4]
-            }
+            return self._word_details(word, latest)
         except Exception as e:
             return {"error": str(e)}
     
+    @staticmethod
+    def _word_details(word, latest) -> Dict[str, Any]:
+        return {
+            "id": word[0],
+            "term": word[1],
+            "owner": word[2],
+            "active": word[3],
+            "version_count": word[4],
+            "content": latest[1],
+            "commit_msg": latest[2],
+            "timestamp": latest[3],
+            "author": latest[4]
+        }
+    
+    def get_words(self, word_ids: List[int], block_identifier="latest") -> List[Dict[str, Any]]:
+        """Get details of many words in batched round trips (same shape as get_word)."""
+        calls = []
+        for word_id in word_ids:
+            calls.append(("getWord", [word_id]))
+            calls.append(("getLatestWordContent", [word_id]))
+        results = self.batch_call(calls, block_identifier)
+        
+        words = []
+        for word, latest in zip(results[::2], results[1::2]):
+            if word is None or latest is None:
+                words.append({"error": "Word not found"})
+            else:
+                words.append(self._word_details(word, latest))
+        return words
+    
     def get_all_words(self) -> List[Dict[str, Any]]:
         """Get all words from the blockchain."""
         words = []
-        word_count = self.contract.functions.wordCount().call()
+        # Pin one block so the count and the batched reads agree
+        block = self.get_block_number()
+        word_count = self.contract.functions.wordCount().call(block_identifier=block)
         
-        for i in range(1, word_count + 1):
-            word = self.get_word(i)
+        for word in self.get_words(list(range(1, word_count + 1)), block):
             if "error" not in word:
-                # Format for frontend compatibility
-                words.append({
-                    "id": word["id"],
-                    "term": word["term"],
-                    "owner": word["owner"],
-                    "active": word["active"],
-                    "history": [{
-                        "content": word["content"],
-                        "commitMsg": word["commit_msg"],
-                        "timestamp": word["timestamp"],
-                        "author": word["author"]
-                    }]
-                })
+                words.append(self._format_word(word))
         
         return words
     
+    def batch_call(self, calls: List[Tuple[str, list]], block_identifier="latest") -> List[Optional[tuple]]:
+        """
+        Run many Digitionary view calls with as few node round trips as possible.
+        
+        Calls go through the Multicall3 aggregator when one is configured, else
+        as JSON-RPC batch requests, READ_BATCH_SIZE calls per round trip. If
+        neither is supported, each call is made on its own as before.
+        
+        Args:
+            calls: (function name, args) pairs
+            block_identifier: Block to read all calls at
+        
+        Returns:
+            Decoded outputs per call, in order; None where the call reverted
+        
+        Raises:
+            requests.RequestException: If the node could not be reached
+                (after the provider's retries); batching stays on
+        """
+        results = []
+        for start in range(0, len(calls), READ_BATCH_SIZE):
+            results.extend(self._call_chunk(calls[start:start + READ_BATCH_SIZE], block_identifier))
+        return results
+    
+    def _call_chunk(self, calls: List[Tuple[str, list]], block_identifier) -> List[Optional[tuple]]:
+        if self.multicall is not None:
+            try:
+                return self._multicall(calls, block_identifier)
+            except Exception as e:
+                if not is_batch_unsupported(e):
+                    raise
+                print(f"⚠️ Multicall is not available, disabling it: {e}")
+                self.multicall = None
+        
+        if self.rpc_batch_enabled:
+            try:
+                return self._rpc_batch(calls, block_identifier)
+            except Exception as e:
+                if not is_batch_unsupported(e):
+                    raise
+                print(f"⚠️ JSON-RPC batch requests are not supported, disabling them: {e}")
+                self.rpc_batch_enabled = False
+        
+        return [self._single_call(name, args, block_identifier) for name, args in calls]
+    
+    def _multicall(self, calls: List[Tuple[str, list]], block_identifier) -> List[Optional[tuple]]:
+        aggregated = [
+            (self.contract_address, True, Web3.to_bytes(hexstr=self.contract.encodeABI(fn_name=name, args=args)))
+            for name, args in calls
+        ]
+        replies = self.multicall.functions.aggregate3(aggregated).call(block_identifier=block_identifier)
+        return [
+            self._decode_output(name, data) if success else None
+            for (name, _), (success, data) in zip(calls, replies)
+        ]
+    
+    def rpc_batch(self, calls: List[Tuple[str, list]]) -> List[Dict[str, Any]]:
+        """
+        Send raw JSON-RPC requests in a single batch round trip.
+        
+        Args:
+            calls: (method, params) pairs
+        
+        Returns:
+            The JSON-RPC reply object per request, in order
+        
+        Raises:
+            BatchUnsupported: If the node does not support batch requests
+        """
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(calls)
+        ]
+        # Batches of reads are retried like single reads; sends are not
+        writes = any(method in WRITE_METHODS for method, _ in calls)
+        replies = json.loads(self.provider.post(json.dumps(payload).encode(), retry=not writes))
+        if not isinstance(replies, list):
+            raise BatchUnsupported("node does not support JSON-RPC batch requests")
+        if writes:
+            self.provider.new_block()
+        
+        by_id = {reply.get("id"): reply for reply in replies}
+        replies = [by_id[i] for i in range(len(calls))]
+        for (method, _), reply in zip(calls, replies):
+            self.provider.observe(method, reply)
+        return replies
+    
+    def _rpc_batch(self, calls: List[Tuple[str, list]], block_identifier) -> List[Optional[tuple]]:
+        block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+        replies = self.rpc_batch([
+            ("eth_call", [{"to": self.contract_address, "data": self.contract.encodeABI(fn_name=name, args=args)}, block])
+            for name, args in calls
+        ])
+        
+        results = []
+        for (name, _), reply in zip(calls, replies):
+            result = reply.get("result")
+            # Reverted calls come back as errors (or empty data on some nodes)
+            if "error" in reply or not result or result == "0x":
+                results.append(None)
+            else:
+                results.append(self._decode_output(name, Web3.to_bytes(hexstr=result)))
+        return results
+    
+    def _single_call(self, name: str, args: list, block_identifier) -> Optional[tuple]:
+        try:
+            result = getattr(self.contract.functions, name)(*args).call(block_identifier=block_identifier)
+        except Exception:
+            return None
+        return tuple(result) if isinstance(result, (list, tuple)) else (result,)
+    
+    def _decode_output(self, name: str, data: bytes) -> tuple:
+        """Decode raw return data like ContractFunction.call() would."""
+        types = self._output_types[name]
+        values = abi_decode(types, data)
+        return tuple(
+            Web3.to_checksum_address(value) if abi_type == "address" else value
+            for abi_type, value in zip(types, values)
+        )
+    
+    @staticmethod
+    def _format_word(word: Dict[str, Any]) -> Dict[str, Any]:
+        """Format a get_word() result like the fallback EVM's word records."""
+        return {
+            "id": word["id"],
+            "term": word["term"],
+            "owner": word["owner"],
+            "active": word["active"],
+            "versionCount": word["version_count"],
+            "history": [{
+                "content": word["content"],
+                "commitMsg": word["commit_msg"],
+                "timestamp": word["timestamp"],
+                "author": word["author"]
+            }]
+        }
+    
+    def get_word_history_page(
+        self,
+        word_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        Get one page of a word's versions, oldest first, with getWordVersion.
+        
+        The word is read first, then only the page's existing versions in one
+        batch, both at the same block.
+        
+        Returns:
+            Tuple of (versions, next_cursor), or None if the word doesn't exist
+        
+        Raises:
+            ValueError: If ``cursor`` is not a history page cursor
+        """
+        start = self._cursor_position(cursor)
+        block = self.get_block_number()
+        word, = self.batch_call([("getWord", [word_id])], block)
+        if word is None or not word[0]:
+            return None
+        end = min(start + limit, word[4])
+        versions = self.batch_call([("getWordVersion", [word_id, i]) for i in range(start, end)], block)
+        items = []
+        for index, version in enumerate(versions, start):
+            if version is None:
+                break
+            content, commit_msg, timestamp, author = version
+            items.append({
+                "content": content,
+                "commitMsg": commit_msg,
+                "timestamp": timestamp,
+                "author": author,
+                "index": index
+            })
+        next_cursor = encode_cursor(start + limit) if start + limit < word[4] else None
+        return items, next_cursor
+    
+    def get_words_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        author: Optional[str] = None,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of words in id order.
+        
+        ``author`` uses the contract's getUserWords index. The contract has no
+        index by term or time, so ``predicate`` filters are applied while
+        scanning and may read more than ``limit`` words.
+        
+        Returns:
+            Tuple of (words, next_cursor); next_cursor is None on the last page
+        
+        Raises:
+            ValueError: If ``cursor`` is not a word listing cursor
+        """
+        after = self._cursor_position(cursor)
+        if author:
+            user_words = self.contract.functions.getUserWords(Web3.to_checksum_address(author)).call()
+            word_ids = (i for i in user_words if i > after)
+        else:
+            word_ids = range(after + 1, self.contract.functions.wordCount().call() + 1)
+        
+        return self._paginate(word_ids, self.get_words, self._format_word, predicate, limit)
+    
+    def get_dictionaries_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        author: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of dictionaries in id order, optionally only by ``author``."""
+        after = self._cursor_position(cursor)
+        if author:
+            user_dicts = self.contract.functions.getUserDictionaries(Web3.to_checksum_address(author)).call()
+            dict_ids = (i for i in user_dicts if i > after)
+        else:
+            dict_ids = range(after + 1, self.contract.functions.dictionaryCount().call() + 1)
+        
+        return self._paginate(dict_ids, self.get_dictionaries, lambda d: d, None, limit)
+    
+    @staticmethod
+    def _cursor_position(cursor: Optional[str]) -> int:
+        """
+        The id or index a page cursor continues after (0 for the first page).
+
+        Raises:
+            ValueError: If the cursor is malformed or not from this kind of listing
+        """
+        position = decode_cursor(cursor)
+        if position is None:
+            return 0
+        if type(position) is not int or position < 0:
+            raise ValueError("Invalid cursor")
+        return position
+    
+    @staticmethod
+    def _paginate(ids: Iterable[int], fetch_many, fmt, predicate, limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        items = []
+        last_id = None
+        ids = iter(ids)
+        # One batched fetch per chunk; a page without filters needs one chunk
+        chunk_size = min(limit + 1, READ_BATCH_SIZE // 2)
+        while True:
+            chunk = list(islice(ids, chunk_size))
+            if not chunk:
+                return items, None
+            for item_id, item in zip(chunk, fetch_many(chunk)):
+                if "error" in item:
+                    continue
+                item = fmt(item)
+                if predicate is not None and not predicate(item):
+                    continue
+                if len(items) == limit:
+                    return items, encode_cursor(last_id)
+                items.append(item)
+                last_id = item_id
+    
     def get_dictionary(self, dict_id: int) -> Dict[str, Any]:
         """Get dictionary details."""
         try:
             d = self.contract.functions.getDictionary(dict_id).call()
-            return {
-                "id": d[0],
-                "title": d[1],
-                "author": d[2],
-                "word_count": d[3],
-                "timestamp": d[4],
-                "published": d[5]
-            }
+            return self._dictionary_details(d)
         except Exception as e:
             return {"error": str(e)}
     
+    @staticmethod
+    def _dictionary_details(d) -> Dict[str, Any]:
+        return {
+            "id": d[0],
+            "title": d[1],
+            "author": d[2],
+            "word_count": d[3],
+            "timestamp": d[4],
+            "published": d[5]
+        }
+    
+    def get_dictionaries(self, dict_ids: List[int], block_identifier="latest") -> List[Dict[str, Any]]:
+        """Get details of many dictionaries in batched round trips (same shape as get_dictionary)."""
+        results = self.batch_call([("getDictionary", [i]) for i in dict_ids], block_identifier)
+        return [
+            self._dictionary_details(d) if d is not None else {"error": "Dictionary not found"}
+            for d in results
+        ]
+    
     def get_all_dictionaries(self) -> List[Dict[str, Any]]:
         """Get all dictionaries from the blockchain."""
-        dictionaries = []
-        dict_count = self.contract.functions.dictionaryCount().call()
-        
-        for i in range(1, dict_count + 1):
-            d = self.get_dictionary(i)
-            if "error" not in d:
-                dictionaries.append(d)
+        block = self.get_block_number()
+        dict_count = self.contract.functions.dictionaryCount().call(block_identifier=block)
         
-        return dictionaries
+        return [
+            d for d in self.get_dictionaries(list(range(1, dict_count + 1)), block)
+            if "error" not in d
+        ]
+
+
+# Shared instance, built on first use (construction makes no node round trips)
+_client: Optional[BlockchainClient] = None
+_client_lock = threading.Lock()
+
+
+def get_blockchain_client() -> BlockchainClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = BlockchainClient()
+        return _client
 
 
-# Create global instance
-blockchain_client = BlockchainClient()
+def __getattr__(name: str):
+    # ``from api.blockchain_client import blockchain_client`` still works, lazily
+    if name == "blockchain_client":
+        return get_blockchain_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
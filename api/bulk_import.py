@@ -0,0 +1,343 @@
+"""
+Streaming bulk import of words from NDJSON or CSV.
+
+Rows are parsed as the request body arrives and applied in batches: on the
+fallback EVM each batch is one ``execute_block`` call, or ``execute_batch``
+with block production off (one journal append and fsync either way); on the
+chain each batch is one ``addWords`` transaction sent through the
+transaction pipeline. The import reports back as NDJSON events:
+
+    {"type": "error", "row": 3, "error": "Missing term or content"}
+    {"type": "progress", "processed": 1000, "imported": 998, "failed": 2}
+    {"type": "done", "processed": ..., "imported": ..., "failed": ..., "words_per_sec": ...}
+"""
+
+import asyncio
+import codecs
+import csv
+import json
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from web3.exceptions import ContractLogicError
+
+# Rows per fallback EVM commit
+IMPORT_BATCH_SIZE = 1000
+# Limits per addWords transaction; Hardhat's block gas limit is 30M
+CHAIN_BATCH_MAX_ROWS = 100
+CHAIN_BATCH_MAX_GAS = 15000000
+# Rough addWord cost: fresh storage slots for the word and its first
+# version, plus storage, calldata and log costs per string byte
+WORD_BASE_GAS = 250000
+GAS_PER_BYTE = 700
+DEFAULT_COMMIT_MSG = "Imported"
+
+Row = Tuple[int, Optional[Dict[str, str]], Optional[str]]  # (row number, entry, error)
+
+# Selector of Solidity's Error(string), the revert data of a failed require
+ERROR_STRING_SELECTOR = "0x08c379a0"
+
+
+class RowParser:
+    """Incrementally parses import rows from decoded text chunks."""
+
+    def __init__(self, fmt: str):
+        if fmt not in ("ndjson", "csv"):
+            raise ValueError("format must be ndjson or csv")
+        self.fmt = fmt
+        self.row = 0
+        self._buffer = ""
+        self._record_lines: List[str] = []
+        self._header: Optional[List[str]] = None
+        self._failed_header = False
+
+    def feed(self, text: str) -> List[Row]:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        return self._parse_lines(lines)
+
+    def close(self) -> List[Row]:
+        lines = [self._buffer] if self._buffer else []
+        self._buffer = ""
+        rows = self._parse_lines(lines)
+        if self._record_lines:
+            # Unterminated quote at the end of a CSV body
+            rows.extend(self._parse_csv_record(self._record_lines))
+            self._record_lines = []
+        return rows
+
+    def _parse_lines(self, lines: List[str]) -> List[Row]:
+        rows = []
+        for line in lines:
+            if self.fmt == "ndjson":
+                if line.strip():
+                    rows.append(self._parse_ndjson(line))
+                continue
+            # A CSV record may span lines inside quotes; it is complete once
+            # its quote characters are balanced
+            self._record_lines.append(line)
+            if sum(part.count('"') for part in self._record_lines) % 2 == 0:
+                rows.extend(self._parse_csv_record(self._record_lines))
+                self._record_lines = []
+        return rows
+
+    def _parse_ndjson(self, line: str) -> Row:
+        self.row += 1
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return self.row, None, "Invalid JSON"
+        if not isinstance(data, dict):
+            return self.row, None, "Row must be a JSON object"
+        return self._entry(data)
+
+    def _parse_csv_record(self, lines: List[str]) -> List[Row]:
+        text = "\n".join(lines)
+        if not text.strip() or self._failed_header:
+            return []
+        values = next(csv.reader([text.rstrip("\r")]), [])
+        if self._header is None:
+            self._header = [name.strip() for name in values]
+            if "term" not in self._header or "content" not in self._header:
+                self._failed_header = True
+                return [(0, None, "CSV header must include term and content columns")]
+            return []
+        self.row += 1
+        return [self._entry(dict(zip(self._header, values)))]
+
+    def _entry(self, data: Dict[str, Any]) -> Row:
+        term, content = data.get("term"), data.get("content")
+        if not isinstance(term, str) or not isinstance(content, str) or not term.strip() or not content.strip():
+            return self.row, None, "Missing term or content"
+        commit_msg = data.get("commitMsg") or DEFAULT_COMMIT_MSG
+        return self.row, {"term": term.strip(), "content": content, "commitMsg": str(commit_msg)}, None
+
+
+async def iter_rows(
+    stream: AsyncIterator[bytes],
+    fmt: str,
+    body_read: Optional[asyncio.Event] = None
+) -> AsyncIterator[Row]:
+    """
+    Parse import rows from a byte stream (e.g. ``Request.stream()``) as it arrives.
+
+    ``body_read`` is set once the whole stream has been consumed.
+    """
+    parser = RowParser(fmt)
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    async for chunk in stream:
+        for row in parser.feed(decoder.decode(chunk)):
+            yield row
+    rows = parser.feed(decoder.decode(b"", final=True)) + parser.close()
+    if body_read is not None:
+        body_read.set()
+    for row in rows:
+        yield row
+
+
+async def run_import(events: AsyncIterator[Dict[str, Any]], body_read: asyncio.Event) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Start an import and return its events once the request body is read.
+
+    Starlette's StreamingResponse listens for client disconnects on the same
+    channel that delivers the request body, so the body has to be consumed
+    before the response starts. The import runs while the body uploads and
+    the events it produces meanwhile are buffered.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for event in events:
+                await queue.put(event)
+        finally:
+            await queue.put(None)
+
+    task = asyncio.create_task(pump())
+    body_waiter = asyncio.create_task(body_read.wait())
+    await asyncio.wait({task, body_waiter}, return_when=asyncio.FIRST_COMPLETED)
+    body_waiter.cancel()
+
+    async def drain():
+        while (event := await queue.get()) is not None:
+            yield event
+        # Surface errors raised by the import
+        await task
+
+    return drain()
+
+
+class ImportReport:
+    """Counters and NDJSON events for one import."""
+
+    def __init__(self):
+        self.processed = 0
+        self.imported = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+    def error(self, row: int, message: str) -> Dict[str, Any]:
+        self.failed += 1
+        if row:
+            self.processed += 1
+        return {"type": "error", "row": row, "error": message}
+
+    def progress(self) -> Dict[str, Any]:
+        return {"type": "progress", "processed": self.processed, "imported": self.imported, "failed": self.failed}
+
+    def done(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            **self.progress(),
+            "type": "done",
+            "elapsed": round(elapsed, 3),
+            "words_per_sec": round(self.imported / elapsed, 1) if elapsed > 0 else None
+        }
+
+
+async def import_to_evm(
+    rows: AsyncIterator[Row],
+    evm,
+    sender: str,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    blocks: bool = True
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Apply imported rows to the fallback EVM, one persistence commit per batch.
+
+    With ``blocks`` each batch is sealed into a block; otherwise it is
+    applied with ``execute_batch``, like other writes when block production
+    is off.
+    """
+    report = ImportReport()
+    batch: List[Tuple[int, Dict[str, str]]] = []
+
+    async def commit():
+        txs = [{"action": "addWord", **entry} for _, entry in batch]
+        if blocks:
+            results, _ = await run_in_threadpool(evm.execute_block, [(sender, tx) for tx in txs])
+        else:
+            results = await run_in_threadpool(evm.execute_batch, sender, txs)
+        events = []
+        for (number, _), result in zip(batch, results):
+            if result["success"]:
+                report.imported += 1
+                report.processed += 1
+            else:
+                events.append(report.error(number, result.get("error", "Failed to add word")))
+        batch.clear()
+        return events + [report.progress()]
+
+    async for number, entry, error in rows:
+        if error:
+            yield report.error(number, error)
+            continue
+        batch.append((number, entry))
+        if len(batch) >= batch_size:
+            for event in await commit():
+                yield event
+    if batch:
+        for event in await commit():
+            yield event
+    yield report.done()
+
+
+def estimate_add_word_gas(entry: Dict[str, str]) -> int:
+    size = sum(len(entry[key].encode()) for key in ("term", "content", "commitMsg"))
+    return WORD_BASE_GAS + GAS_PER_BYTE * size
+
+
+def supports_add_words(client) -> bool:
+    """
+    Whether the deployed contract has ``addWords`` (older deployments don't).
+
+    Probed with an ``eth_call`` of an empty ``addWords``. The call reverts
+    with a reason when the server account hasn't staked yet, which still
+    shows the function exists; a contract without it reverts without one.
+    It is checked again on each import, so a redeployed contract is noticed.
+    """
+    try:
+        client.contract.functions.addWords([], [], []).call({"from": client.server_account.address})
+    except ContractLogicError as e:
+        data = e.data.get("data") if isinstance(e.data, dict) else e.data
+        return isinstance(data, str) and data.removeprefix("Reverted ").startswith(ERROR_STRING_SELECTOR)
+    except Exception:
+        return False
+    return True
+
+
+async def import_to_chain(
+    rows: AsyncIterator[Row],
+    client,
+    pipeline,
+    max_rows: int = CHAIN_BATCH_MAX_ROWS,
+    max_gas: int = CHAIN_BATCH_MAX_GAS
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Publish imported rows as batched ``addWords`` transactions.
+
+    Batches are sent through the transaction pipeline without waiting for
+    each other, so parsing, sending and mining overlap. Without ``addWords``
+    on the deployed contract every row becomes its own pipelined ``addWord``.
+    """
+    report = ImportReport()
+    if not await run_in_threadpool(supports_add_words, client):
+        max_rows = 1
+    in_flight: deque = deque()  # (handle, row numbers)
+    batch: List[Tuple[int, Dict[str, str]]] = []
+    batch_gas = 0
+
+    def submit():
+        entries = [entry for _, entry in batch]
+        if max_rows == 1:
+            entry = entries[0]
+            handle = pipeline.submit("addWord", [entry["term"], entry["content"], entry["commitMsg"]])
+        else:
+            handle = pipeline.submit(
+                "addWords",
+                [[e["term"] for e in entries], [e["content"] for e in entries], [e["commitMsg"] for e in entries]],
+                gas=batch_gas
+            )
+        in_flight.append((handle, [number for number, _ in batch]))
+        batch.clear()
+
+    async def finish_oldest():
+        handle, numbers = in_flight.popleft()
+        result = await asyncio.wrap_future(handle.future)
+        if result["success"]:
+            report.imported += len(numbers)
+            report.processed += len(numbers)
+            return [report.progress()]
+        return [report.error(number, result.get("error") or "Transaction failed") for number in numbers]
+
+    async for number, entry, error in rows:
+        if error:
+            yield report.error(number, error)
+            continue
+        gas = estimate_add_word_gas(entry)
+        if gas > max_gas:
+            # Wouldn't fit a transaction even on its own
+            yield report.error(number, "Row too large")
+            continue
+        if batch and (len(batch) >= max_rows or batch_gas + gas > max_gas):
+            submit()
+            batch_gas = 0
+        batch.append((number, entry))
+        batch_gas += gas
+        # Report finished batches; wait for the oldest when too many are outstanding
+        while in_flight and (in_flight[0][0].future.done() or len(in_flight) >= 2 * pipeline.max_in_flight):
+            for event in await finish_oldest():
+                yield event
+    if batch:
+        submit()
+    while in_flight:
+        for event in await finish_oldest():
+            yield event
+    yield report.done()
+
+
+async def ndjson_lines(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    async for event in events:
+        yield json.dumps(event) + "\n"
@@ -0,0 +1,363 @@
+"""
+Event-indexed local read replica of the Digitionary contract.
+
+A background thread follows WordCreated, WordUpdated and DictionaryCreated
+logs and applies them to a local StateManager, so read endpoints are served
+from memory instead of one or more eth_calls per word.
+"""
+
+import threading
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
+
+from web3 import Web3
+
+from evm.core.blockchain_storage import BlockchainStorage
+from evm.core.state import StateManager
+
+INDEXED_EVENTS = ("WordCreated", "WordUpdated", "DictionaryCreated")
+
+# Blocks per eth_getLogs request
+LOG_CHUNK_SIZE = 2000
+# Re-orgs deeper than this many blocks trigger a full re-sync
+REORG_DEPTH = 64
+
+
+class ReplicaOutOfSync(Exception):
+    """Raised when the logs don't line up with the local replica."""
+
+
+class ChainIndexer:
+    """
+    Follows Digitionary contract events into a local StateManager.
+
+    Event payloads only carry ids, terms, titles and commit messages, so the
+    content of each new version and the word ids of each new dictionary are
+    read with one batched call per log range (see ``BlockchainClient.batch_call``).
+
+    Re-orgs are detected by comparing the stored hash of the last indexed
+    block with the node's. Every applied event is kept in an undo log for
+    the last ``reorg_depth`` blocks; on a re-org the events after the fork
+    point are reverted and the blocks re-indexed. A chain that no longer
+    contains any recent indexed block (e.g. a restarted hardhat node) is
+    re-indexed from scratch.
+
+    The replica is checkpointed to ``storage`` every ``checkpoint_interval``
+    blocks, so a restart resumes from the checkpointed block.
+
+    Listeners (``add_listener``) are told what each poll changed, as
+    (kind, id) pairs from ``StateManager.pop_changes`` plus ("head", block)
+    when the chain head moved.
+    """
+
+    def __init__(
+        self,
+        client,
+        storage: BlockchainStorage = None,
+        poll_interval: float = 1.0,
+        reorg_depth: int = REORG_DEPTH,
+        checkpoint_interval: int = 100
+    ):
+        self.client = client
+        self.storage = storage or BlockchainStorage(filepath=".digitionary_replica.json")
+        self.poll_interval = poll_interval
+        self.reorg_depth = reorg_depth
+        self.checkpoint_interval = checkpoint_interval
+
+        self.state = StateManager()
+        self.last_block = 0  # last fully indexed block
+        self.head_block = 0
+        self.synced = False
+        self.block_hashes: Dict[int, str] = {}  # recently indexed block -> hash
+        self._undo: List[Tuple[int, str, int]] = []  # (block, event, id) for recent blocks
+        self._checkpoint_block = 0
+        self.lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[Optional[Set[Tuple[str, Any]]]], None]] = []
+
+        # topic0 -> event, for decoding the logs
+        self._events = {}
+        for name in INDEXED_EVENTS:
+            event = getattr(client.contract.events, name)()
+            signature = f"{name}({','.join(i['type'] for i in event.abi['inputs'])})"
+            self._events[Web3.keccak(text=signature).hex()] = event
+        self._load_checkpoint()
+
+    def start(self):
+        """Start following the chain in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="digitionary-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and checkpoint the replica."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        with self.lock:
+            self.save_checkpoint()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.synced = False
+                print(f"⚠️ Chain indexer poll failed: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def poll(self) -> int:
+        """
+        Index every block up to the current head.
+
+        Node round trips happen outside ``lock``; it is only held while the
+        fetched events are applied, so readers are never blocked on the node.
+        This thread is the only writer of ``state``.
+
+        Returns:
+            Number of events applied
+        """
+        head = self.client.get_block_number()
+        previous_head, self.head_block = self.head_block, head
+        self._check_reorg()
+        applied = 0
+        while self.last_block < head:
+            to_block = min(head, self.last_block + LOG_CHUNK_SIZE)
+            to_hash = self._block_hash(to_block)
+            logs = self.client.w3.eth.get_logs({
+                "address": self.client.contract_address,
+                "fromBlock": self.last_block + 1,
+                "toBlock": to_block,
+                "topics": [list(self._events)]
+            })
+            events, results = self._read_events(logs, to_block)
+            with self.lock:
+                try:
+                    applied += self._apply_events(events, results)
+                except ReplicaOutOfSync:
+                    # Events may have been half applied; start over on the next poll
+                    self.reset()
+                    raise
+                # Blocks with events are the likely fork points of a later re-org
+                for log in logs:
+                    self.block_hashes[log["blockNumber"]] = log["blockHash"].hex()
+                self.last_block = to_block
+                self.block_hashes[to_block] = to_hash
+                self._prune()
+        if self._listeners:
+            with self.lock:
+                changes = self.state.pop_changes()
+            if changes is not None and head != previous_head:
+                changes.add(("head", head))
+            # Before synced is set, so stale reads are dropped before replica reads resume
+            self._notify(changes)
+        self.synced = True
+        if self.last_block - self._checkpoint_block >= self.checkpoint_interval:
+            self.save_checkpoint()
+        return applied
+
+    def reset(self):
+        """Drop the replica and re-index from the first block."""
+        with self.lock:
+            self.state = StateManager()
+            self.last_block = 0
+            self.block_hashes = {}
+            self._undo = []
+            self._checkpoint_block = 0
+            if self._listeners:
+                self.state.watch_changes()
+        self._notify(None)
+
+    def add_listener(self, listener: Callable[[Optional[Set[Tuple[str, Any]]]], None]):
+        """Call ``listener`` with the changes of every poll (None: unknown, assume everything)."""
+        with self.lock:
+            self.state.watch_changes()
+            self._listeners.append(listener)
+
+    def _notify(self, changes: Optional[Set[Tuple[str, Any]]]):
+        if changes == set():
+            return
+        for listener in self._listeners:
+            try:
+                listener(changes)
+            except Exception as e:
+                print(f"⚠️ Chain indexer listener failed: {e}")
+
+    def _block_hash(self, number: int) -> Optional[str]:
+        try:
+            block = self.client.w3.eth.get_block(number)
+        except Exception:
+            return None
+        return block["hash"].hex() if block else None
+
+    def _check_reorg(self):
+        """Roll back to the last indexed block still on the chain."""
+        if not self.last_block or self._block_hash(self.last_block) == self.block_hashes.get(self.last_block):
+            return
+
+        fork = None
+        for number in sorted(self.block_hashes, reverse=True):
+            if number < self.last_block and self._block_hash(number) == self.block_hashes[number]:
+                fork = number
+                break
+        # Hashes and undo entries are pruned together, so any fork point
+        # found here still has all later events in the undo log
+        if fork is None:
+            print("⚠️ Chain re-org beyond the undo window, re-indexing from scratch")
+            self.reset()
+            return
+
+        print(f"⚠️ Chain re-org detected, rolling back to block {fork}")
+        with self.lock:
+            while self._undo and self._undo[-1][0] > fork:
+                _, event, item_id = self._undo.pop()
+                if event == "WordCreated":
+                    self.state.revert_add_word(item_id)
+                elif event == "WordUpdated":
+                    self.state.revert_update_word(item_id)
+                else:
+                    self.state.revert_create_dictionary(item_id)
+            self.block_hashes = {n: h for n, h in self.block_hashes.items() if n <= fork}
+            self.last_block = fork
+            self._checkpoint_block = min(self._checkpoint_block, fork)
+
+    def _prune(self):
+        floor = self.last_block - self.reorg_depth
+        self.block_hashes = {n: h for n, h in self.block_hashes.items() if n >= floor}
+        drop = 0
+        while drop < len(self._undo) and self._undo[drop][0] < floor:
+            drop += 1
+        if drop:
+            del self._undo[:drop]
+
+    def _read_events(self, logs: List[Dict[str, Any]], block_identifier: int) -> Tuple[List, List]:
+        """Decode logs and batch-read the version content and dictionary word ids they refer to."""
+        events = []
+        for log in logs:
+            topic = log["topics"][0].hex() if log["topics"] else None
+            event = self._events.get(topic)
+            if event is not None:
+                events.append(event.process_log(log))
+        events.sort(key=lambda e: (e["blockNumber"], e["logIndex"]))
+
+        # Next version index per updated word, counting earlier updates in this range
+        versions: Dict[int, int] = {}
+        calls = []
+        for e in events:
+            args = e["args"]
+            if e["event"] == "WordCreated":
+                versions[args["wordId"]] = 1
+                calls.append(("getWordVersion", [args["wordId"], 0]))
+            elif e["event"] == "WordUpdated":
+                word_id = args["wordId"]
+                if word_id not in versions:
+                    word = self.state.words.get(word_id)
+                    if word is None:
+                        raise ReplicaOutOfSync(f"update of unknown word {word_id}")
+                    versions[word_id] = len(word["history"])
+                calls.append(("getWordVersion", [word_id, versions[word_id]]))
+                versions[word_id] += 1
+            else:
+                calls.append(("getDictionary", [args["dictId"]]))
+                calls.append(("getDictionaryWordIds", [args["dictId"]]))
+
+        results = self.client.batch_call(calls, block_identifier) if calls else []
+        if any(result is None for result in results):
+            raise Exception(f"contract reads for blocks up to {block_identifier} failed")
+        return events, results
+
+    def _apply_events(self, events: List, results: List) -> int:
+        results = iter(results)
+        for e in events:
+            args = e["args"]
+            name = e["event"]
+            if name == "DictionaryCreated":
+                details, word_ids = next(results), next(results)
+                if args["dictId"] != self.state.dictionary_count + 1:
+                    raise ReplicaOutOfSync(f"unexpected dictionary id {args['dictId']}")
+                self.state.create_dictionary(args["title"], list(word_ids[0]), args["author"], timestamp=details[4])
+                item_id = args["dictId"]
+            else:
+                content, commit_msg, timestamp, author = next(results)
+                if name == "WordCreated":
+                    if args["wordId"] != self.state.word_count + 1:
+                        raise ReplicaOutOfSync(f"unexpected word id {args['wordId']}")
+                    self.state.add_word(args["term"], content, commit_msg, author, timestamp=timestamp)
+                else:
+                    self.state.update_word(args["wordId"], content, commit_msg, author, timestamp=timestamp)
+                item_id = args["wordId"]
+            self._undo.append((e["blockNumber"], name, item_id))
+        return len(events)
+
+    def get_word(self, word_id: int) -> Optional[Dict[str, Any]]:
+        """A word in the shape of ``BlockchainClient.get_word``, or None if unknown."""
+        with self.lock:
+            word = self.state.words.get(word_id)
+            if word is None:
+                return None
+            latest = word["history"][-1]
+            return {
+                "id": word["id"],
+                "term": word["term"],
+                "owner": word["owner"],
+                "active": word["active"],
+                "version_count": len(word["history"]),
+                "content": latest["content"],
+                "commit_msg": latest["commitMsg"],
+                "timestamp": latest["timestamp"],
+                "author": latest["author"]
+            }
+
+    @staticmethod
+    def format_dictionary(dictionary: Dict[str, Any]) -> Dict[str, Any]:
+        """A replica dictionary in the shape of ``BlockchainClient.get_dictionary``."""
+        return {
+            "id": dictionary["id"],
+            "title": dictionary["title"],
+            "author": dictionary["author"],
+            "word_count": len(dictionary["wordIds"]),
+            "timestamp": dictionary["timestamp"],
+            "published": True
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Replica progress for the status endpoint."""
+        return {
+            "synced": self.synced,
+            "last_block": self.last_block,
+            "head_block": self.head_block,
+            "words": self.state.word_count,
+            "dictionaries": self.state.dictionary_count
+        }
+
+    def save_checkpoint(self) -> bool:
+        """Persist the replica and the block it is synced to."""
+        data = self.state.to_dict()
+        data["indexer"] = {
+            "contract": self.client.contract_address,
+            "last_block": self.last_block,
+            "block_hashes": {str(n): h for n, h in self.block_hashes.items()},
+            "undo": [list(entry) for entry in self._undo]
+        }
+        if not self.storage.save_state(data):
+            return False
+        self._checkpoint_block = self.last_block
+        return True
+
+    def _load_checkpoint(self):
+        try:
+            data = self.storage.load_state()
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable chain replica checkpoint: {e}")
+            return
+        meta = data.pop("indexer", None)
+        if not meta or meta.get("contract") != self.client.contract_address:
+            return
+        self.state.from_dict(data)
+        self.last_block = meta["last_block"]
+        self._checkpoint_block = self.last_block
+        self.block_hashes = {int(n): h for n, h in meta["block_hashes"].items()}
+        self._undo = [tuple(entry) for entry in meta["undo"]]
@@ -1,27 +1,235 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from siwe import SiweMessage
 from eth_account.messages import encode_defunct
 from web3 import Web3
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 import secrets
 import time
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Iterator, List, Optional, Tuple
 
 # Import blockchain client for real blockchain interaction
-from api.blockchain_client import blockchain_client
+from api.blockchain_client import BlockchainClient, get_blockchain_client
+from api.bulk_import import iter_rows, import_to_chain, import_to_evm, ndjson_lines, run_import
+from api.chain_indexer import ChainIndexer
+from api.response_cache import CachedResponse, ResponseCache, tags_for_changes
+from api.tx_pipeline import TxPipeline
 
 # Import fallback in-memory EVM for when blockchain is not available
 from evm.execution.evm import EVM
+from evm.execution.block_builder import BlockBuilder
+from evm.execution.parallel import ParallelExecutor
+from evm.core.mempool import MempoolFull
+from evm.core.state import StateManager
+from evm.core import objects
+from evm.core.binary_storage import BinaryBlockchainStorage
+
+# Whether reads and writes go to the Hardhat node; probed in the background
+# (see _watch_chain) and switched at runtime as the node comes and goes
+chain_connected = False
+# Set once the first probe has finished; requests that pick a backend wait for it
+_backend_known = asyncio.Event()
+
+async def _wait_for_backend():
+    if not _backend_known.is_set():
+        await _backend_known.wait()
+
+# For routes that choose between the node and the fallback EVM
+_NEEDS_BACKEND = [Depends(_wait_for_backend)]
 
 app = FastAPI()
 
-# Initialize fallback EVM
-fallback_evm = EVM()
+# Word history and dictionary trees go to a packfile when DIGITIONARY_OBJECTS_DIR
+# is set; opened first, since loading the state stores objects again
+if os.environ.get("DIGITIONARY_OBJECTS_DIR"):
+    objects.open_object_store(os.environ["DIGITIONARY_OBJECTS_DIR"])
+
+# Initialize fallback EVM (DIGITIONARY_STATE_FORMAT=binary for the mmap-backed format)
+if os.environ.get("DIGITIONARY_STATE_FORMAT") == "binary":
+    fallback_evm = EVM(storage=BinaryBlockchainStorage(journal=True))
+else:
+    fallback_evm = EVM()
+
+# Seconds between node health probes
+HEALTH_INTERVAL = float(os.environ.get("DIGITIONARY_HEALTH_INTERVAL", "5"))
+
+# Built the first time the node is reachable (_connect_chain):
+# the node client, the local read replica of the contract fed by its events
+# (DIGITIONARY_REPLICA=0 disables it) and non-blocking writes from the server account
+blockchain_client: Optional[BlockchainClient] = None
+chain_indexer: Optional[ChainIndexer] = None
+tx_pipeline: Optional[TxPipeline] = None
+
+# Fallback writes are sealed into blocks (DIGITIONARY_BLOCKS=0 applies each one immediately)
+block_builder = None
+# DIGITIONARY_PARALLEL_WORKERS=n speculates contract calls in n worker processes,
+# started with the app (see start_background_workers)
+PARALLEL_WORKERS = int(os.environ.get("DIGITIONARY_PARALLEL_WORKERS", "0"))
+if os.environ.get("DIGITIONARY_BLOCKS", "1") != "0":
+    block_builder = BlockBuilder(
+        fallback_evm,
+        block_interval=float(os.environ.get("DIGITIONARY_BLOCK_INTERVAL", "0.05")),
+        block_size=int(os.environ.get("DIGITIONARY_BLOCK_SIZE", "500"))
+    )
+
+# Serialized read responses, dropped when the state behind them changes
+# (fallback EVM writes, replica events); DIGITIONARY_CACHE_SIZE=0 disables it
+response_cache = ResponseCache(max_entries=int(os.environ.get("DIGITIONARY_CACHE_SIZE", "1024")))
+
+def _invalidate_responses(changes):
+    response_cache.invalidate(tags_for_changes(changes))
+
+if response_cache.max_entries > 0:
+    fallback_evm.add_listener(_invalidate_responses)
+
+def _connect_chain():
+    """Build (once) and start the chain components; the node has just become reachable."""
+    global chain_indexer, tx_pipeline
+    if tx_pipeline is None:
+        tx_pipeline = TxPipeline(blockchain_client)
+    else:
+        # The node may have been restarted with a fresh chain
+        tx_pipeline.nonces.resync()
+    tx_pipeline.start()
+    if chain_indexer is None and os.environ.get("DIGITIONARY_REPLICA", "1") != "0":
+        chain_indexer = ChainIndexer(blockchain_client)
+        if response_cache.max_entries > 0:
+            chain_indexer.add_listener(_invalidate_responses)
+    if chain_indexer is not None:
+        chain_indexer.start()
+
+def _auto_stake():
+    # Through the pipeline, so the stake doesn't race its nonces
+    blockchain_client.ensure_staked(
+        lambda wei: tx_pipeline.submit("stake", [], value=wei).future.result()
+    )
+
+async def _probe_chain():
+    """Check the node once and switch backends if its reachability changed."""
+    global blockchain_client, chain_connected
+    if blockchain_client is None:
+        blockchain_client = await run_in_threadpool(get_blockchain_client)
+    connected = await run_in_threadpool(blockchain_client.is_connected)
+    if connected and not chain_connected:
+        await run_in_threadpool(_connect_chain)
+        # Staking waits for a receipt; requests are served meanwhile
+        asyncio.get_running_loop().run_in_executor(None, _auto_stake)
+    if connected != chain_connected or not _backend_known.is_set():
+        print(f"🔗 Blockchain connection: {'Connected to Hardhat' if connected else 'Using fallback EVM'}")
+    chain_connected = connected
+    _backend_known.set()
+
+async def _watch_chain():
+    while True:
+        try:
+            await _probe_chain()
+        except Exception as e:
+            print(f"⚠️ Blockchain health probe failed: {e}")
+            _backend_known.set()
+        await asyncio.sleep(HEALTH_INTERVAL)
+
+_health_task: Optional[asyncio.Task] = None
+
+@app.on_event("startup")
+async def start_background_workers():
+    global _health_task
+    _health_task = asyncio.create_task(_watch_chain())
+    if block_builder is not None:
+        if PARALLEL_WORKERS:
+            # Spawned, not forked: this process already runs threads
+            pool = ProcessPoolExecutor(PARALLEL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            block_builder.executor = ParallelExecutor(fallback_evm, pool)
+        block_builder.start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    if _health_task is not None:
+        _health_task.cancel()
+    if tx_pipeline is not None:
+        await run_in_threadpool(tx_pipeline.stop)
+    if block_builder is not None:
+        await run_in_threadpool(block_builder.stop)
+    if chain_indexer is not None:
+        await run_in_threadpool(chain_indexer.stop)
+    await run_in_threadpool(objects.close_object_store)
+
+def _replica_synced() -> bool:
+    """Whether chain reads can be served from the local replica."""
+    return chain_indexer is not None and chain_indexer.synced
+
+def _replica_read(read, *args, **kwargs):
+    """Run read(state, ...) against the replica, consistent with concurrent indexing."""
+    with chain_indexer.lock:
+        return read(chain_indexer.state, *args, **kwargs)
+
+def _cache_source() -> Optional[str]:
+    """
+    Where reads are served from, if its changes invalidate the response
+    cache; None for direct chain reads, which are not cached.
+    """
+    if response_cache.max_entries <= 0:
+        return None
+    if _replica_synced():
+        return "replica"
+    if not chain_connected:
+        return "fallback_evm"
+    return None
+
+def _json_body(content: Any) -> bytes:
+    """``content`` serialized as FastAPI's JSONResponse would."""
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+async def _cached(request: Request, key: Tuple, tags: Tuple[str, ...], compute: Callable[[], Awaitable[Any]]) -> Response:
+    """
+    Serve a read endpoint from the response cache, or compute and cache it.
+
+    Args:
+        request: For If-None-Match
+        key: Endpoint and parameters
+        tags: State the response depends on (see tags_for_changes)
+        compute: Builds the response content; HTTPExceptions are not cached
 
-# Check if blockchain is available
-USE_REAL_BLOCKCHAIN = blockchain_client.is_connected()
-print(f"🔗 Blockchain connection: {'Connected to Hardhat' if USE_REAL_BLOCKCHAIN else 'Using fallback EVM'}")
+    Returns:
+        The JSON response with its ETag, or 304 if the client has it already
+    """
+    source = _cache_source()
+    entry = response_cache.get((source,) + key) if source else None
+    if entry is None:
+        if not _backend_known.is_set():
+            # Only a miss needs to know which backend computes it
+            await _wait_for_backend()
+            source = _cache_source()
+        version = response_cache.version
+        body = _json_body(await compute())
+        if source:
+            entry = response_cache.put((source,) + key, tags, body, version)
+        else:
+            entry = CachedResponse(body)
+    if entry.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers={"ETag": entry.etag})
+    return Response(entry.body, media_type="application/json", headers={"ETag": entry.etag})
+
+def _chain_stats() -> dict:
+    """blockchain_client.get_stats(), cached while the replica reports new blocks."""
+    cached = _cache_source() == "replica"
+    entry = response_cache.get(("replica", "stats")) if cached else None
+    if entry is not None:
+        return json.loads(entry.body)
+    version = response_cache.version
+    stats = blockchain_client.get_stats()
+    if cached and "error" not in stats:
+        response_cache.put(("replica", "stats"), ("stats",), _json_body(stats), version)
+    return stats
 
 app.add_middleware(
     CORSMiddleware,
@@ -49,6 +257,12 @@ class Transaction(BaseModel):
 class StakeRequest(BaseModel):
     amount: float  # ETH amount
 
+# Page size bounds for the paginated listing endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Records read per step of a streamed listing
+STREAM_PAGE_SIZE = 500
+
 @app.post("/api/auth/siwe")
 async def siwe_auth(auth: SIWEAuth):
     try:
@@ -88,65 +302,81 @@ async def logout():
 
 @app.get("/api/health")
 async def health():
-    return {"status": "ok", "blockchain": USE_REAL_BLOCKCHAIN}
+    """Answers at once; ``probed`` is false until the first node probe has finished."""
+    return {"status": "ok", "blockchain": chain_connected, "probed": _backend_known.is_set()}
 
 # --- Blockchain Endpoints ---
 
-@app.get("/api/chain/status")
+@app.get("/api/chain/status", dependencies=_NEEDS_BACKEND)
 async def blockchain_status():
-    """Get blockchain connection status and stats."""
-    if USE_REAL_BLOCKCHAIN:
-        stats = blockchain_client.get_stats()
+    """
+    Get blockchain connection status and stats.
+
+    ``cache`` reports the response cache: entries, bytes, hits, misses,
+    invalidations and evictions.
+    """
+    if chain_connected:
+        stats = await run_in_threadpool(_chain_stats)
         return {
             "connected": stats.get("connected", False),
             "blockchain_type": "hardhat",
-            "stats": stats
+            "stats": stats,
+            "replica": chain_indexer.status() if chain_indexer is not None else None,
+            "tx_pipeline": tx_pipeline.stats(),
+            "rpc": blockchain_client.provider.stats(),
+            "cache": response_cache.stats()
         }
     else:
         stats = fallback_evm.get_blockchain_stats()
         return {
             "connected": True,
             "blockchain_type": "fallback_evm",
-            "stats": stats
+            "stats": stats,
+            "blocks": block_builder.stats() if block_builder is not None else None,
+            "cache": response_cache.stats()
         }
 
-@app.post("/api/chain/stake")
+@app.post("/api/chain/stake", dependencies=_NEEDS_BACKEND)
 async def stake_eth(request: StakeRequest):
     """Stake ETH for Proof of Stake participation."""
-    if not USE_REAL_BLOCKCHAIN:
+    if not chain_connected:
         raise HTTPException(status_code=503, detail="Staking requires real blockchain")
     
-    result = blockchain_client.stake(request.amount)
+    handle = tx_pipeline.submit("stake", [], value=Web3.to_wei(request.amount, 'ether'))
+    result = await asyncio.wrap_future(handle.future)
     if not result["success"]:
         raise HTTPException(status_code=400, detail="Staking failed")
-    return result
+    return {"success": True, "tx_hash": result["tx_hash"], "block_number": result["block_number"]}
 
-@app.get("/api/chain/stake/{address}")
+@app.get("/api/chain/stake/{address}", dependencies=_NEEDS_BACKEND)
 async def get_stake(address: str):
     """Get user's current stake."""
-    if USE_REAL_BLOCKCHAIN:
-        stake = blockchain_client.get_user_stake(address)
+    if chain_connected:
+        stake = await run_in_threadpool(blockchain_client.get_user_stake, address)
         return {"address": address, "stake_eth": stake}
     return {"address": address, "stake_eth": 0}
 
-@app.post("/api/chain/transaction")
-async def submit_transaction(tx: Transaction, address: str):
-    """Submit a transaction to the blockchain."""
-    if USE_REAL_BLOCKCHAIN:
-        return await _execute_blockchain_tx(tx, address)
+@app.post("/api/chain/transaction", dependencies=_NEEDS_BACKEND)
+async def submit_transaction(tx: Transaction, address: str, wait: bool = True):
+    """
+    Submit a transaction to the blockchain.
+    
+    wait=false returns a tx handle as soon as the transaction is queued
+    (on the fallback EVM, when blocks are enabled); poll
+    /api/chain/tx/{tx_id} for its status.
+    """
+    if chain_connected:
+        return await _execute_blockchain_tx(tx, address, wait)
     else:
-        result = fallback_evm.execute_transaction(address, tx.model_dump())
-        if not result["success"]:
-            raise HTTPException(status_code=400, detail=result.get("error"))
-        return result
+        return await _execute_fallback_tx(tx, address, wait)
 
-@app.post("/api/chain/publish")
+@app.post("/api/chain/publish", dependencies=_NEEDS_BACKEND)
 async def publish_to_blockchain(tx: Transaction, address: str):
     """Explicitly publish a transaction to the blockchain with validation."""
     if not address:
         raise HTTPException(status_code=401, detail="Wallet address required")
     
-    if USE_REAL_BLOCKCHAIN:
+    if chain_connected:
         result = await _execute_blockchain_tx(tx, address)
         return {
             **result,
@@ -156,9 +386,7 @@ async def publish_to_blockchain(tx: Transaction, address: str):
             "timestamp": int(time.time())
         }
     else:
-        result = fallback_evm.execute_transaction(address, tx.model_dump())
-        if not result["success"]:
-            raise HTTPException(status_code=400, detail=result.get("error"))
+        result = await _execute_fallback_tx(tx, address)
         return {
             **result,
             "blockchain_confirmed": True,
@@ -167,75 +395,406 @@ async def publish_to_blockchain(tx: Transaction, address: str):
             "timestamp": int(time.time())
         }
 
-async def _execute_blockchain_tx(tx: Transaction, address: str):
+async def _execute_fallback_tx(tx: Transaction, address: str, wait: bool = True):
+    """Execute a transaction on the fallback EVM, in the next block if blocks are enabled."""
+    if block_builder is None:
+        # Off the event loop so concurrent writes share journal fsyncs
+        result = await run_in_threadpool(fallback_evm.execute_transaction, address, tx.model_dump())
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result.get("error"))
+        return result
+    
+    try:
+        handle = block_builder.submit(address, tx.model_dump())
+    except MempoolFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not wait:
+        return {"success": True, "tx_id": handle.id, "status": handle.status}
+    
+    result = await asyncio.wrap_future(handle.future)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    return result
+
+async def _execute_blockchain_tx(tx: Transaction, address: str, wait: bool = True):
     """Execute a transaction on the real blockchain."""
     action = tx.action
     
     if action == "addWord":
         if not tx.term or not tx.content:
             raise HTTPException(status_code=400, detail="Missing term or content")
-        result = blockchain_client.add_word(tx.term, tx.content, tx.commitMsg or "")
-        if result.get("success"):
-            return {
-                "success": True,
-                "wordId": result["word_id"],
-                "tx_hash": result["tx_hash"],
-                "block_number": result["block_number"]
-            }
-        else:
-            raise HTTPException(status_code=400, detail="Failed to add word")
+        args = [tx.term, tx.content, tx.commitMsg or ""]
+        error = "Failed to add word"
     
     elif action == "updateWord":
         if tx.wordId is None or not tx.content:
             raise HTTPException(status_code=400, detail="Missing wordId or content")
-        result = blockchain_client.update_word(tx.wordId, tx.content, tx.commitMsg or "")
-        if result.get("success"):
-            return {
-                "success": True,
-                "wordId": result["word_id"],
-                "tx_hash": result["tx_hash"],
-                "block_number": result["block_number"]
-            }
-        else:
-            raise HTTPException(status_code=400, detail="Failed to update word")
+        args = [tx.wordId, tx.content, tx.commitMsg or ""]
+        error = "Failed to update word"
     
     elif action == "createDictionary":
         if not tx.title or not tx.wordIds:
             raise HTTPException(status_code=400, detail="Missing title or wordIds")
-        result = blockchain_client.create_dictionary(tx.title, tx.wordIds)
-        if result.get("success"):
-            return {
-                "success": True,
-                "dictionaryId": result["dictionary_id"],
-                "tx_hash": result["tx_hash"],
-                "block_number": result["block_number"]
-            }
-        else:
-            raise HTTPException(status_code=400, detail="Failed to create dictionary")
+        args = [tx.title, tx.wordIds]
+        error = "Failed to create dictionary"
     
     else:
         raise HTTPException(status_code=400, detail="Unknown action")
+    
+    handle = tx_pipeline.submit(action, args)
+    if not wait:
+        return {"success": True, "tx_id": handle.id, "status": handle.status}
+    
+    result = await asyncio.wrap_future(handle.future)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=error)
+    response = {
+        "success": True,
+        "tx_id": result["tx_id"],
+        "tx_hash": result["tx_hash"],
+        "block_number": result["block_number"]
+    }
+    if action == "createDictionary":
+        response["dictionaryId"] = result.get("dictionary_id")
+    else:
+        response["wordId"] = result.get("word_id", tx.wordId)
+    return response
+
+@app.post("/api/chain/import", dependencies=_NEEDS_BACKEND)
+async def bulk_import(request: Request, address: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """
+    Import many words at once from an NDJSON or CSV body.
+    
+    NDJSON rows are {"term", "content", "commitMsg"} objects; CSV needs a
+    header with term and content (and optionally commitMsg) columns. The
+    response streams NDJSON events: an error per rejected row, progress
+    after each committed batch and a final summary.
+    """
+    if not address:
+        raise HTTPException(status_code=401, detail="Wallet address required")
+    
+    body_read = asyncio.Event()
+    rows = iter_rows(request.stream(), format, body_read)
+    if chain_connected:
+        events = import_to_chain(rows, blockchain_client, tx_pipeline)
+    else:
+        events = import_to_evm(rows, fallback_evm, address, blocks=block_builder is not None)
+    events = await run_import(events, body_read)
+    return StreamingResponse(ndjson_lines(events), media_type="application/x-ndjson")
+
+@app.get("/api/chain/tx/{tx_id}")
+async def get_transaction_status(tx_id: str):
+    """Status of a transaction submitted with wait=false (queued, pending, confirmed or failed)."""
+    # Either backend may have taken it, if the node came or went since
+    status = tx_pipeline.status(tx_id) if tx_pipeline is not None else None
+    if status is None and block_builder is not None:
+        handle = block_builder.get(tx_id)
+        status = handle.to_dict() if handle is not None else None
+    if status is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return status
+
+@app.get("/api/chain/block/{number}", dependencies=_NEEDS_BACKEND)
+async def get_block(number: int):
+    """Header of a recent fallback EVM block."""
+    if chain_connected:
+        raise HTTPException(status_code=400, detail="Block headers are served by the node")
+    header = fallback_evm.get_block(number)
+    if header is None:
+        raise HTTPException(status_code=404, detail="Block not found")
+    return header
 
 @app.get("/api/chain/words")
-async def get_words():
-    """Get all words from the blockchain."""
-    if USE_REAL_BLOCKCHAIN:
-        return blockchain_client.get_all_words()
-    return fallback_evm.get_state().get_all_words()
+async def get_words(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    term: Optional[str] = None,
+    prefix: Optional[str] = None,
+    author: Optional[str] = None,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    stream: bool = False
+):
+    """
+    Get words from the blockchain.
+    
+    Words are summaries: the latest version as the only "history" entry,
+    and "versionCount"; /api/chain/word/{id}/history pages through the rest.
+    
+    Without parameters this returns every word. With any pagination or filter
+    parameter it returns one page: {"items": [...], "next_cursor": ...}.
+    Pass next_cursor back as cursor (with the same filters) for the next page.
+    
+    With stream=true every matching word (from cursor on) is streamed as
+    NDJSON, one word per line, read a page at a time.
+    """
+    filters = {"term": term, "prefix": prefix, "author": author, "since": since, "until": until}
+    if stream:
+        if limit is not None:
+            raise HTTPException(status_code=400, detail="limit does not apply to streamed listings")
+        return await _stream_listing(lambda page_cursor: _words_page(page_cursor, STREAM_PAGE_SIZE, **filters), cursor)
+
+    async def compute():
+        if limit is None and cursor is None and all(v is None for v in filters.values()):
+            if _replica_synced():
+                return await run_in_threadpool(_replica_read, StateManager.get_all_words)
+            if chain_connected:
+                return await run_in_threadpool(blockchain_client.get_all_words)
+            return await run_in_threadpool(fallback_evm.read_state, StateManager.get_all_words)
+
+        try:
+            items, next_cursor = await run_in_threadpool(_words_page, cursor, limit or DEFAULT_PAGE_SIZE, **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"items": items, "next_cursor": next_cursor}
+
+    return await _cached(request, ("words", limit, cursor, term, prefix, author, since, until), ("words",), compute)
+
+def _words_page(cursor, limit, term, prefix, author, since, until):
+    """One page of words from the replica, the chain or the fallback EVM."""
+    filters = {"term": term, "prefix": prefix, "author": author, "since": since, "until": until}
+    if _replica_synced():
+        return _replica_read(StateManager.query_words, cursor=cursor, limit=limit, **filters)
+    if chain_connected:
+        return blockchain_client.get_words_page(
+            cursor, limit, author=author, predicate=_word_filter(term, prefix, since, until)
+        )
+    return fallback_evm.read_state(StateManager.query_words, cursor=cursor, limit=limit, **filters)
+
+async def _stream_listing(fetch_page: Callable[[Optional[str]], Tuple[List, Optional[str]]], cursor: Optional[str]):
+    """
+    Stream every record from ``cursor`` on as NDJSON.
+
+    Records are read one page at a time (fetch_page(cursor) -> (items,
+    next_cursor)), so memory stays flat and the first page is sent as soon
+    as it is read. The first page is read before responding, so a bad
+    cursor is still a 400.
+    """
+    await _wait_for_backend()
+    try:
+        first = await run_in_threadpool(fetch_page, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def lines(page) -> Iterator[str]:
+        # Sync generator: Starlette iterates it in a worker thread
+        while True:
+            items, next_cursor = page
+            if items:
+                yield "".join(json.dumps(item) + "\n" for item in items)
+            if next_cursor is None:
+                return
+            page = fetch_page(next_cursor)
+
+    return StreamingResponse(lines(first), media_type="application/x-ndjson")
+
+def _word_filter(term, prefix, since, until):
+    """Predicate for filters the chain cannot answer from an index."""
+    if term is None and prefix is None and since is None and until is None:
+        return None
+    
+    def matches(word):
+        word_term = word["term"].casefold()
+        updated = word["history"][-1]["timestamp"]
+        return ((term is None or word_term == term.casefold())
+                and (prefix is None or word_term.startswith(prefix.casefold()))
+                and (since is None or updated >= since)
+                and (until is None or updated <= until))
+    return matches
+
+@app.get("/api/chain/search", dependencies=_NEEDS_BACKEND)
+async def search_words(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    prefix: bool = True,
+    fuzzy: bool = True
+):
+    """
+    Full-text search over word terms, latest definitions and commit messages.
+    
+    Results are ranked by BM25; the last query word also matches as a prefix
+    and misspelled words (one edit away) match when fuzzy is on.
+    """
+    if _replica_synced():
+        return await run_in_threadpool(_replica_read, StateManager.search_words, q, limit, prefix, fuzzy)
+    if chain_connected:
+        raise HTTPException(status_code=503, detail="Search is unavailable until the chain replica is synced")
+    return await run_in_threadpool(fallback_evm.read_state, StateManager.search_words, q, limit, prefix, fuzzy)
 
 @app.get("/api/chain/library")
-async def get_library():
-    """Get all dictionaries from the blockchain."""
-    if USE_REAL_BLOCKCHAIN:
-        return blockchain_client.get_all_dictionaries()
-    return fallback_evm.get_state().get_all_dictionaries()
+async def get_library(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    author: Optional[str] = None,
+    stream: bool = False
+):
+    """
+    Get dictionaries from the blockchain.
+    
+    Without parameters this returns every dictionary; with limit, cursor or
+    author it returns one page like /api/chain/words. stream=true streams
+    them as NDJSON, like /api/chain/words.
+    """
+    if stream:
+        if limit is not None:
+            raise HTTPException(status_code=400, detail="limit does not apply to streamed listings")
+        return await _stream_listing(lambda page_cursor: _dictionaries_page(page_cursor, STREAM_PAGE_SIZE, author), cursor)
+
+    async def compute():
+        if limit is None and cursor is None and author is None:
+            if _replica_synced():
+                dictionaries = await run_in_threadpool(_replica_read, StateManager.get_all_dictionaries)
+                return [ChainIndexer.format_dictionary(d) for d in dictionaries]
+            if chain_connected:
+                return await run_in_threadpool(blockchain_client.get_all_dictionaries)
+            return await run_in_threadpool(fallback_evm.read_state, StateManager.get_all_dictionaries)
+
+        try:
+            items, next_cursor = await run_in_threadpool(_dictionaries_page, cursor, limit or DEFAULT_PAGE_SIZE, author)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"items": items, "next_cursor": next_cursor}
+
+    return await _cached(request, ("library", limit, cursor, author), ("dictionaries",), compute)
+
+def _dictionaries_page(cursor, limit, author):
+    """One page of dictionaries from the replica, the chain or the fallback EVM."""
+    if _replica_synced():
+        items, next_cursor = _replica_read(StateManager.query_dictionaries, author=author, cursor=cursor, limit=limit)
+        return [ChainIndexer.format_dictionary(d) for d in items], next_cursor
+    if chain_connected:
+        return blockchain_client.get_dictionaries_page(cursor, limit, author=author)
+    return fallback_evm.read_state(StateManager.query_dictionaries, author=author, cursor=cursor, limit=limit)
+
+@app.get("/api/chain/dictionary/{old_id}/diff/{new_id}", dependencies=_NEEDS_BACKEND)
+async def diff_dictionaries(old_id: int, new_id: int):
+    """
+    Terms added, removed and changed from one dictionary release to another
+    (replica or fallback EVM). Only subtrees of the dictionaries' term trees
+    whose hashes differ are read; ``treesRead`` reports how many.
+    """
+    try:
+        if _replica_synced():
+            diff = await run_in_threadpool(_replica_read, StateManager.diff_dictionaries, old_id, new_id)
+        elif chain_connected:
+            raise HTTPException(status_code=503, detail="Dictionary diffs need the synced local replica")
+        else:
+            diff = await run_in_threadpool(fallback_evm.read_state, StateManager.diff_dictionaries, old_id, new_id)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Dictionary not found")
+    return diff
 
 @app.get("/api/chain/word/{word_id}")
-async def get_word(word_id: int):
-    """Get a specific word by ID."""
-    if USE_REAL_BLOCKCHAIN:
-        word = blockchain_client.get_word(word_id)
-        if "error" in word:
+async def get_word(request: Request, word_id: int, proof: bool = False):
+    """
+    Get a specific word by ID.
+
+    With ``proof=true`` the response carries an inclusion proof of the
+    stored word record against the local state root (replica or fallback
+    EVM only): ``proof.record`` hashes (StateManager.record_hash) to
+    ``proof.valueHash``, which SparseMerkleTree.verify checks against
+    ``proof.stateRoot`` with ``proof.key`` and ``proof.siblings``.
+    """
+    async def compute():
+        if _replica_synced():
+            word = chain_indexer.get_word(word_id)
+            if word is None:
+                raise HTTPException(status_code=404, detail="Word not found")
+            if proof:
+                word = {**word, "proof": await run_in_threadpool(_replica_read, StateManager.prove_word, word_id)}
+            return word
+        if chain_connected:
+            if proof:
+                raise HTTPException(status_code=503, detail="Proofs need the synced local replica")
+            word = await run_in_threadpool(blockchain_client.get_word, word_id)
+            if "error" in word:
+                raise HTTPException(status_code=404, detail="Word not found")
+            return word
+        word = await run_in_threadpool(fallback_evm.read_state, _read_word, word_id, proof)
+        if word is None:
             raise HTTPException(status_code=404, detail="Word not found")
         return word
-    raise HTTPException(status_code=404, detail="Word not found")
+
+    # A proof is against the whole state root, so any write invalidates it
+    tags = (f"word:{word_id}", "state") if proof else (f"word:{word_id}",)
+    return await _cached(request, ("word", word_id, proof), tags, compute)
+
+def _read_word(state: StateManager, word_id: int, proof: bool) -> Optional[dict]:
+    """
+    A word read from a fallback EVM state: its summary (the latest version
+    and versionCount) and the first page of its history, as
+    /api/chain/word/{id}/history returns it. Only that page is materialized.
+    """
+    word = state.words.get(word_id)
+    if word is None:
+        return None
+    items, next_cursor = state.history_page(word_id, None, DEFAULT_PAGE_SIZE)
+    summary = {**state.word_summary(word), "historyPage": {"items": items, "next_cursor": next_cursor}}
+    if proof:
+        # Covers the stored record, older versions as deltas
+        summary["proof"] = state.prove_word(word_id)
+    return summary
+
+@app.get("/api/chain/word/{word_id}/history")
+async def get_word_history(
+    request: Request,
+    word_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """
+    One page of a word's versions, oldest first: {"items": [...], "next_cursor": ...}.
+
+    Each version carries its "index". Only the page's versions are read:
+    with getWordVersion on the chain, or materialized from the stored
+    deltas on the replica and the fallback EVM.
+    """
+    async def compute():
+        try:
+            if _replica_synced():
+                page = await run_in_threadpool(_replica_read, StateManager.history_page, word_id, cursor, limit)
+            elif chain_connected:
+                page = await run_in_threadpool(blockchain_client.get_word_history_page, word_id, cursor, limit)
+            else:
+                page = await run_in_threadpool(fallback_evm.read_state, StateManager.history_page, word_id, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if page is None:
+            raise HTTPException(status_code=404, detail="Word not found")
+        items, next_cursor = page
+        return {"items": items, "next_cursor": next_cursor}
+
+    return await _cached(request, ("history", word_id, limit, cursor), (f"word:{word_id}",), compute)
+
+@app.get("/api/chain/state", dependencies=_NEEDS_BACKEND)
+async def get_state_root():
+    """Root hash of the local state (words, dictionaries, accounts, contract storage)."""
+    if _replica_synced():
+        root = await run_in_threadpool(_replica_read, StateManager.state_root)
+        return {"stateRoot": root, "source": "replica"}
+    if chain_connected:
+        raise HTTPException(status_code=503, detail="Local replica is not synced")
+    return {"stateRoot": await run_in_threadpool(fallback_evm.get_state_root), "source": "fallback_evm"}
+
+@app.get("/api/chain/state/node", dependencies=_NEEDS_BACKEND)
+async def get_state_node(path: str = ""):
+    """
+    One node of the state tree, for diffing replicas: its hash and its
+    children's hashes (or its leaf). ``path`` is a string of 0/1 branches
+    from the root; a peer walks only the subtrees whose hashes differ
+    (StateManager.diff_state).
+    """
+    if path.strip("01"):
+        raise HTTPException(status_code=400, detail="path must be a string of 0 and 1")
+    try:
+        if _replica_synced():
+            return await run_in_threadpool(_replica_read, StateManager.state_node, path)
+        if chain_connected:
+            raise HTTPException(status_code=503, detail="Local replica is not synced")
+        return await run_in_threadpool(fallback_evm.get_state_node, path)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,151 @@
+"""
+Cache of serialized read responses, invalidated by state changes.
+
+Entries are keyed per endpoint and parameter set and carry tags naming the
+state they were computed from ("words", "word:7", "dictionaries", ...).
+Writes invalidate exactly the tags they touch (see ``tags_for_changes``),
+so there are no TTLs: an entry is served until the data behind it changes.
+Memory is bounded by entry count and total body size, evicting the least
+recently used entries first.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+
+class CachedResponse:
+    """A serialized JSON body and its ETag."""
+
+    __slots__ = ("body", "etag", "tags")
+
+    def __init__(self, body: bytes, tags: Tuple[str, ...] = ()):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.tags = tags
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an If-None-Match header already names this body."""
+        if not if_none_match:
+            return False
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in candidates or self.etag in candidates
+
+
+def tags_for_changes(changes: Optional[Set[Tuple[str, Any]]]) -> Optional[Set[str]]:
+    """
+    Tags to invalidate for the (kind, id) entries StateManager.pop_changes
+    reports (and ChainIndexer's ("head", block)); None (unknown changes)
+    means everything.
+    """
+    if changes is None:
+        return None
+    # Chain stats count words and dictionaries and report the head block
+    tags = {"stats"}
+    for kind, ident in changes:
+        if kind != "head":
+            # Proofs are against the state root, which covers everything else
+            tags.add("state")
+        if kind == "word":
+            tags.update(("words", f"word:{ident}"))
+        elif kind == "dictionary":
+            tags.add("dictionaries")
+    return tags
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU cache of CachedResponse entries.
+
+    Args:
+        max_entries: Most entries kept
+        max_bytes: Most body bytes kept in total
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Any, CachedResponse]" = OrderedDict()
+        self._by_tag: Dict[str, Set[Any]] = {}
+        self._bytes = 0
+        # Bumped by every invalidation; a response computed across one is not stored
+        self.version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, key: Any) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Any, tags: Iterable[str], body: bytes, version: int) -> CachedResponse:
+        """
+        Store a body computed from the state as of ``version``.
+
+        It is only kept if nothing was invalidated since, so a response that
+        raced with a write can't outlive it.
+
+        Returns:
+            The entry, to be served either way
+        """
+        entry = CachedResponse(body, tuple(tags))
+        with self._lock:
+            if version != self.version or len(body) > self.max_bytes:
+                return entry
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            for tag in entry.tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, tags: Optional[Iterable[str]]):
+        """Drop the entries carrying any of ``tags``; None drops everything."""
+        with self._lock:
+            self.version += 1
+            if tags is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._by_tag.clear()
+                self._bytes = 0
+                return
+            for tag in tags:
+                for key in self._by_tag.pop(tag, ()):
+                    if key in self._entries:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def _remove(self, key: Any):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions
+            }
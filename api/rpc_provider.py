@@ -0,0 +1,225 @@
+"""
+Pooled, retrying HTTP provider for the node.
+
+One keep-alive requests.Session with a bounded connection pool serves
+every call, at most ``max_concurrency`` at a time. Reads that fail with a
+connection error, a timeout or a 429/5xx reply are retried with jittered
+exponential backoff. Identical reads in flight at the same time share one
+request, and chain id, gas price and block number are remembered until a
+new block is seen (at most ``block_ttl`` seconds for the latter two).
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+# Methods that change the chain: never retried or coalesced
+WRITE_METHODS = frozenset({
+    "eth_sendRawTransaction",
+    "eth_sendTransaction",
+    "eth_sign",
+    "eth_signTransaction",
+    "evm_mine",
+})
+# Parameterless reads that only change from block to block
+BLOCK_SCOPED_METHODS = frozenset({"eth_chainId", "eth_gasPrice", "eth_blockNumber"})
+# HTTP statuses worth retrying
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Seconds a health probe waits for the node
+PROBE_TIMEOUT = 2.0
+
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    web3 HTTPProvider with connection pooling, retries, coalescing and
+    block-scoped memoization (see the module docstring).
+
+    Args:
+        endpoint_uri: Node URL
+        pool_size: Keep-alive connections kept open
+        max_concurrency: Requests in flight at once
+        retries: Extra attempts for a failed read
+        backoff: First retry delay bound in seconds, doubled per attempt
+        max_backoff: Upper bound of a retry delay
+        block_ttl: Seconds the block number (and gas price) is trusted
+        timeout: Seconds per HTTP request
+    """
+
+    # Retries happen in post(), with backoff, instead of web3's retry middleware
+    _middlewares = ()
+
+    def __init__(
+        self,
+        endpoint_uri: str,
+        pool_size: int = 16,
+        max_concurrency: int = 16,
+        retries: int = 3,
+        backoff: float = 0.05,
+        max_backoff: float = 2.0,
+        block_ttl: float = 1.0,
+        timeout: float = 30.0
+    ):
+        super().__init__(endpoint_uri)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.block_ttl = block_ttl
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, Future] = {}
+        # method -> (response, time fetched), for BLOCK_SCOPED_METHODS
+        self._memo: Dict[str, Tuple[RPCResponse, float]] = {}
+        self._block_number: Optional[int] = None
+
+        self.requests_sent = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.memo_hits = 0
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        if method in BLOCK_SCOPED_METHODS and not params:
+            response = self._memoized(method)
+            if response is not None:
+                return response
+
+        request_data = self.encode_rpc_request(method, params)
+        if method in WRITE_METHODS:
+            response = self.decode_rpc_response(self.post(request_data, retry=False))
+            # Nodes that automine have a new block now
+            self.new_block()
+            return response
+
+        key = json.dumps([method, params], sort_keys=True, default=str)
+        response = self._coalesced(key, lambda: self.decode_rpc_response(self.post(request_data)))
+        self.observe(method, response)
+        return response
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        """A health probe: one quick attempt, no retries."""
+        try:
+            request_data = self.encode_rpc_request(RPCEndpoint("web3_clientVersion"), [])
+            response = self.decode_rpc_response(self.post(request_data, retry=False, timeout=PROBE_TIMEOUT))
+        except (requests.RequestException, ValueError):
+            if show_traceback:
+                raise
+            return False
+        return "error" not in response and response.get("jsonrpc") == "2.0"
+
+    def post(self, data: bytes, retry: bool = True, timeout: Optional[float] = None) -> bytes:
+        """
+        POST a JSON-RPC request (or batch) through the pool.
+
+        Args:
+            data: Encoded request body
+            retry: Whether failures may be retried (only safe for reads)
+            timeout: Seconds, instead of the provider's timeout
+
+        Returns:
+            The raw response body
+
+        Raises:
+            requests.RequestException: If the last attempt failed
+        """
+        attempts = self.retries + 1 if retry else 1
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            try:
+                with self._slots:
+                    self.requests_sent += 1
+                    response = self.session.post(
+                        self.endpoint_uri, data=data, headers=self.get_request_headers(), timeout=timeout or self.timeout
+                    )
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last:
+                    response.raise_for_status()
+                    return response.content
+            self.retried += 1
+            # Full jitter, so clients that failed together don't retry together
+            time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+
+    def _coalesced(self, key: str, send: Callable[[], RPCResponse]) -> RPCResponse:
+        """Run send(), or wait for an identical request already in flight."""
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            # A copy, since web3 formats responses in place
+            return dict(future.result())
+        try:
+            response = send()
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def _memoized(self, method: str) -> Optional[RPCResponse]:
+        with self._lock:
+            entry = self._memo.get(method)
+            if entry is None:
+                return None
+            response, fetched_at = entry
+            if method != "eth_chainId" and time.monotonic() - fetched_at > self.block_ttl:
+                del self._memo[method]
+                return None
+            self.memo_hits += 1
+            return dict(response)
+
+    def observe(self, method: str, response: RPCResponse):
+        """Remember block-scoped results and notice new blocks in replies."""
+        result = response.get("result") if isinstance(response, dict) else None
+        if result is None or "error" in response:
+            return
+        if method == "eth_blockNumber":
+            self._see_block(int(result, 16))
+        elif method == "eth_getTransactionReceipt" and result.get("blockNumber"):
+            self._see_block(int(result["blockNumber"], 16))
+        if method in BLOCK_SCOPED_METHODS:
+            with self._lock:
+                self._memo[method] = (response, time.monotonic())
+
+    def _see_block(self, number: int):
+        with self._lock:
+            if number == self._block_number:
+                return
+            # A lower number is a reset chain (e.g. a restarted node): its
+            # chain id and gas price may have changed too
+            self._block_number = number
+            self._memo.clear()
+
+    def new_block(self):
+        """Forget block-scoped results, e.g. after sending a transaction."""
+        with self._lock:
+            self._memo.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests_sent,
+            "retried": self.retried,
+            "coalesced": self.coalesced,
+            "memo_hits": self.memo_hits
+        }
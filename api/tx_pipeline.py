@@ -0,0 +1,407 @@
+"""
+Non-blocking transaction submission for the server account.
+
+Writes are queued and return a TxHandle straight away. A background thread
+signs queued transactions with locally allocated nonces, sends them in
+JSON-RPC batches and polls all outstanding receipts in one batch per round,
+so throughput grows with the number of transactions in flight instead of
+being bounded by one send + receipt wait per RPC round trip.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Tuple
+
+from web3 import Web3
+
+from api.blockchain_client import is_batch_unsupported
+
+# Gas limit per contract function (same limits the synchronous client uses)
+GAS_LIMITS = {
+    "addWord": 500000,
+    "addWords": 500000,  # callers pass a limit sized to the batch
+    "updateWord": 300000,
+    "createDictionary": 500000,
+    "stake": 100000,
+}
+# Events whose first indexed argument is the id of the created record
+CREATED_EVENTS = {
+    "WordCreated(uint256,string,address)": "word_id",
+    "DictionaryCreated(uint256,string,address)": "dictionary_id",
+}
+# Finished handles kept around for the status endpoint
+MAX_FINISHED_HANDLES = 10000
+# Re-sends of a transaction whose nonce was already taken
+MAX_NONCE_RETRIES = 3
+
+
+class TxHandle:
+    """A submitted transaction; ``future`` resolves to ``to_dict()`` once it is mined or fails."""
+
+    def __init__(self, action: str, args: list, value: int = 0, gas: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.action = action
+        self.args = args
+        self.value = value
+        self.gas = gas if gas is not None else GAS_LIMITS[action]
+        self.status = "queued"  # queued -> pending -> confirmed | failed
+        self.nonce: Optional[int] = None
+        self.tx_hash: Optional[str] = None
+        self.block_number: Optional[int] = None
+        self.gas_used: Optional[int] = None
+        self.created_ids: Dict[str, int] = {}
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.sent_at: Optional[float] = None
+        self.retries = 0
+        self.future: Future = Future()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("confirmed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tx_id": self.id,
+            "action": self.action,
+            "status": self.status,
+            "success": self.status == "confirmed",
+            "nonce": self.nonce,
+            "tx_hash": self.tx_hash,
+            "block_number": self.block_number,
+            "gas_used": self.gas_used,
+            **self.created_ids,
+            "error": self.error
+        }
+
+
+class NonceAllocator:
+    """Hands out consecutive nonces for one account without asking the node each time."""
+
+    def __init__(self, w3: Web3, address: str):
+        self.w3 = w3
+        self.address = address
+        self._next: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._next = self.w3.eth.get_transaction_count(self.address, "pending")
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def resync(self):
+        """Re-read the next nonce from the node on the next allocation."""
+        with self._lock:
+            self._next = None
+
+
+class TxPipeline:
+    """
+    Queues contract writes from the server account and tracks them to a receipt.
+
+    At most ``max_in_flight`` transactions are sent and unconfirmed at a time.
+    Nonces come from a local NonceAllocator; a transaction rejected by the
+    node leaves a nonce gap, which is filled with an empty self-transfer when
+    later nonces are already in flight, so those are not stuck behind it.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_in_flight: int = 64,
+        poll_interval: float = 0.1,
+        receipt_timeout: float = 120.0,
+        gas_price_ttl: float = 10.0
+    ):
+        self.client = client
+        self.account = client.server_account
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.receipt_timeout = receipt_timeout
+        self.gas_price_ttl = gas_price_ttl
+        self.nonces = NonceAllocator(client.w3, self.account.address)
+
+        self._queue: deque = deque()
+        self._pending: Dict[str, TxHandle] = {}  # tx hash -> handle
+        self._handles: "OrderedDict[str, TxHandle]" = OrderedDict()
+        self._finished: deque = deque()  # ids of finished handles, oldest first
+        # Guards the queues and every handle's status fields
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._chain_id: Optional[int] = None
+        self._gas_price: Tuple[float, int] = (0.0, 0)
+        self._created_topics = {
+            Web3.keccak(text=signature).hex(): key for signature, key in CREATED_EVENTS.items()
+        }
+
+    def start(self):
+        """Start the sender / receipt poller thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="digitionary-tx-pipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread. Queued transactions, and sent ones still
+        waiting for a receipt, are failed so nobody waits on them forever.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        with self._lock:
+            unfinished = list(self._queue) + list(self._pending.values())
+            self._queue.clear()
+        for handle in unfinished:
+            self._finish(handle, "failed", error="Pipeline stopped")
+        # Sent transactions may still be mined
+        self.nonces.resync()
+
+    def submit(self, action: str, args: list, value: int = 0, gas: Optional[int] = None) -> TxHandle:
+        """
+        Queue a contract call from the server account.
+
+        Args:
+            action: Contract function name (a key of GAS_LIMITS)
+            args: Function arguments
+            value: Wei sent along with the call
+            gas: Gas limit, instead of the action's default
+
+        Returns:
+            Handle to poll with ``status`` or await through ``handle.future``
+        """
+        if action not in GAS_LIMITS:
+            raise ValueError(f"Unknown action {action}")
+        handle = TxHandle(action, args, value, gas)
+        with self._lock:
+            self._handles[handle.id] = handle
+            self._queue.append(handle)
+        self._wake.set()
+        return handle
+
+    def get(self, tx_id: str) -> Optional[TxHandle]:
+        with self._lock:
+            return self._handles.get(tx_id)
+
+    def status(self, tx_id: str) -> Optional[Dict[str, Any]]:
+        """A consistent ``to_dict()`` of a handle, or None if it is unknown."""
+        with self._lock:
+            handle = self._handles.get(tx_id)
+            return handle.to_dict() if handle is not None else None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"queued": len(self._queue), "in_flight": len(self._pending)}
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self._send_queued()
+                self._poll_receipts()
+            except Exception as e:
+                sent = 0
+                print(f"⚠️ Transaction pipeline error: {e}")
+            with self._lock:
+                idle = not self._queue and not self._pending
+                backlog = bool(self._queue) and len(self._pending) < self.max_in_flight
+            if backlog and sent:
+                continue
+            # Sleep until new work arrives, or until the next receipt poll
+            self._wake.wait(None if idle else self.poll_interval)
+            self._wake.clear()
+
+    def _send_queued(self) -> int:
+        with self._lock:
+            capacity = self.max_in_flight - len(self._pending)
+            jobs = [self._queue.popleft() for _ in range(min(capacity, len(self._queue)))]
+        if not jobs:
+            return 0
+        try:
+            return self._send(jobs)
+        except Exception:
+            # Nothing is known to have reached the node; send again next round
+            self.nonces.resync()
+            with self._lock:
+                self._queue.extendleft(reversed(jobs))
+            raise
+
+    def _send(self, jobs: List[TxHandle]) -> int:
+        gas_price = self._current_gas_price()
+        raws, signed = [], []
+        for handle in jobs:
+            nonce = self.nonces.allocate()
+            raw, tx_hash = self._sign({
+                "to": self.client.contract_address,
+                "data": self.client.contract.encodeABI(fn_name=handle.action, args=handle.args),
+                "value": handle.value,
+                "gas": handle.gas,
+                "gasPrice": gas_price,
+                "nonce": nonce,
+            })
+            raws.append(raw)
+            signed.append((nonce, tx_hash))
+        with self._lock:
+            for handle, (nonce, tx_hash) in zip(jobs, signed):
+                handle.nonce, handle.tx_hash = nonce, tx_hash
+        replies = self._rpc([("eth_sendRawTransaction", [raw]) for raw in raws])
+
+        accepted, nonce_errors, rejected = [], [], []
+        for handle, reply in zip(jobs, replies):
+            message = str(reply["error"].get("message", reply["error"])) if "error" in reply else None
+            if message is None or "already known" in message.lower():
+                accepted.append(handle)
+            elif "nonce" in message.lower():
+                nonce_errors.append(handle)
+            else:
+                rejected.append((handle, message))
+
+        if nonce_errors:
+            # The transaction itself may have got through on an earlier, failed
+            # round trip; only re-send it if the node has never seen its hash
+            known = self._rpc([("eth_getTransactionByHash", [h.tx_hash]) for h in nonce_errors])
+            retry = []
+            for handle, reply in zip(nonce_errors, known):
+                if reply.get("result"):
+                    accepted.append(handle)
+                elif handle.retries < MAX_NONCE_RETRIES:
+                    # Someone else used the account; take a fresh nonce
+                    with self._lock:
+                        handle.retries += 1
+                        handle.tx_hash = None
+                    retry.append(handle)
+                else:
+                    rejected.append((handle, "Nonce already used"))
+            if retry:
+                self.nonces.resync()
+                with self._lock:
+                    self._queue.extendleft(reversed(retry))
+
+        now = time.time()
+        with self._lock:
+            for handle in accepted:
+                handle.sent_at = now
+                handle.status = "pending"
+                self._pending[handle.tx_hash] = handle
+        sent_nonces = [handle.nonce for handle in accepted]
+        for handle, message in rejected:
+            self._finish(handle, "failed", error=message, tx_hash=None)
+            if any(n > handle.nonce for n in sent_nonces):
+                self._fill_nonce_gap(handle.nonce, gas_price)
+            else:
+                self.nonces.resync()
+        return len(accepted)
+
+    def _poll_receipts(self):
+        with self._lock:
+            handles = list(self._pending.values())
+        if not handles:
+            return
+
+        replies = self._rpc([("eth_getTransactionReceipt", [handle.tx_hash]) for handle in handles])
+        now = time.time()
+        timed_out = False
+        for handle, reply in zip(handles, replies):
+            receipt = reply.get("result")
+            if receipt is None:
+                if now - handle.sent_at > self.receipt_timeout:
+                    self._finish(handle, "failed", error="Timed out waiting for receipt")
+                    timed_out = True
+                continue
+            created_ids = {}
+            for log in receipt.get("logs", []):
+                key = self._created_topics.get(log["topics"][0]) if log.get("topics") else None
+                if key is not None and len(log["topics"]) > 1:
+                    created_ids[key] = int(log["topics"][1], 16)
+            fields = {
+                "block_number": int(receipt["blockNumber"], 16),
+                "gas_used": int(receipt["gasUsed"], 16),
+                "created_ids": created_ids
+            }
+            if int(receipt["status"], 16) == 1:
+                self._finish(handle, "confirmed", **fields)
+            else:
+                self._finish(handle, "failed", error="Transaction reverted", **fields)
+        if timed_out:
+            # It may still be mined (or have been dropped): the node's pending
+            # count says which nonce is free, not the local counter
+            self.nonces.resync()
+
+    def _finish(self, handle: TxHandle, status: str, error: Optional[str] = None, **fields):
+        """Settle a handle once: set its status and ``fields`` and resolve its future."""
+        with self._lock:
+            if handle.done:
+                return
+            if handle.tx_hash is not None:
+                self._pending.pop(handle.tx_hash, None)
+            for name, value in fields.items():
+                setattr(handle, name, value)
+            handle.status = status
+            handle.error = error
+            result = handle.to_dict()
+            # Forget the oldest finished handles; unfinished ones are kept
+            self._finished.append(handle.id)
+            while len(self._finished) > MAX_FINISHED_HANDLES:
+                self._handles.pop(self._finished.popleft(), None)
+        handle.future.set_result(result)
+
+    def _fill_nonce_gap(self, nonce: int, gas_price: int):
+        """Use up a nonce with an empty self-transfer so later transactions can be mined."""
+        raw, _ = self._sign({
+            "to": self.account.address,
+            "value": 0,
+            "gas": 21000,
+            "gasPrice": gas_price,
+            "nonce": nonce,
+        })
+        reply = self._rpc([("eth_sendRawTransaction", [raw])])[0]
+        if "error" in reply:
+            print(f"⚠️ Could not fill nonce gap {nonce}: {reply['error']}")
+            self.nonces.resync()
+
+    def _sign(self, tx: Dict[str, Any]) -> Tuple[str, str]:
+        """Sign locally; returns the raw transaction and its hash."""
+        if self._chain_id is None:
+            self._chain_id = self.client.get_chain_id()
+        signed = self.client.w3.eth.account.sign_transaction({**tx, "chainId": self._chain_id}, self.account.key)
+        return signed.rawTransaction.hex(), signed.hash.hex()
+
+    def _current_gas_price(self) -> int:
+        fetched_at, price = self._gas_price
+        if time.time() - fetched_at > self.gas_price_ttl:
+            price = self.client.w3.eth.gas_price
+            self._gas_price = (time.time(), price)
+        return price
+
+    def _rpc(self, calls: List[Tuple[str, list]]) -> List[Dict[str, Any]]:
+        """
+        JSON-RPC batch when the node supports it, else one request per call.
+        A batch that fails for another reason (a timeout, a dropped
+        connection) is sent one request at a time this round only.
+        """
+        if self.client.rpc_batch_enabled:
+            try:
+                return self.client.rpc_batch(calls)
+            except Exception as e:
+                if is_batch_unsupported(e):
+                    print(f"⚠️ JSON-RPC batch requests are not supported, sending requests one by one: {e}")
+                    self.client.rpc_batch_enabled = False
+                else:
+                    print(f"⚠️ JSON-RPC batch failed, sending this round one by one: {e}")
+        replies = []
+        for method, params in calls:
+            try:
+                replies.append(self.client.w3.provider.make_request(method, params))
+            except Exception as e:
+                replies.append({"error": {"message": str(e)}})
+        return replies
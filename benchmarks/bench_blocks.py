@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evm.core.blockchain_storage import BlockchainStorage
+from evm.execution.block_builder import BlockBuilder
+from evm.execution.evm import EVM
+
+
+def transaction(i: int) -> dict:
+    return {"action": "addWord", "term": f"w{i}", "content": "definition", "commitMsg": "bench"}
+
+
+def bench_per_transaction(tmp: str, count: int, clients: int) -> float:
+    evm = EVM(storage=BlockchainStorage(os.path.join(tmp, "per_tx.json"), journal=True))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(lambda i: evm.execute_transaction(f"0x{i % clients:040x}", transaction(i)), range(count)))
+    return count / (time.perf_counter() - start)
+
+
+def bench_blocks(tmp: str, count: int, clients: int, block_size: int, block_interval: float) -> float:
+    evm = EVM(storage=BlockchainStorage(os.path.join(tmp, f"blocks_{block_size}.json"), journal=True))
+    builder = BlockBuilder(evm, block_interval=block_interval, block_size=block_size)
+    builder.start()
+    start = time.perf_counter()
+    handles = [builder.submit(f"0x{i % clients:040x}", transaction(i)) for i in range(count)]
+    wait([handle.future for handle in handles])
+    elapsed = time.perf_counter() - start
+    builder.stop()
+    assert all(handle.status == "confirmed" for handle in handles)
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fallback EVM write throughput with and without blocks")
+    parser.add_argument("--transactions", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--block-sizes", default="1,10,100,500,2000")
+    parser.add_argument("--block-interval", type=float, default=0.05)
+    parser.add_argument("--fsync-ms", type=float, default=0.0,
+                        help="add this much latency to every fsync, to model a slower disk")
+    args = parser.parse_args()
+
+    if args.fsync_ms:
+        real_fsync = os.fsync
+
+        def slow_fsync(fd):
+            time.sleep(args.fsync_ms / 1000)
+            real_fsync(fd)
+        os.fsync = slow_fsync
+
+    print(f"{args.transactions} addWord transactions from {args.clients} senders "
+          f"(journal mode, +{args.fsync_ms}ms per fsync)")
+    with tempfile.TemporaryDirectory() as tmp:
+        rate = bench_per_transaction(tmp, args.transactions, args.clients)
+        print(f"  {'per transaction (group commit)':<32} {rate:10.1f} tx/s")
+        for size in (int(s) for s in args.block_sizes.split(",")):
+            rate = bench_blocks(tmp, args.transactions, args.clients, size, args.block_interval)
+            print(f"  {f'blocks of up to {size}':<32} {rate:10.1f} tx/s")
+
+
+if __name__ == "__main__":
+    main()
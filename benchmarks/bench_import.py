@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.bulk_import import iter_rows, import_to_chain, import_to_evm
+from evm.core.blockchain_storage import BlockchainStorage
+from evm.execution.evm import EVM
+
+
+def make_body(words: int, prefix: str) -> bytes:
+    return "".join(
+        json.dumps({"term": f"{prefix}{i}", "content": f"Imported definition number {i}", "commitMsg": "import"}) + "\n"
+        for i in range(words)
+    ).encode()
+
+
+async def body_stream(body: bytes, chunk_size: int = 65536):
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+
+async def run(events) -> dict:
+    last = None
+    async for event in events:
+        last = event
+    return last
+
+
+def bench_fallback(words: int):
+    print(f"Fallback EVM, {words} words (journal mode, fsync per commit)")
+    with tempfile.TemporaryDirectory() as tmp:
+        evm = EVM(storage=BlockchainStorage(os.path.join(tmp, "single.json"), journal=True))
+        start = time.perf_counter()
+        for i in range(words):
+            evm.execute_transaction("0xbench", {"action": "addWord", "term": f"w{i}", "content": "definition", "commitMsg": "import"})
+        elapsed = time.perf_counter() - start
+        print(f"  execute_transaction per row: {words / elapsed:10.1f} words/s")
+
+        evm = EVM(storage=BlockchainStorage(os.path.join(tmp, "bulk.json"), journal=True))
+        rows = iter_rows(body_stream(make_body(words, "w")), "ndjson")
+        summary = asyncio.run(run(import_to_evm(rows, evm, "0xbench")))
+        print(f"  bulk import:                 {summary['words_per_sec']:10.1f} words/s ({summary['failed']} failed)")
+
+
+def bench_chain(words: int, rpc: str, contract: str):
+    # Imported here so the fallback benchmark runs without web3 configured
+    from api.blockchain_client import BlockchainClient
+    from api.tx_pipeline import TxPipeline
+
+    print(f"Chain at {rpc}, {words} words")
+    client = BlockchainClient(rpc, contract)
+    client.ensure_staked()
+    for label, max_rows in (("pipelined addWord per row", 1), ("batched addWords", None)):
+        pipeline = TxPipeline(client, poll_interval=0.01)
+        pipeline.start()
+        rows = iter_rows(body_stream(make_body(words, f"{label[:4]}")), "ndjson")
+        kwargs = {"max_rows": max_rows} if max_rows else {}
+        summary = asyncio.run(run(import_to_chain(rows, client, pipeline, **kwargs)))
+        pipeline.stop()
+        print(f"  {label + ':':<28} {summary['words_per_sec']:10.1f} words/s ({summary['failed']} failed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import throughput for both backends")
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--chain", action="store_true", help="also import into a running node")
+    parser.add_argument("--chain-words", type=int, default=500)
+    parser.add_argument("--rpc", default="http://127.0.0.1:8545")
+    parser.add_argument("--contract", default="0x5FbDB2315678afecb367f032d93F642f64180aa3")
+    args = parser.parse_args()
+
+    bench_fallback(args.words)
+    if args.chain:
+        bench_chain(args.chain_words, args.rpc, args.contract)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import time
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evm.execution.interpreter import Interpreter
+from evm.utils.helpers import assemble
+
+# Counter on the stack; the loop body is pure arithmetic
+ARITHMETIC = """
+    PUSH3 {iterations}
+    loop: JUMPDEST
+    PUSH1 3 PUSH1 5 MUL PUSH1 7 ADD PUSH1 2 SWAP1 DIV
+    PUSH1 9 PUSH2 0x1234 MULMOD PUSH1 13 SWAP1 EXP PUSH1 0xff AND
+    DUP2 XOR DUP2 LT POP
+    PUSH1 1 SWAP1 SUB DUP1 PUSH2 @loop JUMPI
+    STOP
+"""
+
+# Writes slot i and reads it back, like a mapping-heavy contract
+STORAGE = """
+    PUSH3 {iterations}
+    loop: JUMPDEST
+    DUP1 DUP1 PUSH1 0 MSTORE PUSH1 32 PUSH1 0 SHA3 SSTORE
+    DUP1 PUSH1 0 MSTORE PUSH1 32 PUSH1 0 SHA3 SLOAD POP
+    PUSH1 1 SWAP1 SUB DUP1 PUSH2 @loop JUMPI
+    STOP
+"""
+
+# Copies 64KB of calldata into memory, hashes a mapping-key-sized slice and
+# MLOADs words across it
+MEMORY = """
+    PUSH3 {iterations}
+    loop: JUMPDEST
+    CALLDATASIZE PUSH1 0 PUSH1 0 CALLDATACOPY
+    PUSH1 64 PUSH2 0x4000 SHA3 POP
+    PUSH2 0x8000 MLOAD PUSH2 0xffe0 MLOAD XOR PUSH1 0 CALLDATALOAD XOR POP
+    PUSH1 1 SWAP1 SUB DUP1 PUSH2 @loop JUMPI
+    STOP
+"""
+MEMORY_CALLDATA = bytes(range(256)) * 256
+
+
+def run(name: str, source: str, iterations: int, repeat: int, calldata: bytes = b""):
+    interpreter = Interpreter()
+    code = assemble(source.format(iterations=iterations))
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = interpreter.execute(code, calldata, gas=10 ** 12, storage={})
+        elapsed = time.perf_counter() - start
+        if not result.success:
+            raise SystemExit(f"{name} failed: {result.error}")
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {name:<11} {result.steps:>9} ops in {best * 1e3:8.1f}ms: "
+          f"{result.steps / best:12,.0f} ops/s, {result.gas_used / best / 1e6:8.2f} Mgas/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interpreter throughput in opcodes per second")
+    parser.add_argument("--iterations", type=int, default=20000, help="loop iterations per contract")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Interpreter, {args.iterations} loop iterations (best of {args.repeat})")
+    run("arithmetic", ARITHMETIC, args.iterations, args.repeat)
+    run("storage", STORAGE, args.iterations, args.repeat)
+    run("memory", MEMORY, args.iterations // 10, args.repeat, MEMORY_CALLDATA)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import repo  # needs librepo.so: cd repo && go build -buildmode=c-shared -o ../librepo.so ./capi
+
+
+def rate(label: str, count: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    per_second = count / (time.perf_counter() - start)
+    print(f"    {label:<40} {per_second:12.0f} objects/s")
+    return per_second
+
+
+def run(args, tag: str):
+    # A distinct payload per run, so every put stores a new object
+    blobs = [f"{tag} object {i} ".encode() * (args.size // 16 + 1) for i in range(args.objects)]
+    batches = [blobs[i:i + args.batch] for i in range(0, len(blobs), args.batch)]
+
+    single = rate("put_blob, one call per object", len(blobs), lambda: [repo.put_blob(b) for b in blobs])
+    blobs = [b + b"\x00" for b in blobs]
+    batched = rate(f"put_blobs, batches of {args.batch}", len(blobs),
+                   lambda: [repo.put_blobs(batch) for batch in batches])
+    print(f"    {'':<40} {batched / single:11.1f}x")
+
+    hashes = repo.put_blobs(blobs)
+    hash_batches = [hashes[i:i + args.batch] for i in range(0, len(hashes), args.batch)]
+    single = rate("get_object, one call per object", len(hashes), lambda: [repo.get_object(h) for h in hashes])
+    batched = rate(f"get_objects, batches of {args.batch}", len(hashes),
+                   lambda: [repo.get_objects(batch) for batch in hash_batches])
+    print(f"    {'':<40} {batched / single:11.1f}x")
+
+    # A tree per 100 blobs under one root
+    trees = [
+        [{"Name": f"{i + j}", "Mode": 0o100644, "Hash": h} for j, h in enumerate(hashes[i:i + 100])]
+        for i in range(0, len(hashes), 100)
+    ]
+    subtrees = repo.put_trees(trees)
+    root = repo.put_tree([{"Name": f"d{i}", "Mode": repo.TREE_MODE, "Hash": h} for i, h in enumerate(subtrees)])
+
+    def walk_one_by_one(path: str = "", tree: str = root):
+        # walk_tree, reading each tree with its own call
+        walked = []
+        for entry in repo.read_trees([tree])[0]:
+            walked.append((path + entry["Name"], entry))
+            if entry["Mode"] == repo.TREE_MODE:
+                walked += walk_one_by_one(path + entry["Name"] + "/", entry["Hash"])
+        return walked
+
+    entries = len(subtrees) + len(hashes)
+    single = rate("tree walk, one call per tree", entries, lambda: walk_one_by_one())
+    batched = rate("walk_tree, one call per level", entries, lambda: repo.walk_tree(root))
+    print(f"    {'':<40} {batched / single:11.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Object store throughput: per-object vs. batched FFI calls")
+    parser.add_argument("--objects", type=int, default=50000)
+    parser.add_argument("--size", type=int, default=200, help="Approximate blob size in bytes")
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    print("In memory:")
+    run(args, "memory")
+    with tempfile.TemporaryDirectory() as tmp:
+        repo.open_store(tmp)
+        print("Packfile:")
+        run(args, "pack")
+        repo.close_store()
+
+
+if __name__ == "__main__":
+    main()
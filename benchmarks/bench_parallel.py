@@ -0,0 +1,84 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evm.core.blockchain_storage import BlockchainStorage
+from evm.execution.evm import EVM
+from evm.execution.parallel import ParallelExecutor
+from evm.utils.helpers import assemble
+
+SENDER = "0x" + "ab" * 20
+
+
+def contract(work: int) -> bytes:
+    """Init code for: spin ``work`` loop iterations, then slot[calldata[0]] += 1."""
+    runtime = assemble(f"""
+        PUSH2 {work}
+        loop: JUMPDEST PUSH1 1 SWAP1 SUB DUP1 PUSH2 @loop JUMPI POP
+        PUSH1 0 CALLDATALOAD DUP1 SLOAD PUSH1 1 ADD
+        DUP1 PUSH1 0 MSTORE SWAP1 SSTORE PUSH1 32 PUSH1 0 RETURN
+    """)
+    return assemble(f"PUSH1 {len(runtime)} PUSH1 12 PUSH1 0 CODECOPY PUSH1 {len(runtime)} PUSH1 0 RETURN") + runtime
+
+
+def make_block(address: str, size: int, conflict_rate: float, rnd: random.Random):
+    # Conflicting calls all increment slot 0; the others get a slot of their own
+    return [
+        (SENDER, {"action": "callContract", "address": address,
+                  "data": f"{0 if rnd.random() < conflict_rate else i + 1:064x}"})
+        for i in range(size)
+    ]
+
+
+def run(tmp: str, label: str, pool, args, conflict_rate: float, baseline: float = 0.0) -> float:
+    evm = EVM(storage=BlockchainStorage(os.path.join(tmp, f"{label}_{conflict_rate}.json"), journal=True))
+    address = evm.execute_transaction(SENDER, {"action": "deployContract", "data": contract(args.work).hex()})["address"]
+    executor = ParallelExecutor(evm, pool) if pool is not None else None
+    rnd = random.Random(1)
+    blocks = [make_block(address, args.block_size, conflict_rate, rnd) for _ in range(args.blocks)]
+    start = time.perf_counter()
+    for block in blocks:
+        (executor or evm).execute_block(block)
+    elapsed = time.perf_counter() - start
+    if executor is not None:
+        stats = executor.stats()
+        label += f" ({stats['reexecuted']} re-executed)"
+    speedup = f"  speedup {baseline / elapsed:.2f}x" if baseline else ""
+    print(f"    {label:<36} {args.blocks * args.block_size / elapsed:8.1f} tx/s{speedup}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Speculative parallel execution of blocks of contract calls vs. conflict rate "
+                    "(built-in word actions are not speculated)"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--blocks", type=int, default=5)
+    parser.add_argument("--block-size", type=int, default=200)
+    parser.add_argument("--work", type=int, default=2000, help="loop iterations per contract call")
+    parser.add_argument("--conflict-rates", default="0,0.1,0.5,1")
+    args = parser.parse_args()
+
+    print(f"{args.blocks} blocks of {args.block_size} contract calls, {args.work} loop iterations each, "
+          f"{args.workers} workers ({os.cpu_count()} cores)")
+    with tempfile.TemporaryDirectory() as tmp, \
+            ProcessPoolExecutor(args.workers) as processes, ThreadPoolExecutor(args.workers) as threads:
+        # Start the worker processes before timing anything
+        list(processes.map(abs, range(args.workers)))
+        for rate in (float(r) for r in args.conflict_rates.split(",")):
+            print(f"  conflict rate {rate:.0%}")
+            serial = run(tmp, "serial", None, args, rate)
+            for label, pool in (("threads", threads), ("processes", processes)):
+                run(tmp, label, pool, args, rate, serial)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.blockchain_client import BlockchainClient, DEFAULT_RPC_URL, DEFAULT_CONTRACT_ADDRESS
+from api.chain_indexer import ChainIndexer
+from evm.core.blockchain_storage import BlockchainStorage
+from evm.core.state import StateManager
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chain read latency: per-word eth_call vs the event-indexed replica "
+                    "(needs a running node with the Digitionary contract deployed)"
+    )
+    parser.add_argument("--rpc", default=DEFAULT_RPC_URL)
+    parser.add_argument("--contract", default=DEFAULT_CONTRACT_ADDRESS)
+    parser.add_argument("--seed", type=int, default=0, help="publish this many words first")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    client = BlockchainClient(args.rpc, args.contract)
+    client.ensure_staked()
+    for i in range(args.seed):
+        client.add_word(f"bench{i}", f"Benchmark definition number {i}", "init")
+    word_count = client.contract.functions.wordCount().call()
+    print(f"{word_count} words on chain at {args.rpc}")
+    if not word_count:
+        return
+
+    # The path every read took before batching and the replica
+    client.multicall = None
+    client.rpc_batch_enabled = False
+    print(f"  per-word eth_call get_all_words: {timed(client.get_all_words, args.repeat) * 1e3:10.2f}ms")
+    print(f"  per-word eth_call get_word:      {timed(lambda: client.get_word(word_count // 2 + 1), args.repeat) * 1e3:10.2f}ms")
+
+    client.rpc_batch_enabled = True
+    print(f"  batched get_all_words:           {timed(client.get_all_words, args.repeat) * 1e3:10.2f}ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        indexer = ChainIndexer(client, BlockchainStorage(os.path.join(tmp, "replica.json")))
+        start = time.perf_counter()
+        indexer.poll()
+        print(f"  replica initial sync:            {(time.perf_counter() - start) * 1e3:10.2f}ms")
+
+        latency = timed(lambda: indexer.poll(), args.repeat)
+        print(f"  replica poll (no new blocks):    {latency * 1e3:10.2f}ms")
+
+        read_all = lambda: StateManager.get_all_words(indexer.state)
+        print(f"  replica get_all_words:           {timed(read_all, args.repeat) * 1e3:10.4f}ms")
+        print(f"  replica get_word:                {timed(lambda: indexer.get_word(word_count // 2 + 1), args.repeat) * 1e3:10.4f}ms")
+        page = lambda: indexer.state.query_words(prefix="bench1", limit=50)
+        print(f"  replica filtered page:           {timed(page, args.repeat) * 1e3:10.4f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import msgpack
+
+from evm.core.search import SearchIndex
+from evm.core.state import StateManager
+
+SYLLABLES = ["ba", "ku", "ntu", "zi", "lo", "nga", "mbe", "thi", "so", "wa", "ye", "qa", "xo", "dla", "phu"]
+
+
+def make_lexicon(rng: random.Random, size: int):
+    return list({"".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(size * 2)})[:size]
+
+
+def build_state(words: int, rng: random.Random, lexicon) -> StateManager:
+    # Zipf-like token frequencies, like natural-language definitions
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(lexicon))))
+    state = StateManager()
+    for i in range(words):
+        content = " ".join(rng.choices(lexicon, cum_weights=cum_weights, k=rng.randint(15, 40)))
+        state.add_word(f"{rng.choice(lexicon)}{i}", content, "init", "0xabc", timestamp=i)
+    return state
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search index benchmark")
+    parser.add_argument("--words", type=int, default=100000)
+    parser.add_argument("--lexicon", type=int, default=30000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    lexicon = make_lexicon(rng, args.lexicon)
+    print(f"Generating {args.words} words (incrementally indexed)...")
+    start = time.perf_counter()
+    state = build_state(args.words, rng, lexicon)
+    print(f"  add_word with incremental indexing: {(time.perf_counter() - start) / args.words * 1e6:.1f}us/word")
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.rebuild(state.words.values())
+    print(f"  full rebuild: {time.perf_counter() - start:.2f}s, {len(index.postings)} tokens")
+
+    common, rare = lexicon[0], lexicon[-1]
+    queries = {
+        "rare token": rare,
+        "common token": common,
+        "two tokens": f"{lexicon[10]} {lexicon[500]}",
+        "prefix": rare[:3],
+        "typo": rare[:-1] + ("a" if rare[-1] != "a" else "e"),
+    }
+    for name, query in queries.items():
+        latency = timed(lambda: state.search_words(query, limit=20), repeat=5)
+        print(f"  query {name:<13} {query!r:<22} {latency * 1e3:8.2f}ms")
+
+    latency = timed(lambda: state.update_word(rng.randint(1, args.words), " ".join(rng.choices(lexicon, k=30)), "edit", "0xabc"), repeat=200)
+    print(f"  update_word with re-indexing: {latency * 1e6:.1f}us")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.search")
+        with open(path, "wb") as f:
+            f.write(msgpack.packb(state.search_index.to_dict(), use_bin_type=True))
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            SearchIndex.from_dict(msgpack.unpackb(f.read(), raw=False, strict_map_key=False))
+        print(f"  persisted index: {os.path.getsize(path) / 1e6:.1f}MB, loaded in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import timeit
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evm.core.stack import Stack, FastStack
+
+UINT_MAX = 2 ** 256 - 1
+
+
+# Each workload mimics how an interpreter drives the stack. Stack has no
+# dup/swap/multi-pop, so its versions go through items like the old handlers.
+
+def push_pop(s):
+    for i in range(100):
+        s.push(i)
+    for _ in range(100):
+        s.pop()
+
+
+def binary_ops_stack(s):
+    s.push(1)
+    for i in range(100):
+        s.push(i)
+        s.push((s.pop() + s.pop()) & UINT_MAX)
+    s.pop()
+
+
+def binary_ops_fast(s):
+    s.push(1)
+    for i in range(100):
+        s.push(i)
+        a, b = s.pop2()
+        s.push(a + b)
+    s.pop()
+
+
+def dup_swap_stack(s):
+    for i in range(16):
+        s.push(i)
+    items = s.items
+    for _ in range(50):
+        s.push(items[-16])
+        items[-1], items[-2] = items[-2], items[-1]
+        s.pop()
+    for _ in range(16):
+        s.pop()
+
+
+def dup_swap_fast(s):
+    for i in range(16):
+        s.push(i)
+    for _ in range(50):
+        s.dup(16)
+        s.swap(1)
+        s.pop()
+    for _ in range(16):
+        s.pop()
+
+
+WORKLOADS = [
+    ("push/pop", push_pop, push_pop),
+    ("binary ops", binary_ops_stack, binary_ops_fast),
+    ("dup/swap", dup_swap_stack, dup_swap_fast),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stack vs FastStack micro-benchmark")
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Best of {args.repeat} x {args.number} runs")
+    for name, stack_fn, fast_fn in WORKLOADS:
+        results = []
+        for cls, fn in ((Stack, stack_fn), (FastStack, fast_fn)):
+            s = cls()
+            results.append(min(timeit.repeat(lambda: fn(s), number=args.number, repeat=args.repeat)))
+        old, new = results
+        print(f"  {name:<11} Stack {old * 1e3:8.1f}ms   FastStack {new * 1e3:8.1f}ms   ({old / new:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evm.core.binary_storage import BinaryBlockchainStorage
+from evm.core.blockchain_storage import BlockchainStorage
+from evm.core.state import StateManager
+from evm.execution.evm import EVM
+
+
+def build_state(words: int, versions: int) -> StateManager:
+    state = StateManager()
+    for i in range(words):
+        word_id = state.add_word(f"term-{i}", f"definition {i} " * 8, "init", "0xabc", timestamp=1700000000 + i)
+        for v in range(versions - 1):
+            state.update_word(word_id, f"definition {i} revision {v} " * 8, f"edit {v}", "0xdef", timestamp=1700000000 + i)
+    state.create_dictionary("Bench", list(range(1, min(words, 100) + 1)), "0xabc", timestamp=1700000000)
+    return state
+
+
+def measure(storage_cls, path: str, state: StateManager):
+    storage_cls(path).save_state(state.to_dict())
+    size = os.path.getsize(path)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    evm = EVM(storage=storage_cls(path))
+    startup = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    evm.state.words[len(evm.state.words) // 2]["history"][-1]["content"]
+    first_access = time.perf_counter() - start
+    return size, startup, peak, first_access
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time of the JSON vs binary state backends")
+    parser.add_argument("--words", type=int, default=20000)
+    parser.add_argument("--versions", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Building state: {args.words} words x {args.versions} versions...")
+    state = build_state(args.words, args.versions)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'backend':<8} {'file':>10} {'startup':>10} {'peak mem':>10} {'1st read':>10}")
+        for name, cls, filename in (
+            ("json", BlockchainStorage, "state.json"),
+            ("binary", BinaryBlockchainStorage, "state.bin"),
+        ):
+            size, startup, peak, first_access = measure(cls, os.path.join(tmp, filename), state)
+            print(f"{name:<8} {size / 1e6:>8.1f}MB {startup * 1e3:>8.1f}ms {peak / 1e6:>8.1f}MB {first_access * 1e6:>8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
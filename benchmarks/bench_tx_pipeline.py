@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+import time
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.blockchain_client import BlockchainClient, DEFAULT_RPC_URL, DEFAULT_CONTRACT_ADDRESS
+from api.tx_pipeline import TxPipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write throughput: synchronous add_word vs the transaction pipeline "
+                    "(needs a running node with the Digitionary contract deployed)"
+    )
+    parser.add_argument("--rpc", default=DEFAULT_RPC_URL)
+    parser.add_argument("--contract", default=DEFAULT_CONTRACT_ADDRESS)
+    parser.add_argument("--count", type=int, default=200, help="transactions per run")
+    parser.add_argument("--depths", default="1,8,32,64", help="in-flight depths to try")
+    args = parser.parse_args()
+
+    client = BlockchainClient(args.rpc, args.contract)
+    client.ensure_staked()
+
+    count = max(1, args.count // 10)
+    start = time.perf_counter()
+    for i in range(count):
+        client.add_word(f"sync{i}", "Synchronous write", "bench")
+    elapsed = time.perf_counter() - start
+    print(f"  synchronous add_word:      {count / elapsed:8.1f} tx/s ({count} tx)")
+
+    for depth in (int(d) for d in args.depths.split(",")):
+        pipeline = TxPipeline(client, max_in_flight=depth, poll_interval=0.01)
+        pipeline.start()
+        start = time.perf_counter()
+        handles = [
+            pipeline.submit("addWord", [f"pipe{depth}-{i}", "Pipelined write", "bench"])
+            for i in range(args.count)
+        ]
+        results = [handle.future.result(timeout=600) for handle in handles]
+        elapsed = time.perf_counter() - start
+        pipeline.stop()
+        failed = sum(1 for result in results if not result["success"])
+        print(f"  pipeline, {depth:3d} in flight:  {args.count / elapsed:8.1f} tx/s ({failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -108,6 +108,25 @@ contract Digitionary {
         return wordId;
     }
 
+    /**
+     * @dev Add many words in one transaction (bulk dictionary import)
+     * @return firstWordId Id of the first added word; the rest follow consecutively
+     */
+    function addWords(
+        string[] memory _terms,
+        string[] memory _contents,
+        string[] memory _commitMsgs
+    ) external onlyStaker returns (uint256 firstWordId) {
+        require(
+            _terms.length == _contents.length && _terms.length == _commitMsgs.length,
+            "Array lengths differ"
+        );
+        firstWordId = wordCount + 1;
+        for (uint i = 0; i < _terms.length; i++) {
+            addWord(_terms[i], _contents[i], _commitMsgs[i]);
+        }
+    }
+
     /**
      * @dev Update an existing word with a new version
      */
@@ -0,0 +1,40 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+/**
+ * @title Multicall3
+ * @dev Aggregates many read calls into a single eth_call.
+ * Used by the API server to batch Digitionary reads (getWord, getLatestWordContent, getDictionary).
+ * Same aggregate3 interface as the canonical Multicall3 deployment.
+ */
+contract Multicall3 {
+    struct Call3 {
+        address target;
+        bool allowFailure;
+        bytes callData;
+    }
+
+    struct Result {
+        bool success;
+        bytes returnData;
+    }
+
+    /**
+     * @dev Execute calls in order, returning each call's success flag and return data.
+     * Reverts if a call with allowFailure == false fails.
+     */
+    function aggregate3(Call3[] calldata calls) public payable returns (Result[] memory returnData) {
+        uint256 length = calls.length;
+        returnData = new Result[](length);
+        for (uint256 i = 0; i < length; i++) {
+            Call3 calldata call = calls[i];
+            (bool success, bytes memory ret) = call.target.call(call.callData);
+            require(success || call.allowFailure, "Multicall3: call failed");
+            returnData[i] = Result(success, ret);
+        }
+    }
+
+    function getBlockNumber() public view returns (uint256 blockNumber) {
+        blockNumber = block.number;
+    }
+}
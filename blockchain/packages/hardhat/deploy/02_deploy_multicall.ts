@@ -0,0 +1,26 @@
+import { HardhatRuntimeEnvironment } from "hardhat/types";
+import { DeployFunction } from "hardhat-deploy/types";
+
+/**
+ * Deploys the Multicall3 aggregator used by the API to batch contract reads
+ *
+ * @param hre HardhatRuntimeEnvironment object.
+ */
+const deployMulticall: DeployFunction = async function (hre: HardhatRuntimeEnvironment) {
+    const { deployer } = await hre.getNamedAccounts();
+    const { deploy } = hre.deployments;
+
+    const multicall = await deploy("Multicall3", {
+        from: deployer,
+        args: [], // No constructor arguments
+        log: true,
+        autoMine: true,
+    });
+
+    console.log("📦 Multicall3 deployed!");
+    console.log("   Set DIGITIONARY_MULTICALL_ADDRESS=" + multicall.address + " for the API server");
+};
+
+export default deployMulticall;
+
+deployMulticall.tags = ["Multicall3"];
@@ -0,0 +1,177 @@
+from typing import Dict, Tuple
+
+from evm.core import gas as G
+
+# 0x00 range - stop and arithmetic
+STOP = 0x00
+ADD = 0x01
+MUL = 0x02
+SUB = 0x03
+DIV = 0x04
+SDIV = 0x05
+MOD = 0x06
+SMOD = 0x07
+ADDMOD = 0x08
+MULMOD = 0x09
+EXP = 0x0A
+SIGNEXTEND = 0x0B
+
+# 0x10 range - comparison and bitwise logic
+LT = 0x10
+GT = 0x11
+SLT = 0x12
+SGT = 0x13
+EQ = 0x14
+ISZERO = 0x15
+AND = 0x16
+OR = 0x17
+XOR = 0x18
+NOT = 0x19
+BYTE = 0x1A
+SHL = 0x1B
+SHR = 0x1C
+SAR = 0x1D
+
+SHA3 = 0x20
+
+# 0x30 range - execution environment
+ADDRESS = 0x30
+BALANCE = 0x31
+ORIGIN = 0x32
+CALLER = 0x33
+CALLVALUE = 0x34
+CALLDATALOAD = 0x35
+CALLDATASIZE = 0x36
+CALLDATACOPY = 0x37
+CODESIZE = 0x38
+CODECOPY = 0x39
+GASPRICE = 0x3A
+RETURNDATASIZE = 0x3D
+RETURNDATACOPY = 0x3E
+
+# 0x40 range - block information
+COINBASE = 0x41
+TIMESTAMP = 0x42
+NUMBER = 0x43
+PREVRANDAO = 0x44
+GASLIMIT = 0x45
+CHAINID = 0x46
+SELFBALANCE = 0x47
+BASEFEE = 0x48
+
+# 0x50 range - stack, memory, storage and flow
+POP = 0x50
+MLOAD = 0x51
+MSTORE = 0x52
+MSTORE8 = 0x53
+SLOAD = 0x54
+SSTORE = 0x55
+JUMP = 0x56
+JUMPI = 0x57
+PC = 0x58
+MSIZE = 0x59
+GAS = 0x5A
+JUMPDEST = 0x5B
+PUSH0 = 0x5F
+
+PUSH1 = 0x60
+PUSH32 = 0x7F
+DUP1 = 0x80
+DUP16 = 0x8F
+SWAP1 = 0x90
+SWAP16 = 0x9F
+LOG0 = 0xA0
+LOG4 = 0xA4
+
+# 0xf0 range - system operations (calls and creates are not supported)
+RETURN = 0xF3
+REVERT = 0xFD
+INVALID = 0xFE
+
+# opcode -> (mnemonic, static gas). Dynamic costs (memory expansion, EXP
+# exponent bytes, copies, warm/cold access, SSTORE, logs) are charged by the
+# instruction itself.
+OPCODES: Dict[int, Tuple[str, int]] = {
+    STOP: ("STOP", G.G_ZERO),
+    ADD: ("ADD", G.G_VERYLOW),
+    MUL: ("MUL", G.G_LOW),
+    SUB: ("SUB", G.G_VERYLOW),
+    DIV: ("DIV", G.G_LOW),
+    SDIV: ("SDIV", G.G_LOW),
+    MOD: ("MOD", G.G_LOW),
+    SMOD: ("SMOD", G.G_LOW),
+    ADDMOD: ("ADDMOD", G.G_MID),
+    MULMOD: ("MULMOD", G.G_MID),
+    EXP: ("EXP", G.G_EXP),
+    SIGNEXTEND: ("SIGNEXTEND", G.G_LOW),
+    LT: ("LT", G.G_VERYLOW),
+    GT: ("GT", G.G_VERYLOW),
+    SLT: ("SLT", G.G_VERYLOW),
+    SGT: ("SGT", G.G_VERYLOW),
+    EQ: ("EQ", G.G_VERYLOW),
+    ISZERO: ("ISZERO", G.G_VERYLOW),
+    AND: ("AND", G.G_VERYLOW),
+    OR: ("OR", G.G_VERYLOW),
+    XOR: ("XOR", G.G_VERYLOW),
+    NOT: ("NOT", G.G_VERYLOW),
+    BYTE: ("BYTE", G.G_VERYLOW),
+    SHL: ("SHL", G.G_VERYLOW),
+    SHR: ("SHR", G.G_VERYLOW),
+    SAR: ("SAR", G.G_VERYLOW),
+    SHA3: ("SHA3", G.G_SHA3),
+    ADDRESS: ("ADDRESS", G.G_BASE),
+    BALANCE: ("BALANCE", G.G_ZERO),
+    ORIGIN: ("ORIGIN", G.G_BASE),
+    CALLER: ("CALLER", G.G_BASE),
+    CALLVALUE: ("CALLVALUE", G.G_BASE),
+    CALLDATALOAD: ("CALLDATALOAD", G.G_VERYLOW),
+    CALLDATASIZE: ("CALLDATASIZE", G.G_BASE),
+    CALLDATACOPY: ("CALLDATACOPY", G.G_VERYLOW),
+    CODESIZE: ("CODESIZE", G.G_BASE),
+    CODECOPY: ("CODECOPY", G.G_VERYLOW),
+    GASPRICE: ("GASPRICE", G.G_BASE),
+    RETURNDATASIZE: ("RETURNDATASIZE", G.G_BASE),
+    RETURNDATACOPY: ("RETURNDATACOPY", G.G_VERYLOW),
+    COINBASE: ("COINBASE", G.G_BASE),
+    TIMESTAMP: ("TIMESTAMP", G.G_BASE),
+    NUMBER: ("NUMBER", G.G_BASE),
+    PREVRANDAO: ("PREVRANDAO", G.G_BASE),
+    GASLIMIT: ("GASLIMIT", G.G_BASE),
+    CHAINID: ("CHAINID", G.G_BASE),
+    SELFBALANCE: ("SELFBALANCE", G.G_LOW),
+    BASEFEE: ("BASEFEE", G.G_BASE),
+    POP: ("POP", G.G_BASE),
+    MLOAD: ("MLOAD", G.G_VERYLOW),
+    MSTORE: ("MSTORE", G.G_VERYLOW),
+    MSTORE8: ("MSTORE8", G.G_VERYLOW),
+    SLOAD: ("SLOAD", G.G_ZERO),
+    SSTORE: ("SSTORE", G.G_ZERO),
+    JUMP: ("JUMP", G.G_MID),
+    JUMPI: ("JUMPI", G.G_HIGH),
+    PC: ("PC", G.G_BASE),
+    MSIZE: ("MSIZE", G.G_BASE),
+    GAS: ("GAS", G.G_BASE),
+    JUMPDEST: ("JUMPDEST", G.G_JUMPDEST),
+    PUSH0: ("PUSH0", G.G_BASE),
+    RETURN: ("RETURN", G.G_ZERO),
+    REVERT: ("REVERT", G.G_ZERO),
+    INVALID: ("INVALID", G.G_ZERO),
+}
+
+for _n in range(1, 33):
+    OPCODES[PUSH1 + _n - 1] = (f"PUSH{_n}", G.G_VERYLOW)
+for _n in range(1, 17):
+    OPCODES[DUP1 + _n - 1] = (f"DUP{_n}", G.G_VERYLOW)
+    OPCODES[SWAP1 + _n - 1] = (f"SWAP{_n}", G.G_VERYLOW)
+for _n in range(5):
+    OPCODES[LOG0 + _n] = (f"LOG{_n}", G.G_LOG + _n * G.G_LOG_TOPIC)
+
+# Mnemonic -> opcode, for the assembler
+MNEMONICS: Dict[str, int] = {name: code for code, (name, _) in OPCODES.items()}
+
+
+def push_size(opcode: int) -> int:
+    """Number of immediate bytes following a PUSH opcode (0 for other opcodes)."""
+    if PUSH1 <= opcode <= PUSH32:
+        return opcode - PUSH1 + 1
+    return 0
@@ -0,0 +1,171 @@
+import mmap
+import os
+import struct
+from collections.abc import MutableMapping
+from typing import Dict, Any, BinaryIO, Iterator, List, Optional, Tuple
+
+import msgpack
+
+from evm.core.blockchain_storage import BlockchainStorage
+
+MAGIC = b"DGTB"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sB")
+_LENGTH = struct.Struct("<I")
+# index offset, index length, magic
+_FOOTER = struct.Struct("<QI4s")
+
+
+def _summarize_word(word: Dict) -> Tuple:
+    # Fields StateManager indexes: term, owner, time of the latest version
+    return (word["term"], word["owner"], word["history"][-1]["timestamp"])
+
+
+def _summarize_dictionary(dictionary: Dict) -> Tuple:
+    return (dictionary["author"],)
+
+
+class LazyRecordMap(MutableMapping):
+    """
+    Mapping of record id -> record dict backed by a snapshot buffer.
+
+    Records are msgpack-decoded the first time they are accessed and cached
+    afterwards. Assigned or deleted entries shadow the buffer, so the map
+    can be used as ``StateManager.words`` / ``StateManager.dictionaries``.
+    """
+
+    def __init__(self, buf, offsets: Dict[int, Tuple[int, int]], summaries: Dict[int, Tuple] = None):
+        self._buf = buf
+        self._offsets = offsets
+        self._summaries = summaries or {}
+        self._cache: Dict[int, Dict] = {}
+        # Insertion-ordered key set, so iteration matches a plain dict
+        self._keys = dict.fromkeys(offsets)
+
+    def __getitem__(self, key: int) -> Dict:
+        record = self._cache.get(key)
+        if record is not None:
+            return record
+        location = self._offsets.get(key)
+        if location is None:
+            raise KeyError(key)
+        offset, length = location
+        record = msgpack.unpackb(self._buf[offset:offset + length], raw=False, strict_map_key=False)
+        self._cache[key] = record
+        return record
+
+    def __setitem__(self, key: int, value: Dict):
+        self._cache[key] = value
+        self._offsets.pop(key, None)
+        self._summaries.pop(key, None)
+        self._keys[key] = None
+
+    def __delitem__(self, key: int):
+        if key not in self._keys:
+            raise KeyError(key)
+        del self._keys[key]
+        self._cache.pop(key, None)
+        self._offsets.pop(key, None)
+        self._summaries.pop(key, None)
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def is_loaded(self, key: int) -> bool:
+        """Whether the record has been decoded (or replaced) in memory."""
+        return key in self._cache
+
+    def summary(self, key: int) -> Optional[Tuple]:
+        """Indexed fields stored alongside a record that has not been decoded yet."""
+        if key in self._cache:
+            return None
+        return self._summaries.get(key)
+
+    def raw(self, key: int) -> Optional[memoryview]:
+        """Encoded bytes of a record that has not been decoded yet."""
+        if key in self._cache or key not in self._offsets:
+            return None
+        offset, length = self._offsets[key]
+        return self._buf[offset:offset + length]
+
+
+class BinaryBlockchainStorage(BlockchainStorage):
+    """
+    Persists blockchain state snapshots in a compact binary format.
+
+    Layout: a header, one length-prefixed msgpack record per word and per
+    dictionary, then a msgpack index of ``id -> (offset, length)`` plus the
+    fields StateManager indexes and the scalar state, and a fixed-size footer
+    pointing at the index. Loading memory-maps the file and only decodes the
+    index; word and dictionary records are decoded on first access through
+    ``LazyRecordMap``.
+
+    Journal mode, atomic writes and group commit are inherited unchanged.
+    """
+
+    def __init__(self, filepath: str = ".digitionary_blockchain.bin", **kwargs):
+        super().__init__(filepath, **kwargs)
+
+    def _write_snapshot(self, f: BinaryIO, state_data: Dict[str, Any]):
+        offset = _HEADER.size
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION))
+
+        def write_records(records, summarize) -> List[List]:
+            nonlocal offset
+            entries = []
+            lazy = isinstance(records, LazyRecordMap)
+            for key in records:
+                # Records never decoded since load are copied byte for byte
+                data = records.raw(key) if lazy else None
+                if data is not None:
+                    summary = records.summary(key)
+                else:
+                    record = records[key]
+                    data = msgpack.packb(record, use_bin_type=True)
+                    summary = summarize(record)
+                f.write(_LENGTH.pack(len(data)))
+                f.write(data)
+                entries.append([int(key), offset + _LENGTH.size, len(data), *summary])
+                offset += _LENGTH.size + len(data)
+            return entries
+
+        index = {
+            "words": write_records(state_data.get("words", {}), _summarize_word),
+            "dictionaries": write_records(state_data.get("dictionaries", {}), _summarize_dictionary),
+            "state": {k: v for k, v in state_data.items() if k not in ("words", "dictionaries")},
+        }
+        data = msgpack.packb(index, use_bin_type=True)
+        f.write(data)
+        f.write(_FOOTER.pack(offset, len(data), MAGIC))
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        with open(self.filepath, 'rb') as f:
+            if os.name == "nt":
+                # Windows can't replace a mapped file, so read it instead
+                buf = memoryview(f.read())
+            else:
+                buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        magic, version = _HEADER.unpack_from(buf, 0)
+        index_offset, index_length, end_magic = _FOOTER.unpack_from(buf, len(buf) - _FOOTER.size)
+        if magic != MAGIC or end_magic != MAGIC:
+            raise ValueError("not a Digitionary binary snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported snapshot format version {version}")
+
+        index = msgpack.unpackb(buf[index_offset:index_offset + index_length], raw=False, strict_map_key=False)
+        state = index["state"]
+        for section in ("words", "dictionaries"):
+            entries = index[section]
+            state[section] = LazyRecordMap(
+                buf,
+                {e[0]: (e[1], e[2]) for e in entries},
+                {e[0]: tuple(e[3:]) for e in entries}
+            )
+        return state
@@ -1,68 +1,368 @@
+import glob
 import json
 import os
-from typing import Dict, Any
+import threading
+import time
+from collections.abc import Mapping
+from typing import Callable, Dict, Any, List, BinaryIO, Optional
+
+import msgpack
+
+
+class StorageCorruptedError(Exception):
+    """Raised when a persisted state snapshot exists but cannot be read."""
+
+
+def _json_default(obj):
+    # Lazily loaded record maps (see binary_storage) are Mappings, not dicts
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 
 class BlockchainStorage:
-    """Handles persistence of blockchain state to local JSON file."""
-    
-    def __init__(self, filepath: str = ".digitionary_blockchain.json"):
+    """Handles persistence of blockchain state to local JSON file.
+
+    In journal mode every transaction is appended as one JSON line to
+    ``<filepath>.journal`` and the full state is only rewritten as a
+    compacted snapshot every ``snapshot_interval`` records. On load the
+    snapshot is read first and the journal records after it are replayed.
+
+    Snapshots are written atomically (temp file, fsync, rename). Journal
+    records are made durable by ``sync``, which uses group commit: the first
+    waiting writer becomes the leader, waits ``group_commit_window`` seconds
+    for other writers to append, and issues one fsync on behalf of all of them.
+    """
+
+    def __init__(
+        self,
+        filepath: str = ".digitionary_blockchain.json",
+        journal: bool = False,
+        snapshot_interval: int = 1000,
+        durable: bool = True,
+        group_commit_window: float = 0.0
+    ):
         self.filepath = filepath
-    
+        self.journal_path = filepath + ".journal"
+        self.journal_enabled = journal
+        self.snapshot_interval = snapshot_interval
+        self.durable = durable
+        self.group_commit_window = group_commit_window
+        self._journal_file = None
+        self._journal_seq = 0
+        self._records_since_snapshot = 0
+        # Serializes journal writes; the condition coordinates group commit
+        self._write_lock = threading.Lock()
+        self._sync_cond = threading.Condition()
+        self._synced_seq = 0
+        self._sync_leader = False
+
     def save_state(self, state_data: Dict[str, Any]) -> bool:
         """
         Save blockchain state to JSON file.
-        
+
+        The snapshot is written to a temporary file, fsynced and renamed over
+        the live file, so a crash leaves either the old or the new snapshot.
+
+        In journal mode this is the compaction step: the snapshot records the
+        sequence number of the last journal record it includes, and the
+        journal is truncated afterwards.
+
         Args:
             state_data: Dictionary containing blockchain state
-            
+
         Returns:
             True if save successful, False otherwise
         """
         try:
-            with open(self.filepath, 'w') as f:
-                json.dump(state_data, f, indent=2)
+            with self._write_lock:
+                if self.journal_enabled:
+                    state_data = {**state_data, "journal_seq": self._journal_seq}
+                self._atomic_write(self.filepath, lambda f: self._write_snapshot(f, state_data))
+                if self.journal_enabled:
+                    self._truncate_journal()
             return True
         except Exception as e:
             print(f"Error saving blockchain state: {e}")
             return False
-    
+
     def load_state(self) -> Dict[str, Any]:
         """
         Load blockchain state from JSON file.
-        
+
         Returns:
             Dictionary containing blockchain state, or empty dict if file doesn't exist
+
+        Raises:
+            StorageCorruptedError: If the file exists but cannot be parsed.
+                Starting from an empty state here would overwrite the chain.
         """
         if not os.path.exists(self.filepath):
             return {}
-        
+
         try:
-            with open(self.filepath, 'r') as f:
-                return json.load(f)
+            return self._read_snapshot()
         except Exception as e:
-            print(f"Error loading blockchain state: {e}")
-            return {}
-    
+            raise StorageCorruptedError(f"Cannot read blockchain state {self.filepath}: {e}") from e
+
+    def append_transaction(self, record: Dict[str, Any]) -> int:
+        """
+        Append a single transaction record to the journal.
+
+        The cost of an append only depends on the size of the record, not on
+        the size of the state. The record is flushed to the OS but not
+        fsynced; call ``sync`` with the returned sequence number for that.
+
+        Args:
+            record: JSON-serializable description of the applied transaction
+
+        Returns:
+            Sequence number of the record, or 0 if it could not be written
+        """
+        return self.append_transactions([record])
+
+    def append_transactions(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Append several transaction records to the journal with one write.
+
+        Args:
+            records: JSON-serializable transaction records, in order
+
+        Returns:
+            Sequence number of the last record, or 0 if they could not be written
+        """
+        try:
+            with self._write_lock:
+                if self._journal_file is None:
+                    self._journal_file = open(self.journal_path, 'a')
+                seq = self._journal_seq
+                lines = []
+                for record in records:
+                    seq += 1
+                    lines.append(json.dumps({"seq": seq, **record}, separators=(",", ":")) + "\n")
+                self._journal_file.write("".join(lines))
+                self._journal_file.flush()
+                self._journal_seq = seq
+                self._records_since_snapshot += len(records)
+                return seq
+        except Exception as e:
+            print(f"Error appending to blockchain journal: {e}")
+            return 0
+
+    def sync(self, seq: int) -> bool:
+        """
+        Block until the journal is durable up to ``seq`` (group commit).
+
+        Args:
+            seq: Sequence number returned by ``append_transaction``
+
+        Returns:
+            True once the record is on stable storage, False if fsync failed
+        """
+        if not self.durable:
+            return True
+
+        with self._sync_cond:
+            while self._synced_seq < seq:
+                if not self._sync_leader:
+                    self._sync_leader = True
+                    break
+                self._sync_cond.wait()
+            else:
+                return True
+
+        target = 0
+        try:
+            if self.group_commit_window > 0:
+                time.sleep(self.group_commit_window)
+            with self._write_lock:
+                target = self._journal_seq
+                fd = os.dup(self._journal_file.fileno()) if self._journal_file else None
+            if fd is not None:
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            return True
+        except Exception as e:
+            print(f"Error syncing blockchain journal: {e}")
+            target = 0
+            return False
+        finally:
+            with self._sync_cond:
+                self._synced_seq = max(self._synced_seq, target)
+                self._sync_leader = False
+                self._sync_cond.notify_all()
+
+    def load_journal(self, after_seq: int = 0) -> List[Dict[str, Any]]:
+        """
+        Read the journal records written after a snapshot.
+
+        A torn record at the end of the file (from a crash mid-append) is
+        discarded and cut off so that later appends start on a clean line.
+
+        Args:
+            after_seq: Sequence number already covered by the snapshot
+
+        Returns:
+            Records with a sequence number greater than ``after_seq``, in order
+        """
+        self._journal_seq = max(self._journal_seq, after_seq)
+        if not os.path.exists(self.journal_path):
+            self._synced_seq = self._journal_seq
+            return []
+
+        records = []
+        valid_size = 0
+        with open(self.journal_path, 'rb') as f:
+            for raw in f:
+                try:
+                    if not raw.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(raw)
+                except ValueError:
+                    print("Warning: Discarding torn record at end of blockchain journal")
+                    break
+                valid_size += len(raw)
+                seq = record.get("seq", 0)
+                self._journal_seq = max(self._journal_seq, seq)
+                if seq > after_seq:
+                    records.append(record)
+
+        if valid_size < os.path.getsize(self.journal_path):
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(valid_size)
+        self._synced_seq = self._journal_seq
+        self._records_since_snapshot = len(records)
+        return records
+
+    def save_index(self, name: str, index_data: Dict[str, Any]) -> bool:
+        """
+        Save a derived index (e.g. the search index) next to the state file.
+
+        The index is tagged with the current journal sequence number, so
+        ``load_index`` can tell whether it matches the snapshot it was saved with.
+
+        Args:
+            name: Index name, used as the file suffix
+            index_data: msgpack-serializable index contents
+
+        Returns:
+            True if save successful, False otherwise
+        """
+        try:
+            payload = {"journal_seq": self._journal_seq, "data": index_data}
+            self._atomic_write(
+                f"{self.filepath}.{name}",
+                lambda f: f.write(msgpack.packb(payload, use_bin_type=True))
+            )
+            return True
+        except Exception as e:
+            print(f"Error saving {name} index: {e}")
+            return False
+
+    def load_index(self, name: str, journal_seq: int) -> Optional[Dict[str, Any]]:
+        """
+        Load a derived index saved with ``save_index``.
+
+        Args:
+            name: Index name, used as the file suffix
+            journal_seq: Journal sequence number of the loaded snapshot
+
+        Returns:
+            The index contents, or None if missing, unreadable or out of date
+        """
+        path = f"{self.filepath}.{name}"
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                payload = msgpack.unpackb(f.read(), raw=False, strict_map_key=False)
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable {name} index: {e}")
+            return None
+        if payload.get("journal_seq") != journal_seq:
+            return None
+        return payload["data"]
+
+    def should_snapshot(self) -> bool:
+        """Whether enough records have accumulated to compact the journal."""
+        return self.journal_enabled and self._records_since_snapshot >= self.snapshot_interval
+
+    def _atomic_write(self, path: str, write: Callable[[BinaryIO], None]):
+        """Write a file via temp file + fsync + rename."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._fsync_dir()
+
+    def _write_snapshot(self, f: BinaryIO, state_data: Dict[str, Any]):
+        """Serialize a snapshot into an open binary file (overridden by other formats)."""
+        f.write(json.dumps(state_data, indent=2, default=_json_default).encode())
+
+    def _read_snapshot(self) -> Dict[str, Any]:
+        """Parse the snapshot file (overridden by other formats)."""
+        with open(self.filepath, 'r') as f:
+            return json.load(f)
+
+    def _fsync_dir(self):
+        """Persist the rename itself (no-op where directories can't be opened)."""
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(self.filepath)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def _truncate_journal(self):
+        """Drop journal records that are now covered by the snapshot."""
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        if os.path.exists(self.journal_path):
+            open(self.journal_path, 'w').close()
+        self._records_since_snapshot = 0
+        # Everything up to here is durable through the fsynced snapshot
+        with self._sync_cond:
+            self._synced_seq = max(self._synced_seq, self._journal_seq)
+            self._sync_cond.notify_all()
+
     def export_state(self) -> str:
         """
         Export current blockchain state as JSON string.
-        
+
         Returns:
             JSON string of blockchain state
         """
         state = self.load_state()
-        return json.dumps(state, indent=2)
-    
+        return json.dumps(state, indent=2, default=_json_default)
+
     def clear_state(self) -> bool:
         """
-        Clear blockchain state (delete the file).
-        
+        Clear blockchain state (delete the file, its journal and indexes).
+
         Returns:
             True if cleared successfully
         """
         try:
-            if os.path.exists(self.filepath):
-                os.remove(self.filepath)
+            with self._write_lock:
+                if self._journal_file is not None:
+                    self._journal_file.close()
+                    self._journal_file = None
+                # Snapshot, journal and derived index files
+                for path in [self.filepath, *glob.glob(glob.escape(self.filepath) + ".*")]:
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._journal_seq = 0
+                self._synced_seq = 0
+                self._records_since_snapshot = 0
             return True
         except Exception as e:
             print(f"Error clearing blockchain state: {e}")
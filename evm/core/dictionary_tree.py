@@ -0,0 +1,138 @@
+"""
+Dictionary releases as Merkle trees in the object store, keyed by term.
+
+Each term of a dictionary is an entry whose blob lists the words published
+under it with the version each was at: {"words": [[word_id, version], ...]}.
+Entries are bucketed by sha256(term): a subtree with at most BUCKET_SIZE
+terms is one tree of entries named by term, a larger one is a tree of
+subtrees named by the next byte (two hex digits) of the term hash. The
+shape depends only on the set of terms, so a term present with the same
+words in two releases sits in identical subtrees, and diff_trees skips
+every subtree whose hash matches: comparing two releases reads
+O(changes x depth) trees, whatever their size.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from evm.core.objects import FILE_MODE, TREE_MODE, put_blobs, put_trees, read_trees
+
+# Most terms kept in one tree before it is split by term hash
+BUCKET_SIZE = 64
+
+# A node being compared: a tree hash, entries not stored as a tree of their own, or nothing
+_Node = Union[str, List[Dict[str, Any]], None]
+
+
+def term_hash(term: str) -> str:
+    return hashlib.sha256(term.encode()).hexdigest()
+
+
+def encode_entry(words: List[Tuple[int, int]]) -> bytes:
+    return json.dumps({"words": [list(w) for w in words]}, separators=(",", ":")).encode()
+
+
+def build_tree(entries: Dict[str, bytes]) -> str:
+    """
+    Store a release and return its root hash.
+
+    Args:
+        entries: Term -> entry blob (encode_entry)
+
+    Returns:
+        Hash of the root tree; one call into the store per tree level
+    """
+    terms = sorted(entries, key=term_hash)
+    blob_hashes = dict(zip(terms, put_blobs([entries[t] for t in terms])))
+    keyed = [(term_hash(t), t) for t in terms]
+
+    # Plan the trees top-down, then store them bottom-up a level at a time
+    # levels[depth] holds (tree entries, (depth, tree, entry) of its parent entry)
+    levels: List[List[Tuple[List[Dict[str, Any]], Optional[Tuple[int, int, int]]]]] = []
+
+    def plan(items: List[Tuple[str, str]], depth: int, parent: Optional[Tuple[int, int, int]]):
+        if len(levels) == depth:
+            levels.append([])
+        entries_ = []
+        levels[depth].append((entries_, parent))
+        index = len(levels[depth]) - 1
+        if len(items) <= BUCKET_SIZE or depth * 2 >= len(items[0][0]):
+            for _, term in sorted(items, key=lambda item: item[1]):
+                entries_.append({"Name": term, "Mode": FILE_MODE, "Hash": blob_hashes[term]})
+            return
+        start = 0
+        while start < len(items):
+            prefix = items[start][0][depth * 2:depth * 2 + 2]
+            end = start
+            while end < len(items) and items[end][0][depth * 2:depth * 2 + 2] == prefix:
+                end += 1
+            entries_.append({"Name": prefix, "Mode": TREE_MODE, "Hash": None})
+            plan(items[start:end], depth + 1, (depth, index, len(entries_) - 1))
+            start = end
+
+    plan(keyed, 0, None)
+    root = None
+    for level in reversed(levels):
+        hashes = put_trees([tree for tree, _ in level])
+        for (_, parent), hash_ in zip(level, hashes):
+            if parent is None:
+                root = hash_
+            else:
+                depth, index, entry = parent
+                levels[depth][index][0][entry]["Hash"] = hash_
+    return root
+
+
+def _is_split(entries: List[Dict[str, Any]]) -> bool:
+    return bool(entries) and entries[0]["Mode"] == TREE_MODE
+
+
+def _children(entries: List[Dict[str, Any]], depth: int) -> Dict[str, _Node]:
+    """Subtrees of a node by term hash byte; a bucket's entries are grouped the same way."""
+    if _is_split(entries):
+        return {e["Name"]: e["Hash"] for e in entries}
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for e in entries:
+        groups.setdefault(term_hash(e["Name"])[depth * 2:depth * 2 + 2], []).append(e)
+    return groups
+
+
+def diff_trees(a: Optional[str], b: Optional[str]) -> Tuple[Dict[str, Tuple[Optional[str], Optional[str]]], int]:
+    """
+    Terms whose entries differ between two releases.
+
+    Returns:
+        term -> (entry blob hash in a, in b; None where absent), and the
+        number of trees read
+    """
+    changed: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    reads = 0
+    pending: List[Tuple[_Node, _Node, int]] = [(a, b, 0)] if a != b else []
+    while pending:
+        # One call into the store per level
+        wanted = sorted({node for pair in pending for node in pair[:2] if isinstance(node, str)})
+        trees = dict(zip(wanted, read_trees(wanted)))
+        reads += len(wanted)
+        missing = [h for h in wanted if trees[h] is None]
+        if missing:
+            raise KeyError(f"Missing dictionary tree {missing[0]}")
+
+        next_pending = []
+        for x, y, depth in pending:
+            ex = trees[x] if isinstance(x, str) else (x or [])
+            ey = trees[y] if isinstance(y, str) else (y or [])
+            if _is_split(ex) or _is_split(ey):
+                cx, cy = _children(ex, depth), _children(ey, depth)
+                for prefix in cx.keys() | cy.keys():
+                    nx, ny = cx.get(prefix), cy.get(prefix)
+                    if not (isinstance(nx, str) and nx == ny):
+                        next_pending.append((nx, ny, depth + 1))
+                continue
+            mx = {e["Name"]: e["Hash"] for e in ex}
+            my = {e["Name"]: e["Hash"] for e in ey}
+            for term in mx.keys() | my.keys():
+                if mx.get(term) != my.get(term):
+                    changed[term] = (mx.get(term), my.get(term))
+        pending = next_pending
+    return changed, reads
@@ -0,0 +1,54 @@
+from evm.constants.limits import WORD_SIZE
+
+# Gas schedule (Shanghai values; refunds are not modelled)
+G_ZERO = 0
+G_JUMPDEST = 1
+G_BASE = 2
+G_VERYLOW = 3
+G_LOW = 5
+G_MID = 8
+G_HIGH = 10
+G_EXP = 10
+G_EXP_BYTE = 50
+G_SHA3 = 30
+G_SHA3_WORD = 6
+G_COPY = 3
+G_MEMORY = 3
+G_QUAD_COEFF_DIV = 512
+G_LOG = 375
+G_LOG_TOPIC = 375
+G_LOG_DATA = 8
+G_COLD_SLOAD = 2100
+G_COLD_ACCOUNT_ACCESS = 2600
+G_WARM_ACCESS = 100
+G_SSTORE_SET = 20000
+G_SSTORE_RESET = 2900
+# SSTORE fails when no more than the call stipend is left (EIP-2200)
+G_CALL_STIPEND = 2300
+G_CODE_DEPOSIT = 200
+
+G_TRANSACTION = 21000
+G_TX_CREATE = 32000
+G_TX_DATA_ZERO = 4
+G_TX_DATA_NONZERO = 16
+
+
+class OutOfGas(Exception):
+    pass
+
+
+def to_words(size: int) -> int:
+    """Number of 32-byte words needed to hold ``size`` bytes."""
+    return (size + WORD_SIZE - 1) // WORD_SIZE
+
+
+def memory_cost(words: int) -> int:
+    """Total cost of a memory of ``words`` words: linear plus quadratic term."""
+    return G_MEMORY * words + words * words // G_QUAD_COEFF_DIV
+
+
+def intrinsic_gas(data: bytes, create: bool = False) -> int:
+    """Gas charged for a transaction before any code runs."""
+    zeros = data.count(0)
+    cost = G_TRANSACTION + zeros * G_TX_DATA_ZERO + (len(data) - zeros) * G_TX_DATA_NONZERO
+    return cost + G_TX_CREATE if create else cost
@@ -0,0 +1,136 @@
+"""
+Content-addressed, delta-compressed word history.
+
+Only the latest version of a word keeps its content inline. When a new
+version is added, the previous one is replaced by a reference to a blob in
+the object store (evm/core/objects.py):
+
+    {"commitMsg", "timestamp", "author", "delta": hash}  reverse delta against the next version
+    {"commitMsg", "timestamp", "author", "blob": hash}   full content, every KEYFRAME_INTERVAL versions
+
+Older versions are materialized on demand by walking back from the nearest
+version with full content, at most KEYFRAME_INTERVAL - 1 deltas. Memory and
+disk for history grow with the size of edits instead of content size x
+version count, and identical blobs are stored once.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+from evm.core.objects import get_blob, get_blobs, put_blob
+
+# Every KEYFRAME_INTERVAL-th version is stored in full
+KEYFRAME_INTERVAL = 32
+
+
+def _encode(obj: Dict[str, Any]) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _load(hash_: str, loaded: Optional[Dict[str, Optional[bytes]]] = None) -> Dict[str, Any]:
+    data = loaded[hash_] if loaded is not None else get_blob(hash_)
+    if data is None:
+        raise KeyError(f"Missing history object {hash_}")
+    return json.loads(data)
+
+
+def _load_all(history: List[Dict[str, Any]]) -> Dict[str, Optional[bytes]]:
+    """Every blob a history refers to, fetched in one call."""
+    refs = [ref for ref in map(object_ref, history) if ref is not None]
+    return dict(zip(refs, get_blobs(refs)))
+
+
+def make_delta(new: str, old: str) -> Dict[str, Any]:
+    """Delta that turns ``new`` back into ``old``: shared prefix and suffix lengths, and old's middle."""
+    limit = min(len(new), len(old))
+    prefix = 0
+    while prefix < limit and new[prefix] == old[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and new[-1 - suffix] == old[-1 - suffix]:
+        suffix += 1
+    return {"p": prefix, "s": suffix, "d": old[prefix:len(old) - suffix]}
+
+
+def apply_delta(new: str, delta: Dict[str, Any]) -> str:
+    return new[:delta["p"]] + delta["d"] + new[len(new) - delta["s"]:]
+
+
+def compact_version(version: Dict[str, Any], next_content: str, index: int) -> Dict[str, Any]:
+    """
+    Replace a version that is no longer the latest by a blob reference.
+
+    Args:
+        version: The version, with its content inline
+        next_content: Content of the version after it
+        index: Position of the version in its history
+
+    Returns:
+        The new history entry; its "delta" or "blob" hash is a new reference
+    """
+    entry = {k: v for k, v in version.items() if k != "content"}
+    if (index + 1) % KEYFRAME_INTERVAL == 0:
+        entry["blob"] = put_blob(_encode({"content": version["content"]}))
+    else:
+        entry["delta"] = put_blob(_encode(make_delta(next_content, version["content"])))
+    return entry
+
+
+def object_ref(entry: Dict[str, Any]) -> Optional[str]:
+    """Hash of the blob a history entry refers to (None for inline content)."""
+    return entry.get("delta") or entry.get("blob")
+
+
+def expand_version(entry: Dict[str, Any], next_content: str) -> Dict[str, Any]:
+    """Inverse of compact_version: the entry with its content inline again."""
+    version = {k: v for k, v in entry.items() if k not in ("delta", "blob")}
+    if "delta" in entry:
+        version["content"] = apply_delta(next_content, _load(entry["delta"]))
+    else:
+        version["content"] = _base_content(entry)
+    return version
+
+
+def _base_content(entry: Dict[str, Any], loaded: Optional[Dict[str, Optional[bytes]]] = None) -> str:
+    if "content" in entry:
+        return entry["content"]
+    return _load(entry["blob"], loaded)["content"]
+
+
+def version_content(history: List[Dict[str, Any]], index: int) -> str:
+    """Content of ``history[index]``, materialized from the nearest full version after it."""
+    base = index
+    while "delta" in history[base]:
+        base += 1
+    loaded = _load_all(history[index:base + 1])
+    content = _base_content(history[base], loaded)
+    for i in range(base - 1, index - 1, -1):
+        content = apply_delta(content, _load(history[i]["delta"], loaded))
+    return content
+
+
+def materialize(history: List[Dict[str, Any]], start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Versions ``history[start:stop]`` with their content inline, in one
+    backwards pass from the nearest full version at or after the last one.
+    Only the blobs of that stretch are read.
+    """
+    start, stop, _ = slice(start, stop).indices(len(history))
+    if start >= stop:
+        return []
+    base = stop - 1
+    while "delta" in history[base]:
+        base += 1
+    loaded = _load_all(history[start:base + 1])
+    versions = []
+    content = None
+    for i in range(base, start - 1, -1):
+        entry = history[i]
+        if "delta" in entry:
+            content = apply_delta(content, _load(entry["delta"], loaded))
+        else:
+            content = _base_content(entry, loaded)
+        if i < stop:
+            versions.append({**{k: v for k, v in entry.items() if k not in ("delta", "blob")}, "content": content})
+    versions.reverse()
+    return versions
@@ -0,0 +1,80 @@
+from evm.constants.limits import WORD_SIZE
+from evm.core.gas import memory_cost
+
+
+class Memory:
+    """
+    EVM memory: a zero-filled byte array that grows in 32-byte words.
+
+    ``size`` is the active (word-aligned) size the code has touched, which
+    is what MSIZE reports and what expansion gas is charged for. The backing
+    bytearray is over-allocated by doubling, so growing by a word at a time
+    is amortized O(1). The total expansion cost of the current size is kept
+    in ``cost``, so charging for growth is one quadratic evaluation per
+    expansion rather than per access.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self.size = 0
+        self.cost = 0
+
+    def __len__(self):
+        return self.size
+
+    def expansion_cost(self, end: int) -> int:
+        """Gas to grow memory so bytes up to ``end`` are addressable (0 if they are)."""
+        if end <= self.size:
+            return 0
+        return memory_cost((end + WORD_SIZE - 1) // WORD_SIZE) - self.cost
+
+    def grow(self, end: int):
+        """Grow the active size to cover ``end`` bytes; charge ``expansion_cost`` first."""
+        if end <= self.size:
+            return
+        words = (end + WORD_SIZE - 1) // WORD_SIZE
+        size = words * WORD_SIZE
+        capacity = len(self._buffer)
+        if size > capacity:
+            capacity = max(size, 2 * capacity)
+            try:
+                self._buffer.extend(bytes(capacity - len(self._buffer)))
+            except BufferError:
+                # A view handed out by view() is still alive; move to a new
+                # buffer and leave the old one to it
+                buffer = bytearray(capacity)
+                buffer[:self.size] = self._buffer[:self.size]
+                self._buffer = buffer
+        self.size = size
+        self.cost = memory_cost(words)
+
+    def view(self, offset: int, size: int) -> memoryview:
+        """
+        Zero-copy view of ``[offset, offset + size)``.
+
+        The view aliases memory; use read() for data that must outlive later writes.
+        """
+        return memoryview(self._buffer)[offset:offset + size]
+
+    def read(self, offset: int, size: int) -> bytes:
+        return bytes(memoryview(self._buffer)[offset:offset + size])
+
+    def write(self, offset: int, value: bytes):
+        self._buffer[offset:offset + len(value)] = value
+
+    def copy_from(self, offset: int, source: bytes, source_offset: int, size: int):
+        """Copy ``source[source_offset:source_offset + size]`` into memory, zero-padding past its end."""
+        available = max(0, min(size, len(source) - source_offset))
+        if available:
+            self._buffer[offset:offset + available] = memoryview(source)[source_offset:source_offset + available]
+        if available < size:
+            self._buffer[offset + available:offset + size] = bytes(size - available)
+
+    def read_word(self, offset: int) -> int:
+        return int.from_bytes(memoryview(self._buffer)[offset:offset + WORD_SIZE], "big")
+
+    def write_word(self, offset: int, value: int):
+        self._buffer[offset:offset + WORD_SIZE] = value.to_bytes(WORD_SIZE, "big")
+
+    def write_byte(self, offset: int, value: int):
+        self._buffer[offset] = value & 0xFF
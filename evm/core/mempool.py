@@ -0,0 +1,129 @@
+"""
+Pending transactions of the fallback EVM, waiting to be included in a block.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+# Finished transactions kept around for the status endpoint
+MAX_FINISHED_TRANSACTIONS = 10000
+
+
+class MempoolFull(Exception):
+    """Raised when the pool already holds ``max_size`` transactions."""
+    pass
+
+
+class PendingTransaction:
+    """A submitted transaction; ``future`` resolves to ``to_dict()`` once its block is sealed."""
+
+    def __init__(self, sender: str, data: Dict[str, Any], nonce: int):
+        self.id = uuid.uuid4().hex
+        self.sender = sender
+        self.data = data
+        self.nonce = nonce
+        self.status = "queued"  # queued -> confirmed | failed
+        self.result: Dict[str, Any] = {}
+        self.block_number: Optional[int] = None
+        self.block_hash: Optional[str] = None
+        self.submitted_at = time.time()
+        self.future: Future = Future()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("confirmed", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.result,
+            "tx_id": self.id,
+            "action": self.data.get("action"),
+            "sender": self.sender,
+            "nonce": self.nonce,
+            "status": self.status,
+            "success": self.status == "confirmed",
+            "block_number": self.block_number,
+            "block_hash": self.block_hash
+        }
+
+
+class Mempool:
+    """
+    Priority queue of pending transactions keyed by (sender nonce, arrival).
+
+    Every sender's pending transactions get consecutive nonces, so a
+    sender's transactions leave the pool in submission order, and the next
+    transaction of each sender comes before anyone's later ones: a sender
+    flooding the pool cannot push others out of the next block.
+
+    Nonces count a sender's pending transactions, not its lifetime ones: a
+    sender with nothing pending starts again at the nonce last popped, so
+    its earlier, already confirmed transactions don't put it behind anyone.
+    """
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max_size
+        self._heap: List[Tuple[int, int, PendingTransaction]] = []
+        self._arrivals = itertools.count()
+        # sender -> (transactions pending, nonce of the latest); dropped when none are
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        # Nonce of the transaction popped last
+        self._round = 0
+        self._transactions: "OrderedDict[str, PendingTransaction]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add(self, sender: str, data: Dict[str, Any]) -> PendingTransaction:
+        """
+        Queue a transaction.
+
+        Raises:
+            MempoolFull: If ``max_size`` transactions are already pending
+        """
+        with self._lock:
+            if len(self._heap) >= self.max_size:
+                raise MempoolFull("Mempool is full")
+            key = sender.lower()
+            count, last = self._pending.get(key, (0, 0))
+            nonce = last + 1 if count else self._round
+            self._pending[key] = (count + 1, nonce)
+            tx = PendingTransaction(sender, data, nonce)
+            heapq.heappush(self._heap, (nonce, next(self._arrivals), tx))
+            self._transactions[tx.id] = tx
+            self._forget_finished()
+            return tx
+
+    def pop_batch(self, limit: int) -> List[PendingTransaction]:
+        """Remove and return up to ``limit`` transactions, highest priority first."""
+        with self._lock:
+            batch = []
+            for _ in range(min(limit, len(self._heap))):
+                nonce, _, tx = heapq.heappop(self._heap)
+                self._round = nonce
+                key = tx.sender.lower()
+                count, last = self._pending[key]
+                if count == 1:
+                    del self._pending[key]
+                else:
+                    self._pending[key] = (count - 1, last)
+                batch.append(tx)
+            return batch
+
+    def get(self, tx_id: str) -> Optional[PendingTransaction]:
+        with self._lock:
+            return self._transactions.get(tx_id)
+
+    def _forget_finished(self):
+        while len(self._transactions) > MAX_FINISHED_TRANSACTIONS:
+            oldest_id, oldest = next(iter(self._transactions.items()))
+            if not oldest.done:
+                break
+            del self._transactions[oldest_id]
@@ -0,0 +1,281 @@
+"""
+Compact sparse Merkle tree over 256-bit keys.
+
+A binary trie on the key bits where a subtree holding a single leaf is
+stored as that leaf, so leaves sit at depth ~log2(n) instead of 256 and an
+update rehashes only the nodes on its path. Nodes are immutable: an update
+copies its path and shares everything else, so an old root stays a valid
+snapshot.
+
+    leaf hash     = keccak256(0x00 || key || value_hash)
+    internal hash = keccak256(0x01 || left_hash || right_hash)
+    empty subtree = 32 zero bytes
+"""
+
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from Cryptodome.Hash import keccak
+
+EMPTY_HASH = bytes(32)
+
+
+def keccak256(data: bytes) -> bytes:
+    return keccak.new(digest_bits=256, data=data).digest()
+
+
+def _bit(key: bytes, depth: int) -> int:
+    return (key[depth >> 3] >> (7 - (depth & 7))) & 1
+
+
+class _Leaf:
+    __slots__ = ("key", "value", "hash")
+
+    def __init__(self, key: bytes, value: bytes):
+        self.key = key
+        self.value = value
+        self.hash = keccak256(b"\x00" + key + value)
+
+
+class _Internal:
+    __slots__ = ("left", "right", "hash")
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.hash = keccak256(
+            b"\x01" + (left.hash if left else EMPTY_HASH) + (right.hash if right else EMPTY_HASH)
+        )
+
+
+def _insert(node, key: bytes, value: bytes, depth: int):
+    if node is None:
+        return _Leaf(key, value)
+    if isinstance(node, _Leaf):
+        if node.key == key:
+            return _Leaf(key, value)
+        return _split(node, _Leaf(key, value), depth)
+    if _bit(key, depth):
+        return _Internal(node.left, _insert(node.right, key, value, depth + 1))
+    return _Internal(_insert(node.left, key, value, depth + 1), node.right)
+
+
+def _split(a: _Leaf, b: _Leaf, depth: int):
+    """Smallest subtree at ``depth`` holding two leaves."""
+    bit_a, bit_b = _bit(a.key, depth), _bit(b.key, depth)
+    if bit_a == bit_b:
+        child = _split(a, b, depth + 1)
+        return _Internal(None, child) if bit_a else _Internal(child, None)
+    return _Internal(b, a) if bit_a else _Internal(a, b)
+
+
+def _delete(node, key: bytes, depth: int):
+    if node is None:
+        return None
+    if isinstance(node, _Leaf):
+        return None if node.key == key else node
+    if _bit(key, depth):
+        left, right = node.left, _delete(node.right, key, depth + 1)
+        if right is node.right:
+            return node
+    else:
+        left, right = _delete(node.left, key, depth + 1), node.right
+        if left is node.left:
+            return node
+    # Collapse a subtree left with a single leaf back into that leaf
+    if left is None and (right is None or isinstance(right, _Leaf)):
+        return right
+    if right is None and isinstance(left, _Leaf):
+        return left
+    return _Internal(left, right)
+
+
+def _split_index(items: List[Tuple[bytes, Optional[bytes]]], depth: int) -> int:
+    """Index of the first item (sorted by key) whose key has bit ``depth`` set."""
+    low, high = 0, len(items)
+    while low < high:
+        mid = (low + high) // 2
+        if _bit(items[mid][0], depth):
+            high = mid
+        else:
+            low = mid + 1
+    return low
+
+
+def _build(items: List[Tuple[bytes, bytes]], depth: int):
+    """Subtree over ``items`` (sorted by key, distinct keys), hashing each node once."""
+    if not items:
+        return None
+    if len(items) == 1:
+        return _Leaf(*items[0])
+    split = _split_index(items, depth)
+    return _Internal(_build(items[:split], depth + 1), _build(items[split:], depth + 1))
+
+
+def _update_many(node, items: List[Tuple[bytes, Optional[bytes]]], depth: int):
+    """Apply sorted (key, value or None) updates, hashing every touched node once."""
+    if not items:
+        return node
+    if not isinstance(node, _Internal):
+        if node is not None and all(key != node.key for key, _ in items):
+            items = sorted(items + [(node.key, node.value)])
+        return _build([item for item in items if item[1] is not None], depth)
+    split = _split_index(items, depth)
+    left = _update_many(node.left, items[:split], depth + 1)
+    right = _update_many(node.right, items[split:], depth + 1)
+    if left is node.left and right is node.right:
+        return node
+    if left is None and (right is None or isinstance(right, _Leaf)):
+        return right
+    if right is None and isinstance(left, _Leaf):
+        return left
+    return _Internal(left, right)
+
+
+def _leaves(node) -> Iterator[Tuple[bytes, bytes]]:
+    if node is None:
+        return
+    if isinstance(node, _Leaf):
+        yield node.key, node.value
+        return
+    yield from _leaves(node.left)
+    yield from _leaves(node.right)
+
+
+def _summary(node) -> Dict[str, str]:
+    if node is None:
+        return {"type": "empty", "hash": "0x" + EMPTY_HASH.hex()}
+    if isinstance(node, _Leaf):
+        return {"type": "leaf", "hash": "0x" + node.hash.hex(), "key": "0x" + node.key.hex(), "value": "0x" + node.value.hex()}
+    return {
+        "type": "internal",
+        "hash": "0x" + node.hash.hex(),
+        "left": "0x" + (node.left.hash if node.left else EMPTY_HASH).hex(),
+        "right": "0x" + (node.right.hash if node.right else EMPTY_HASH).hex()
+    }
+
+
+class SparseMerkleTree:
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    @classmethod
+    def from_items(cls, items: Dict[bytes, bytes]) -> "SparseMerkleTree":
+        """Build a tree in one pass: n leaf and n - 1 internal hashes instead of n paths."""
+        tree = cls()
+        tree._root = _build(sorted(items.items()), 0)
+        tree.size = len(items)
+        return tree
+
+    @property
+    def root_hash(self) -> bytes:
+        return self._root.hash if self._root else EMPTY_HASH
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        node, depth = self._root, 0
+        while isinstance(node, _Internal):
+            node = node.right if _bit(key, depth) else node.left
+            depth += 1
+        return node.value if node is not None and node.key == key else None
+
+    def update(self, key: bytes, value: Optional[bytes]):
+        """Set the value hash of ``key``; None removes it."""
+        exists = self.get(key) is not None
+        if value is None:
+            if exists:
+                self._root = _delete(self._root, key, 0)
+                self.size -= 1
+        else:
+            self._root = _insert(self._root, key, value, 0)
+            self.size += 0 if exists else 1
+
+    def update_many(self, updates: Dict[bytes, Optional[bytes]]):
+        """
+        Apply many updates at once (None removes a key).
+
+        Nodes shared by several updated paths are rehashed once instead of
+        once per key, so a block of k updates costs fewer than k * depth hashes.
+        """
+        if not updates:
+            return
+        for key, value in updates.items():
+            exists = self.get(key) is not None
+            self.size += (value is not None) - exists
+        self._root = _update_many(self._root, sorted(updates.items()), 0)
+
+    def prove(self, key: bytes) -> Optional[List[bytes]]:
+        """
+        Inclusion proof for ``key``: sibling hashes from the root down to its leaf.
+
+        Returns:
+            The sibling hashes, or None if the key is not in the tree
+        """
+        siblings = []
+        node, depth = self._root, 0
+        while isinstance(node, _Internal):
+            if _bit(key, depth):
+                sibling, node = node.left, node.right
+            else:
+                sibling, node = node.right, node.left
+            siblings.append(sibling.hash if sibling else EMPTY_HASH)
+            depth += 1
+        if node is None or node.key != key:
+            return None
+        return siblings
+
+    @staticmethod
+    def verify(root: bytes, key: bytes, value: bytes, siblings: List[bytes]) -> bool:
+        """Check an inclusion proof produced by ``prove``."""
+        node_hash = keccak256(b"\x00" + key + value)
+        for depth in range(len(siblings) - 1, -1, -1):
+            if _bit(key, depth):
+                node_hash = keccak256(b"\x01" + siblings[depth] + node_hash)
+            else:
+                node_hash = keccak256(b"\x01" + node_hash + siblings[depth])
+        return node_hash == root
+
+    def node(self, path: str = "") -> Dict[str, str]:
+        """
+        Summary of the subtree at ``path`` (a string of 0/1 branch choices
+        from the root): its hash, and its children's hashes or its leaf.
+        """
+        node = self._root
+        for step in path:
+            if not isinstance(node, _Internal):
+                raise ValueError("Path leaves the tree")
+            node = node.right if step == "1" else node.left
+        return _summary(node)
+
+    def diff(self, fetch: Callable[[str], Dict[str, str]]) -> Set[bytes]:
+        """
+        Keys whose values differ from another tree, read through ``fetch``
+        (that tree's ``node``, possibly over the network).
+
+        Only subtrees whose hashes differ are visited, so comparing two
+        replicas costs O(changes x depth) node fetches.
+        """
+        differing: Set[bytes] = set()
+
+        def remote_leaves(path: str, summary: Dict[str, str]) -> Iterator[Tuple[bytes, bytes]]:
+            if summary["type"] == "leaf":
+                yield bytes.fromhex(summary["key"][2:]), bytes.fromhex(summary["value"][2:])
+            elif summary["type"] == "internal":
+                yield from remote_leaves(path + "0", fetch(path + "0"))
+                yield from remote_leaves(path + "1", fetch(path + "1"))
+
+        def walk(path: str, local, summary: Dict[str, str]):
+            local_hash = local.hash if local else EMPTY_HASH
+            if summary["hash"] == "0x" + local_hash.hex():
+                return
+            if isinstance(local, _Internal) and summary["type"] == "internal":
+                for step, child, child_hash in (("0", local.left, summary["left"]), ("1", local.right, summary["right"])):
+                    if child_hash != "0x" + (child.hash if child else EMPTY_HASH).hex():
+                        walk(path + step, child, fetch(path + step))
+                return
+            # One side is a single leaf or empty here: compare the leaf sets
+            mine = dict(_leaves(local))
+            theirs = dict(remote_leaves(path, summary))
+            differing.update(key for key in mine.keys() | theirs.keys() if mine.get(key) != theirs.get(key))
+
+        walk("", self._root, fetch(""))
+        return differing
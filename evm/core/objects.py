@@ -0,0 +1,135 @@
+"""
+Content-addressed object store for word history and dictionary trees.
+
+Objects go to the Go ``repo`` store through repo.py when librepo.so is
+built, otherwise to an in-process store with the same hashing and tree
+encoding, so hashes (and the state root, which covers them) don't depend
+on which one is in use. With open_object_store the Go store keeps objects
+in an on-disk packfile (repo/pack.go).
+"""
+
+import hashlib
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import repo as _repo
+except (ImportError, OSError):
+    # cffi missing or librepo.so not built
+    _repo = None
+
+# Object types (repo/store.go)
+BLOB, TREE = 0, 1
+# Modes of tree entries
+FILE_MODE, TREE_MODE = 0o100644, 0o040000
+
+# Fallback object store: sha256(type byte || data), as repo/store.go hashes objects
+_local_objects: Dict[str, Tuple[int, bytes]] = {}
+
+
+def _put_local(type_: int, items: List[bytes]) -> List[str]:
+    hashes = []
+    for data in items:
+        hash_ = hashlib.sha256(bytes([type_]) + data).hexdigest()
+        _local_objects.setdefault(hash_, (type_, data))
+        hashes.append(hash_)
+    return hashes
+
+
+def put_blob(data: bytes) -> str:
+    """Store ``data`` and return its hash."""
+    return put_blobs([data])[0]
+
+
+def put_blobs(blobs: List[bytes]) -> List[str]:
+    """Store many blobs at once (one call into the Go store) and return their hashes."""
+    if _repo is not None:
+        return _repo.put_blobs(blobs)
+    return _put_local(BLOB, blobs)
+
+
+def get_blob(hash_: str) -> Optional[bytes]:
+    return get_blobs([hash_])[0]
+
+
+def get_blobs(hashes: List[str]) -> List[Optional[bytes]]:
+    if _repo is not None:
+        return _repo.get_objects(hashes)
+    return [_local_objects[h][1] if h in _local_objects else None for h in hashes]
+
+
+def encode_tree(entries: List[Dict[str, Any]]) -> bytes:
+    """Binary tree encoding of repo/tree.go (same as repo.encode_tree)."""
+    out = bytearray(b"\x00")
+    for entry in entries:
+        name = entry["Name"].encode()
+        out += struct.pack("<I", entry["Mode"])
+        length = len(name)
+        while length >= 0x80:
+            out.append(length & 0x7F | 0x80)
+            length >>= 7
+        out.append(length)
+        out += name + bytes.fromhex(entry["Hash"])
+    return bytes(out)
+
+
+def decode_tree(data: bytes) -> List[Dict[str, Any]]:
+    entries, pos = [], 1
+    while pos < len(data):
+        (mode,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        length = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        entries.append({
+            "Name": data[pos:pos + length].decode(),
+            "Mode": mode,
+            "Hash": data[pos + length:pos + length + 32].hex()
+        })
+        pos += length + 32
+    return entries
+
+
+def put_trees(trees: List[List[Dict[str, Any]]]) -> List[str]:
+    """Store many trees (lists of {Name, Mode, Hash} entries) at once."""
+    if _repo is not None:
+        return _repo.put_trees(trees)
+    return _put_local(TREE, [encode_tree(entries) for entries in trees])
+
+
+def read_trees(hashes: List[str]) -> List[Optional[List[Dict[str, Any]]]]:
+    """Entries of many trees at once; None where a hash is missing or not a tree."""
+    if _repo is not None:
+        return _repo.read_trees(hashes)
+    objects = [_local_objects.get(h) for h in hashes]
+    return [decode_tree(obj[1]) if obj is not None and obj[0] == TREE else None for obj in objects]
+
+
+def open_object_store(path: str) -> bool:
+    """
+    Keep objects in the Go store's packfile under ``path``, so they outlive
+    the process.
+
+    Returns:
+        True if the packfile store is in use
+    """
+    if _repo is None:
+        print("⚠️ librepo.so is not built; objects stay in memory")
+        return False
+    try:
+        _repo.open_store(path)
+        return True
+    except OSError as e:
+        print(f"⚠️ Could not open object store at {path}: {e}")
+        return False
+
+
+def close_object_store():
+    """Flush and close the packfile opened by open_object_store."""
+    if _repo is not None:
+        _repo.close_store()
@@ -0,0 +1,201 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# The term itself counts this many times as much as a content token
+TERM_WEIGHT = 3
+# Score multipliers for query tokens expanded by prefix or typo matching
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 50
+MIN_FUZZY_LENGTH = 4
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into case-folded word tokens."""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.casefold())
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over word terms, latest content and commit messages.
+
+    Documents are scored with BM25. The last query token also matches as a
+    prefix, and tokens with no exact match are expanded to vocabulary tokens
+    one edit away. Documents are updated incrementally: the caller passes the
+    previously indexed fields so their postings can be removed without
+    keeping a per-document token list.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, int]] = {}  # token -> {word id: term frequency}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+        self._vocabulary: List[str] = []  # sorted, for prefix expansion
+        self._alphabet: Dict[str, int] = {}  # char -> number of vocabulary tokens using it
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @staticmethod
+    def _document_tokens(term: str, content: str, commit_msg: str) -> List[str]:
+        return tokenize(term) * TERM_WEIGHT + tokenize(content) + tokenize(commit_msg)
+
+    def add(self, word_id: int, term: str, content: str, commit_msg: str):
+        """Index a new word."""
+        tokens = self._document_tokens(term, content, commit_msg)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            docs = self.postings.get(token)
+            if docs is None:
+                docs = self.postings[token] = {}
+                self._add_vocabulary(token)
+            docs[word_id] = tf
+        self.doc_lengths[word_id] = len(tokens)
+        self.total_length += len(tokens)
+
+    def remove(self, word_id: int, term: str, content: str, commit_msg: str):
+        """Remove a word indexed with the given fields."""
+        if word_id not in self.doc_lengths:
+            return
+        for token in set(self._document_tokens(term, content, commit_msg)):
+            docs = self.postings.get(token)
+            if docs is None:
+                continue
+            docs.pop(word_id, None)
+            if not docs:
+                del self.postings[token]
+                self._remove_vocabulary(token)
+        self.total_length -= self.doc_lengths.pop(word_id)
+
+    def update(self, word_id: int, previous: Tuple[str, str, str], current: Tuple[str, str, str]):
+        """Re-index a word; ``previous`` and ``current`` are (term, content, commitMsg)."""
+        self.remove(word_id, *previous)
+        self.add(word_id, *current)
+
+    def rebuild(self, words: Iterable[Dict[str, Any]]):
+        """Index every word from scratch."""
+        self.__init__()
+        # Sort the vocabulary once at the end instead of insorting every token
+        self._vocabulary = None
+        for word in words:
+            latest = word["history"][-1]
+            self.add(word["id"], word["term"], latest["content"], latest["commitMsg"])
+        self._build_vocabulary()
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        prefix: bool = True,
+        fuzzy: bool = True
+    ) -> List[Tuple[int, float]]:
+        """
+        Rank words against a free-text query.
+
+        Returns:
+            Up to ``limit`` (word id, score) pairs, best first
+        """
+        tokens = tokenize(query)
+        if not tokens or not self.doc_lengths:
+            return []
+
+        # token -> weight; exact matches win over expansions of the same token
+        weights: Dict[str, float] = {}
+        for i, token in enumerate(tokens):
+            if token in self.postings:
+                weights[token] = max(weights.get(token, 0.0), 1.0)
+            elif fuzzy and len(token) >= MIN_FUZZY_LENGTH:
+                for candidate in self._edits1(token):
+                    if candidate in self.postings:
+                        weights[candidate] = max(weights.get(candidate, 0.0), FUZZY_WEIGHT)
+            if prefix and i == len(tokens) - 1:
+                for candidate in self._prefix_matches(token):
+                    weights[candidate] = max(weights.get(candidate, 0.0), PREFIX_WEIGHT)
+
+        n = len(self.doc_lengths)
+        avg_length = self.total_length / n
+        scores: Dict[int, float] = {}
+        for token, weight in weights.items():
+            docs = self.postings[token]
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for word_id, tf in docs.items():
+                norm = K1 * (1 - B + B * self.doc_lengths[word_id] / avg_length)
+                scores[word_id] = scores.get(word_id, 0.0) + weight * idf * tf * (K1 + 1) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def _prefix_matches(self, token: str) -> List[str]:
+        matches = []
+        i = bisect_left(self._vocabulary, token)
+        while i < len(self._vocabulary) and len(matches) < MAX_PREFIX_EXPANSIONS:
+            candidate = self._vocabulary[i]
+            if not candidate.startswith(token):
+                break
+            if candidate != token:
+                matches.append(candidate)
+            i += 1
+        return matches
+
+    def _edits1(self, token: str) -> set:
+        """All strings one insert, delete, replace or transpose away, over the indexed alphabet."""
+        splits = [(token[:i], token[i:]) for i in range(len(token) + 1)]
+        edits = {left + right[1:] for left, right in splits if right}
+        edits.update(left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1)
+        for char in self._alphabet:
+            edits.update(left + char + right[1:] for left, right in splits if right)
+            edits.update(left + char + right for left, right in splits)
+        edits.discard(token)
+        return edits
+
+    def _build_vocabulary(self):
+        self._vocabulary = sorted(self.postings)
+        self._alphabet = {}
+        for token in self._vocabulary:
+            for char in set(token):
+                self._alphabet[char] = self._alphabet.get(char, 0) + 1
+
+    def _add_vocabulary(self, token: str):
+        if self._vocabulary is None:
+            return
+        insort(self._vocabulary, token)
+        for char in set(token):
+            self._alphabet[char] = self._alphabet.get(char, 0) + 1
+
+    def _remove_vocabulary(self, token: str):
+        i = bisect_left(self._vocabulary, token)
+        if i < len(self._vocabulary) and self._vocabulary[i] == token:
+            del self._vocabulary[i]
+        for char in set(token):
+            self._alphabet[char] -= 1
+            if not self._alphabet[char]:
+                del self._alphabet[char]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the index for persistence."""
+        return {
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths,
+            "total_length": self.total_length
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchIndex":
+        """Restore an index saved with ``to_dict``."""
+        index = cls()
+        index.postings = data["postings"]
+        index.doc_lengths = data["doc_lengths"]
+        index.total_length = data["total_length"]
+        index._build_vocabulary()
+        return index
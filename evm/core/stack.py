@@ -1,5 +1,22 @@
+from typing import List, Tuple
+
 from evm.constants.limits import MAX_STACK_SIZE
 
+UINT_MAX = 2 ** 256 - 1
+
+
+class StackError(Exception):
+    pass
+
+
+class StackOverflow(StackError):
+    pass
+
+
+class StackUnderflow(StackError):
+    pass
+
+
 class Stack:
     def __init__(self):
         self.items = []
@@ -7,12 +24,12 @@ class Stack:
     def push(self, value):
         # EVM values must be within 256-bit range (0 to 2^256 - 1)
         if len(self.items) >= MAX_STACK_SIZE:
-            raise Exception("Stack overflow")
+            raise StackOverflow("Stack overflow")
         self.items.append(value)
 
     def pop(self):
         if len(self.items) == 0:
-            raise Exception("Stack underflow")
+            raise StackUnderflow("Stack underflow")
         return self.items.pop()
 
     def __str__(self):
@@ -23,3 +40,97 @@ class Stack:
             f"{val}{' <top' if i == 0 else ''}" 
             for i, val in enumerate(reversed(self.items))
         )
+
+
+class FastStack:
+    """
+    Fixed-capacity EVM stack for the interpreter loop.
+
+    All MAX_STACK_SIZE slots are allocated up front and ``size`` marks the
+    top, so push/pop never resize a list. Pushed values wrap modulo 2^256.
+    ``peek``, ``dup`` and ``swap`` take the EVM's 1-based depth (``dup(1)``
+    is DUP1) and work in place; ``pop2``/``pop3`` return the top values
+    first-popped first, saving a method call per operand.
+    """
+
+    __slots__ = ("slots", "size")
+
+    def __init__(self):
+        self.slots: List[int] = [0] * MAX_STACK_SIZE
+        self.size = 0
+
+    @property
+    def items(self) -> List[int]:
+        """Stack contents, bottom first (a copy)."""
+        return self.slots[:self.size]
+
+    def __len__(self):
+        return self.size
+
+    def push(self, value: int):
+        size = self.size
+        if size == MAX_STACK_SIZE:
+            raise StackOverflow("Stack overflow")
+        # Range check first: masking allocates a new int even when in range
+        self.slots[size] = value if 0 <= value <= UINT_MAX else value & UINT_MAX
+        self.size = size + 1
+
+    def pop(self) -> int:
+        size = self.size - 1
+        if size < 0:
+            raise StackUnderflow("Stack underflow")
+        self.size = size
+        return self.slots[size]
+
+    def pop2(self) -> Tuple[int, int]:
+        size = self.size - 2
+        if size < 0:
+            raise StackUnderflow("Stack underflow")
+        self.size = size
+        slots = self.slots
+        return slots[size + 1], slots[size]
+
+    def pop3(self) -> Tuple[int, int, int]:
+        size = self.size - 3
+        if size < 0:
+            raise StackUnderflow("Stack underflow")
+        self.size = size
+        slots = self.slots
+        return slots[size + 2], slots[size + 1], slots[size]
+
+    def pop_n(self, n: int) -> List[int]:
+        size = self.size - n
+        if size < 0:
+            raise StackUnderflow("Stack underflow")
+        self.size = size
+        return self.slots[size:size + n][::-1]
+
+    def peek(self, n: int = 1) -> int:
+        if n > self.size or n < 1:
+            raise StackUnderflow("Stack underflow")
+        return self.slots[self.size - n]
+
+    def dup(self, n: int):
+        size = self.size
+        if n > size:
+            raise StackUnderflow("Stack underflow")
+        if size == MAX_STACK_SIZE:
+            raise StackOverflow("Stack overflow")
+        slots = self.slots
+        slots[size] = slots[size - n]
+        self.size = size + 1
+
+    def swap(self, n: int):
+        top = self.size - 1
+        if n > top:
+            raise StackUnderflow("Stack underflow")
+        slots = self.slots
+        slots[top], slots[top - n] = slots[top - n], slots[top]
+
+    def __str__(self):
+        if not self.size:
+            return "<Empty Stack>"
+        return "\n".join(
+            f"{val}{' <top' if i == 0 else ''}"
+            for i, val in enumerate(reversed(self.items))
+        )
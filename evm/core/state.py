@@ -1,12 +1,27 @@
-from typing import Dict, List, Any
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, List, Any, Iterator, Optional, Set, Tuple
+import json
 import time
 
+from evm.core import dictionary_tree, history, objects
+from evm.core.blockchain_storage import StorageCorruptedError
+from evm.core.merkle import SparseMerkleTree, keccak256
+from evm.core.search import SearchIndex
+from evm.core.storage import JournaledStorage
+from evm.utils.helpers import encode_cursor, decode_cursor
+
+# Upper bound for prefix range scans over the sorted term index
+_MAX_CHAR = chr(0x10FFFF)
+# Types of the sort key each query_words plan (index) scans by
+_PLAN_KEYS = {"id": (int,), "term": (int,), "author": (int,), "prefix": (str, int), "time": (int, int)}
+
 class Account:
     def __init__(self, address: str, balance: int = 0):
         self.address = address
         self.balance = balance
         self.nonce = 0
-        self.storage: Dict[str, Any] = {} # Contract storage
+        self.storage: Dict[int, int] = {} # Contract storage, slot -> value
+        self.code = b""  # Runtime bytecode of deployed contracts
 
 class StateManager:
     def __init__(self):
@@ -16,17 +31,124 @@ class StateManager:
         self.dictionaries: Dict[int, Dict] = {}
         self.word_count = 0
         self.dictionary_count = 0
+        self._reset_indexes()
+        # Full-text index; stale after from_dict until restored or rebuilt
+        self.search_index = SearchIndex()
+        self.search_index_stale = False
+        # Contract slots, journaled for the interpreter
+        self.contract_storage = JournaledStorage(lambda address: self.get_account(f"0x{address:040x}").storage)
+        # (action, id) of operations applied inside open checkpoints
+        self._undo: List[Tuple[str, int]] = []
+        self._checkpoints = 0
+        # Blobs referenced by compacted word history (hash -> reference count)
+        self.history_objects: Dict[str, int] = {}
+        # Decoded contents of those blobs, so snapshots only fetch new ones
+        self._history_blobs: Dict[str, str] = {}
+        # Dictionary tree roots known to be in the object store
+        self._stored_trees: Set[str] = set()
+        # (kind, id) touched since pop_changes, once watch_changes is on
+        self._changes: Optional[Set[Tuple[str, Any]]] = None
+        self._changes_unknown = False
+        self._reset_state_tree()
+
+    def _reset_indexes(self):
+        # Secondary indexes, updated incrementally by add_word/update_word/
+        # create_dictionary. Terms and authors are matched case-insensitively.
+        self._word_meta: Dict[int, Tuple[str, str, int]] = {}  # id -> (term, owner, updated)
+        self._term_ids: Dict[str, List[int]] = {}
+        self._terms_sorted: List[Tuple[str, int]] = []
+        self._author_words: Dict[str, List[int]] = {}
+        self._updated_sorted: List[Tuple[int, int]] = []
+        self._author_dictionaries: Dict[str, List[int]] = {}
+
+    @staticmethod
+    def _index_key(value: Optional[str]) -> str:
+        return (value or "").casefold()
+
+    def _index_word(self, word_id: int, term: str, owner: str, updated: int):
+        term_key, owner_key = self._index_key(term), self._index_key(owner)
+        self._word_meta[word_id] = (term_key, owner_key, updated)
+        insort(self._term_ids.setdefault(term_key, []), word_id)
+        insort(self._terms_sorted, (term_key, word_id))
+        insort(self._author_words.setdefault(owner_key, []), word_id)
+        insort(self._updated_sorted, (updated, word_id))
+
+    def _reindex_word_time(self, word_id: int, updated: int):
+        term_key, owner_key, previous = self._word_meta[word_id]
+        if previous == updated:
+            return
+        del self._updated_sorted[bisect_left(self._updated_sorted, (previous, word_id))]
+        insort(self._updated_sorted, (updated, word_id))
+        self._word_meta[word_id] = (term_key, owner_key, updated)
+
+    def _unindex_word(self, word_id: int):
+        term_key, owner_key, updated = self._word_meta.pop(word_id)
+        self._remove_sorted(self._term_ids[term_key], word_id)
+        if not self._term_ids[term_key]:
+            del self._term_ids[term_key]
+        self._remove_sorted(self._terms_sorted, (term_key, word_id))
+        self._remove_sorted(self._author_words[owner_key], word_id)
+        if not self._author_words[owner_key]:
+            del self._author_words[owner_key]
+        self._remove_sorted(self._updated_sorted, (updated, word_id))
+
+    @staticmethod
+    def _remove_sorted(items: List, item: Any):
+        i = bisect_left(items, item)
+        if i < len(items) and items[i] == item:
+            del items[i]
+
+    def _rebuild_indexes(self):
+        """Build all indexes in one pass after loading a snapshot."""
+        self._reset_indexes()
+        # Binary snapshots carry the indexed fields, so records stay undecoded
+        summary = getattr(self.words, "summary", None)
+        for word_id in self.words:
+            fields = summary(word_id) if summary else None
+            if fields is None:
+                word = self.words[word_id]
+                fields = (word["term"], word["owner"], word["history"][-1]["timestamp"])
+            term_key, owner_key = self._index_key(fields[0]), self._index_key(fields[1])
+            self._word_meta[word_id] = (term_key, owner_key, fields[2])
+            self._term_ids.setdefault(term_key, []).append(word_id)
+            self._terms_sorted.append((term_key, word_id))
+            self._author_words.setdefault(owner_key, []).append(word_id)
+            self._updated_sorted.append((fields[2], word_id))
+        for ids in self._term_ids.values():
+            ids.sort()
+        for ids in self._author_words.values():
+            ids.sort()
+        self._terms_sorted.sort()
+        self._updated_sorted.sort()
+
+        summary = getattr(self.dictionaries, "summary", None)
+        for dict_id in self.dictionaries:
+            fields = summary(dict_id) if summary else None
+            author = fields[0] if fields else self.dictionaries[dict_id]["author"]
+            self._author_dictionaries.setdefault(self._index_key(author), []).append(dict_id)
+        for ids in self._author_dictionaries.values():
+            ids.sort()
 
     def get_account(self, address: str) -> Account:
         if address not in self.accounts:
             self.accounts[address] = Account(address)
+            self._touch("account", address)
         return self.accounts[address]
 
-    def add_word(self, term: str, content: str, commit_msg: str, author: str) -> int:
+    def touch_account(self, address: str):
+        """Mark an account's balance, nonce or code as changed (for the state root)."""
+        self._touch("account", address)
+
+    def touch_slot(self, address: str, slot: int):
+        """Mark a contract slot written outside contract_storage as changed."""
+        self._touch("slot", (address, slot))
+
+    def add_word(self, term: str, content: str, commit_msg: str, author: str, timestamp: int = None) -> int:
         self.word_count += 1
         word_id = self.word_count
         
-        timestamp = int(time.time())
+        if timestamp is None:
+            timestamp = int(time.time())
         version = {
             "content": content,
             "commitMsg": commit_msg,
@@ -41,13 +163,19 @@ class StateManager:
             "history": [version],
             "active": True
         }
+        self._index_word(word_id, term, author, timestamp)
+        self._touch("word", word_id)
+        self._record_undo("addWord", word_id)
+        if not self.search_index_stale:
+            self._update_search(self.search_index.add, word_id, term, content, commit_msg)
         return word_id
 
-    def update_word(self, word_id: int, content: str, commit_msg: str, author: str):
+    def update_word(self, word_id: int, content: str, commit_msg: str, author: str, timestamp: int = None):
         if word_id not in self.words:
             raise Exception("Word does not exist")
         
-        timestamp = int(time.time())
+        if timestamp is None:
+            timestamp = int(time.time())
         version = {
             "content": content,
             "commitMsg": commit_msg,
@@ -55,10 +183,30 @@ class StateManager:
             "author": author
         }
         
-        self.words[word_id]["history"].append(version)
+        word = self.words[word_id]
+        previous = word["history"][-1]
+        # Only the latest version keeps its content inline
+        index = len(word["history"]) - 1
+        entry = history.compact_version(previous, content, index)
+        word["history"][index] = entry
+        word["history"].append(version)
+        self._add_history_ref(history.object_ref(entry))
+        self._reindex_word_time(word_id, timestamp)
+        self._touch("word", word_id)
+        self._record_undo("updateWord", word_id)
+        if not self.search_index_stale:
+            self._update_search(
+                self.search_index.update,
+                word_id,
+                (word["term"], previous["content"], previous["commitMsg"]),
+                (word["term"], content, commit_msg)
+            )
 
-    def create_dictionary(self, title: str, word_ids: List[int], author: str) -> int:
+    def create_dictionary(self, title: str, word_ids: List[int], author: str, timestamp: int = None) -> int:
         # Business logic validation could happen here or in EVM execution
+        # Version of each word as published (0 for unknown words)
+        versions = [len(self.words[w]["history"]) if w in self.words else 0 for w in word_ids]
+        tree = self._build_dictionary_tree(word_ids, versions)
         self.dictionary_count += 1
         dict_id = self.dictionary_count
         
@@ -67,48 +215,660 @@ class StateManager:
             "title": title,
             "author": author,
             "wordIds": word_ids,
-            "timestamp": int(time.time())
+            "versions": versions,
+            "tree": tree,
+            "timestamp": timestamp if timestamp is not None else int(time.time())
         }
+        insort(self._author_dictionaries.setdefault(self._index_key(author), []), dict_id)
+        self._touch("dictionary", dict_id)
+        self._record_undo("createDictionary", dict_id)
         return dict_id
+
+    def _update_search(self, update, *args):
+        try:
+            update(*args)
+        except Exception:
+            # Possibly half-applied; rebuilt from the words on the next search
+            self.search_index_stale = True
+            raise
+
+    def _record_undo(self, action: str, target_id: int):
+        if self._checkpoints:
+            self._undo.append((action, target_id))
+
+    def checkpoint(self) -> int:
+        """
+        Open a checkpoint; word and dictionary changes made until it is
+        committed or reverted are journaled. Checkpoints nest.
+        """
+        self._checkpoints += 1
+        return len(self._undo)
+
+    def revert(self, checkpoint: int):
+        """Undo the changes made since ``checkpoint`` and close it."""
+        reverts = {
+            "addWord": self.revert_add_word,
+            "updateWord": self.revert_update_word,
+            "createDictionary": self.revert_create_dictionary
+        }
+        while len(self._undo) > checkpoint:
+            action, target_id = self._undo.pop()
+            reverts[action](target_id)
+        self.commit(checkpoint)
+
+    def commit(self, checkpoint: int):
+        """Keep the changes made since ``checkpoint`` and close it."""
+        self._checkpoints -= 1
+        if not self._checkpoints:
+            self._undo.clear()
+
+    def revert_add_word(self, word_id: int):
+        """Undo add_word; only the most recently added word can be reverted."""
+        if word_id != self.word_count or word_id not in self.words:
+            raise Exception("Only the latest word can be reverted")
+        word = self.words.pop(word_id)
+        self._unindex_word(word_id)
+        self._touch("word", word_id)
+        if not self.search_index_stale:
+            latest = word["history"][-1]
+            self.search_index.remove(word_id, word["term"], latest["content"], latest["commitMsg"])
+        self.word_count -= 1
+
+    def revert_update_word(self, word_id: int):
+        """Undo the latest update_word of a word."""
+        word = self.words.get(word_id)
+        if word is None or len(word["history"]) < 2:
+            raise Exception("No update to revert")
+        removed = word["history"].pop()
+        entry = word["history"][-1]
+        previous = history.expand_version(entry, removed["content"])
+        word["history"][-1] = previous
+        self._drop_history_ref(history.object_ref(entry))
+        self._reindex_word_time(word_id, previous["timestamp"])
+        self._touch("word", word_id)
+        if not self.search_index_stale:
+            self.search_index.update(
+                word_id,
+                (word["term"], removed["content"], removed["commitMsg"]),
+                (word["term"], previous["content"], previous["commitMsg"])
+            )
+
+    def revert_create_dictionary(self, dict_id: int):
+        """Undo create_dictionary; only the most recent dictionary can be reverted."""
+        if dict_id != self.dictionary_count or dict_id not in self.dictionaries:
+            raise Exception("Only the latest dictionary can be reverted")
+        dictionary = self.dictionaries.pop(dict_id)
+        author_key = self._index_key(dictionary["author"])
+        self._remove_sorted(self._author_dictionaries[author_key], dict_id)
+        if not self._author_dictionaries[author_key]:
+            del self._author_dictionaries[author_key]
+        self._touch("dictionary", dict_id)
+        self.dictionary_count -= 1
+
+    def _add_history_ref(self, hash_: Optional[str]):
+        if hash_ is not None:
+            self.history_objects[hash_] = self.history_objects.get(hash_, 0) + 1
+
+    def _drop_history_ref(self, hash_: Optional[str]):
+        if hash_ is None:
+            return
+        refs = self.history_objects.get(hash_, 0) - 1
+        if refs > 0:
+            self.history_objects[hash_] = refs
+        else:
+            self.history_objects.pop(hash_, None)
+            self._history_blobs.pop(hash_, None)
+
+    def word_history(self, word_id: int, start: int = 0, limit: Optional[int] = None) -> Optional[List[Dict]]:
+        """
+        Versions of a word with their content, oldest first (None if unknown).
+
+        Args:
+            word_id: ID of the word
+            start: Index of the first version
+            limit: Most versions returned; only their blobs are read
+        """
+        word = self.words.get(word_id)
+        if word is None:
+            return None
+        return history.materialize(word["history"], start, start + limit if limit is not None else None)
+
+    def history_page(self, word_id: int, cursor: Optional[str] = None, limit: int = 50) -> Optional[Tuple[List[Dict], Optional[str]]]:
+        """
+        One page of a word's versions, oldest first, each with its "index".
+
+        Returns:
+            Tuple of (versions, next_cursor), or None if the word is unknown
+        """
+        word = self.words.get(word_id)
+        if word is None:
+            return None
+        start = decode_cursor(cursor) or 0
+        if type(start) is not int or start < 0:
+            raise ValueError("Invalid cursor")
+        versions = history.materialize(word["history"], start, start + limit)
+        items = [{**version, "index": start + i} for i, version in enumerate(versions)]
+        next_cursor = encode_cursor(start + limit) if start + limit < len(word["history"]) else None
+        return items, next_cursor
+
+    @staticmethod
+    def word_summary(word: Dict) -> Dict:
+        """A word as listings return it: the latest version only, and the number of versions."""
+        return {
+            "id": word["id"],
+            "term": word["term"],
+            "owner": word["owner"],
+            "active": word["active"],
+            "versionCount": len(word["history"]),
+            "history": [word["history"][-1]]
+        }
+
+    def get_version(self, word_id: int, index: int) -> Optional[Dict]:
+        """
+        One version of a word with its content.
+
+        Args:
+            word_id: ID of the word
+            index: Position in the history; negative counts from the latest
+
+        Returns:
+            The version, or None if the word or version doesn't exist
+        """
+        word = self.words.get(word_id)
+        if word is None or not -len(word["history"]) <= index < len(word["history"]):
+            return None
+        index %= len(word["history"])
+        entry = word["history"][index]
+        version = {k: v for k, v in entry.items() if k not in ("delta", "blob")}
+        version["content"] = history.version_content(word["history"], index)
+        return version
+
+    # --- Dictionary releases ---
+    #
+    # Every dictionary is published with a Merkle tree of its terms in the
+    # object store (evm/core/dictionary_tree.py), so two releases are diffed
+    # by walking only the subtrees whose hashes differ.
+
+    def _build_dictionary_tree(self, word_ids: List[int], versions: List[Optional[int]]) -> str:
+        words_by_term: Dict[str, List[Tuple[int, Optional[int]]]] = {}
+        for word_id, version in zip(word_ids, versions):
+            word = self.words.get(word_id)
+            if word is not None:
+                words_by_term.setdefault(word["term"], []).append((word_id, version))
+        tree = dictionary_tree.build_tree({
+            term: dictionary_tree.encode_entry(sorted(words)) for term, words in words_by_term.items()
+        })
+        self._stored_trees.add(tree)
+        return tree
+
+    def dictionary_tree(self, dict_id: int) -> Optional[str]:
+        """
+        Root hash of a dictionary's term tree, rebuilt from its record if the
+        object store doesn't have it (an in-memory store after a restart).
+        """
+        dictionary = self.dictionaries.get(dict_id)
+        if dictionary is None:
+            return None
+        tree = dictionary.get("tree")
+        if tree in self._stored_trees:
+            return tree
+        if tree is None or objects.read_trees([tree])[0] is None:
+            # Dictionaries saved before trees existed don't know their versions
+            versions = dictionary.get("versions") or [None] * len(dictionary["wordIds"])
+            rebuilt = self._build_dictionary_tree(dictionary["wordIds"], versions)
+            if tree is not None and rebuilt != tree:
+                raise ValueError(f"Dictionary {dict_id} no longer matches its tree")
+            tree = rebuilt
+        self._stored_trees.add(tree)
+        return tree
+
+    def diff_dictionaries(self, old_id: int, new_id: int) -> Optional[Dict[str, Any]]:
+        """
+        What changed from one dictionary release to another, by term.
+
+        Identical subtrees are skipped by hash, so the cost grows with the
+        number of changed terms, not with the size of the dictionaries.
+
+        Returns:
+            {"added", "removed", "changed", "treesRead"}; terms list their
+            words as {"id", "version"}. None if either dictionary is unknown.
+        """
+        old_tree, new_tree = self.dictionary_tree(old_id), self.dictionary_tree(new_id)
+        if old_tree is None or new_tree is None:
+            return None
+        changed, reads = dictionary_tree.diff_trees(old_tree, new_tree)
+        refs = sorted({h for pair in changed.values() for h in pair if h is not None})
+        blobs = dict(zip(refs, objects.get_blobs(refs)))
+
+        def words(ref: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+            if ref is None:
+                return None
+            return [{"id": w, "version": v} for w, v in json.loads(blobs[ref])["words"]]
+
+        diff = {"from": old_id, "to": new_id, "added": [], "removed": [], "changed": [], "treesRead": reads}
+        for term in sorted(changed):
+            before, after = changed[term]
+            if before is None:
+                diff["added"].append({"term": term, "words": words(after)})
+            elif after is None:
+                diff["removed"].append({"term": term, "words": words(before)})
+            else:
+                diff["changed"].append({"term": term, "before": words(before), "after": words(after)})
+        return diff
+
+    def apply_record(self, record: Dict[str, Any]):
+        """Re-apply a journaled transaction record (see EVM._journal_record)."""
+        action = record.get("action")
+        if action == "addWord":
+            self.add_word(record["term"], record["content"], record["commitMsg"],
+                          record["sender"], record["timestamp"])
+        elif action == "updateWord":
+            self.update_word(int(record["wordId"]), record["content"], record["commitMsg"],
+                             record["sender"], record["timestamp"])
+        elif action == "createDictionary":
+            self.create_dictionary(record["title"], record["wordIds"],
+                                   record["sender"], record["timestamp"])
+        else:
+            raise Exception(f"Unknown journal action: {action}")
     
+    # --- Authenticated state ---
+    #
+    # Every word, dictionary, account and contract slot is a leaf of a sparse
+    # Merkle tree, keyed by keccak256("<kind>:<id>") (slots: "slot:<address>:<slot>").
+    # The tree is built on first use; after that mutations only mark their
+    # leaf dirty and state_root() rehashes the dirty paths, O(log n) each
+    # (nodes shared by several dirty paths are hashed once).
+
+    def _reset_state_tree(self):
+        self._state_tree: Optional[SparseMerkleTree] = None
+        self._state_dirty: Set[Tuple[str, Any]] = set()
+        self._state_labels: Dict[bytes, Tuple[str, Any]] = {}
+
+    def _touch(self, kind: str, ident: Any):
+        if self._state_tree is not None:
+            self._state_dirty.add((kind, ident))
+        if self._changes is not None:
+            self._changes.add((kind, ident))
+
+    def watch_changes(self):
+        """Start recording the (kind, id) of every mutation, for pop_changes."""
+        if self._changes is None:
+            self._changes = set()
+
+    def pop_changes(self) -> Optional[Set[Tuple[str, Any]]]:
+        """
+        (kind, id) of the words, dictionaries, accounts and slots changed
+        since the last call (reverted changes included).
+
+        Returns:
+            The changes, or None if they are unknown (the state was reloaded)
+        """
+        if self._changes is None:
+            return set()
+        changes, self._changes = self._changes, set()
+        if self._changes_unknown:
+            self._changes_unknown = False
+            return None
+        return changes
+
+    @staticmethod
+    def state_key(kind: str, ident: Any) -> bytes:
+        if kind == "slot":
+            address, slot = ident
+            return keccak256(f"slot:{address}:{slot:#x}".encode())
+        return keccak256(f"{kind}:{ident}".encode())
+
+    @staticmethod
+    def record_hash(record: Dict[str, Any]) -> bytes:
+        """Leaf value of a word or dictionary: keccak256 of its canonical JSON."""
+        return keccak256(json.dumps(record, sort_keys=True, separators=(",", ":")).encode())
+
+    def _leaf_value(self, kind: str, ident: Any) -> Optional[bytes]:
+        if kind == "word":
+            record = self.words.get(ident)
+            return self.record_hash(record) if record is not None else None
+        if kind == "dictionary":
+            record = self.dictionaries.get(ident)
+            return self.record_hash(record) if record is not None else None
+        if kind == "account":
+            account = self.accounts.get(ident)
+            if account is None:
+                return None
+            return self.record_hash({
+                "balance": account.balance,
+                "nonce": account.nonce,
+                "codeHash": keccak256(account.code).hex()
+            })
+        address, slot = ident
+        account = self.accounts.get(address)
+        value = account.storage.get(slot, 0) if account is not None else 0
+        return value.to_bytes(32, "big") if value else None
+
+    def _sync_state_tree(self) -> SparseMerkleTree:
+        """Bring the state tree up to date and return it."""
+        if self._state_tree is None:
+            entries = [("word", i) for i in self.words]
+            entries.extend(("dictionary", i) for i in self.dictionaries)
+            entries.extend(("account", a) for a in self.accounts)
+            entries.extend(
+                ("slot", (address, slot))
+                for address, account in self.accounts.items() for slot in account.storage
+            )
+            leaves = {}
+            for kind, ident in entries:
+                key = self.state_key(kind, ident)
+                leaves[key] = self._leaf_value(kind, ident)
+                self._state_labels[key] = (kind, ident)
+            self._state_tree = SparseMerkleTree.from_items(leaves)
+            self._state_dirty = set()
+            self.contract_storage.take_dirty()
+        for address, slots in self.contract_storage.take_dirty().items():
+            self._state_dirty.update(("slot", (f"0x{address:040x}", slot)) for slot in slots)
+
+        updates = {}
+        for kind, ident in self._state_dirty:
+            key = self.state_key(kind, ident)
+            value = updates[key] = self._leaf_value(kind, ident)
+            if value is None:
+                self._state_labels.pop(key, None)
+            else:
+                self._state_labels[key] = (kind, ident)
+        self._state_tree.update_many(updates)
+        self._state_dirty = set()
+        return self._state_tree
+
+    def state_root(self) -> str:
+        return "0x" + self._sync_state_tree().root_hash.hex()
+
+    def prove_word(self, word_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Inclusion proof of a word against the current state root.
+
+        Returns:
+            stateRoot, key, valueHash, siblings (root first) and the stored
+            record; SparseMerkleTree.verify(stateRoot, key, record_hash(record),
+            siblings) checks it. None if the word does not exist
+        """
+        tree = self._sync_state_tree()
+        key = self.state_key("word", word_id)
+        siblings = tree.prove(key)
+        if siblings is None:
+            return None
+        return {
+            "stateRoot": "0x" + tree.root_hash.hex(),
+            "key": "0x" + key.hex(),
+            "valueHash": "0x" + tree.get(key).hex(),
+            "siblings": ["0x" + sibling.hex() for sibling in siblings],
+            "record": self.words[word_id]
+        }
+
+    def state_node(self, path: str = "") -> Dict[str, Any]:
+        """
+        Summary of the state subtree at ``path`` (see SparseMerkleTree.node);
+        a leaf also carries the "kind" and "id" of its entry.
+        """
+        summary: Dict[str, Any] = self._sync_state_tree().node(path)
+        if summary["type"] == "leaf":
+            kind, ident = self._state_labels[bytes.fromhex(summary["key"][2:])]
+            summary.update(kind=kind, id=list(ident) if kind == "slot" else ident)
+        return summary
+
+    def diff_state(self, fetch: Callable[[str], Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Entries that differ from another replica, compared by subtree hashes.
+
+        Args:
+            fetch: The other replica's state_node (or a call to its
+                /api/chain/state/node endpoint)
+
+        Returns:
+            {"kind", "id", "key"} per differing entry; kind and id are None
+            for entries neither replica could label
+        """
+        remote_labels: Dict[bytes, Tuple[str, Any]] = {}
+
+        def fetch_labelled(path: str) -> Dict[str, Any]:
+            summary = fetch(path)
+            if summary["type"] == "leaf" and summary.get("kind") is not None:
+                kind, ident = summary["kind"], summary["id"]
+                ident = tuple(ident) if kind == "slot" else ident
+                key = bytes.fromhex(summary["key"][2:])
+                # Only trust a peer's label if it hashes to the leaf's key
+                try:
+                    if self.state_key(kind, ident) == key:
+                        remote_labels[key] = (kind, ident)
+                except (TypeError, ValueError):
+                    pass
+            return summary
+
+        keys = self._sync_state_tree().diff(fetch_labelled)
+        diffs = []
+        for key in sorted(keys):
+            kind, ident = self._state_labels.get(key) or remote_labels.get(key) or (None, None)
+            diffs.append({"kind": kind, "id": list(ident) if kind == "slot" else ident, "key": "0x" + key.hex()})
+        return diffs
+
     def get_all_words(self) -> List[Dict]:
-        return list(self.words.values())
+        """Summaries (word_summary) of every word."""
+        return [self.word_summary(word) for word in self.words.values()]
 
     def get_all_dictionaries(self) -> List[Dict]:
         return list(self.dictionaries.values())
+
+    def search_words(self, query: str, limit: int = 20, prefix: bool = True, fuzzy: bool = True) -> List[Dict]:
+        """
+        Full-text search over term, latest content and latest commit message.
+
+        Returns:
+            Summaries (word_summary) of the matching words, best first, each
+            with an added "score"
+        """
+        if self.search_index_stale:
+            self.search_index.rebuild(self.words.values())
+            self.search_index_stale = False
+        return [
+            {**self.word_summary(self.words[word_id]), "score": round(score, 4)}
+            for word_id, score in self.search_index.search(query, limit, prefix, fuzzy)
+        ]
+
+    def query_words(
+        self,
+        term: Optional[str] = None,
+        prefix: Optional[str] = None,
+        author: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Return one page of words matching all given filters.
+
+        ``term`` matches the whole term and ``prefix`` its beginning (both
+        case-insensitive), ``author`` matches the owner, and ``since``/``until``
+        bound the time of the latest version. The page is read from the most
+        selective index, so its cost depends on the page size, not the corpus.
+        The cursor names that index, and later pages are read from it too.
+
+        Returns:
+            Tuple of (word summaries, next_cursor); next_cursor is None on the
+            last page
+
+        Raises:
+            ValueError: If ``cursor`` is malformed or from a query with other filters
+        """
+        term_key = self._index_key(term) if term is not None else None
+        prefix_key = self._index_key(prefix) if prefix is not None else None
+        author_key = self._index_key(author) if author is not None else None
+
+        # Plan name -> (candidate count, scan from a cursor position) per usable index
+        plans = {"id": (self.word_count, lambda after: self._scan_ids(self.word_count, after))}
+        if term_key is not None:
+            term_ids = self._term_ids.get(term_key, [])
+            plans["term"] = (len(term_ids), lambda after: self._scan_sorted(term_ids, after, 0, len(term_ids)))
+        if author_key is not None:
+            author_ids = self._author_words.get(author_key, [])
+            plans["author"] = (len(author_ids), lambda after: self._scan_sorted(author_ids, after, 0, len(author_ids)))
+        if prefix_key is not None:
+            p_lo = bisect_left(self._terms_sorted, (prefix_key,))
+            p_hi = bisect_left(self._terms_sorted, (prefix_key + _MAX_CHAR,))
+            plans["prefix"] = (p_hi - p_lo, lambda after: self._scan_sorted(self._terms_sorted, after, p_lo, p_hi))
+        if since is not None or until is not None:
+            t_lo = bisect_left(self._updated_sorted, (since,)) if since is not None else 0
+            t_hi = bisect_right(self._updated_sorted, (until, float("inf"))) if until is not None else len(self._updated_sorted)
+            plans["time"] = (t_hi - t_lo, lambda after: self._scan_sorted(self._updated_sorted, after, t_lo, t_hi))
+
+        # Later pages keep scanning the index the first page was read from,
+        # even if another one has become more selective since
+        if not cursor:
+            plan, after = min(plans, key=lambda name: plans[name][0]), None
+        else:
+            plan, after = self._decode_plan_cursor(cursor, plans)
+        candidates = plans[plan][1](after)
+
+        def matches(word_id: int) -> bool:
+            meta = self._word_meta.get(word_id)
+            if meta is None:
+                return False
+            w_term, w_owner, w_updated = meta
+            return ((term_key is None or w_term == term_key)
+                    and (prefix_key is None or w_term.startswith(prefix_key))
+                    and (author_key is None or w_owner == author_key)
+                    and (since is None or w_updated >= since)
+                    and (until is None or w_updated <= until))
+
+        items, next_cursor = self._paginate(candidates, matches, self.words, limit, plan)
+        return [self.word_summary(word) for word in items], next_cursor
+
+    @staticmethod
+    def _decode_plan_cursor(cursor: str, plans: Dict[str, Any]) -> Tuple[str, Any]:
+        """
+        The (plan, sort key) of a query_words cursor.
+
+        Raises:
+            ValueError: If the cursor is malformed or from a query with other filters
+        """
+        decoded = decode_cursor(cursor)
+        if not isinstance(decoded, list) or len(decoded) != 2 or decoded[0] not in plans:
+            raise ValueError("Invalid cursor for these filters")
+        plan, after = decoded
+        values = after if isinstance(after, list) else [after]
+        if [type(value) for value in values] != list(_PLAN_KEYS[plan]):
+            raise ValueError("Invalid cursor for these filters")
+        return plan, after
+
+    def query_dictionaries(
+        self,
+        author: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Return one page of dictionaries, optionally only those by ``author``."""
+        after = decode_cursor(cursor)
+        if after is not None and type(after) is not int:
+            raise ValueError("Invalid cursor")
+        if author is not None:
+            ids = self._author_dictionaries.get(self._index_key(author), [])
+            candidates = self._scan_sorted(ids, after, 0, len(ids))
+        else:
+            candidates = self._scan_ids(self.dictionary_count, after)
+        return self._paginate(candidates, lambda d: d in self.dictionaries, self.dictionaries, limit)
+
+    @staticmethod
+    def _scan_ids(count: int, after: Any) -> Iterator[Tuple[Any, int]]:
+        start = int(after) + 1 if after is not None else 1
+        for record_id in range(start, count + 1):
+            yield record_id, record_id
+
+    @staticmethod
+    def _scan_sorted(keys: List, after: Any, lo: int, hi: int) -> Iterator[Tuple[Any, int]]:
+        """Yield (sort key, id) from keys[lo:hi] past the cursor position."""
+        if after is not None:
+            after = tuple(after) if isinstance(after, list) else after
+            lo = max(lo, bisect_right(keys, after, lo, hi))
+        for i in range(lo, hi):
+            key = keys[i]
+            yield key, key[-1] if isinstance(key, tuple) else key
+
+    @staticmethod
+    def _paginate(candidates, matches, records, limit: int, plan: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        items = []
+        last_key = None
+        for key, record_id in candidates:
+            if not matches(record_id):
+                continue
+            if len(items) == limit:
+                return items, encode_cursor([plan, last_key] if plan else last_key)
+            items.append(records[record_id])
+            last_key = key
+        return items, None
     
+    def _history_blob_texts(self) -> Dict[str, str]:
+        # Only blobs referenced since the last snapshot or load are read from the store
+        missing = [hash_ for hash_ in self.history_objects if hash_ not in self._history_blobs]
+        for hash_, blob in zip(missing, objects.get_blobs(missing)):
+            if blob is None:
+                raise StorageCorruptedError(f"History object {hash_} is missing from the object store")
+            self._history_blobs[hash_] = blob.decode()
+        return self._history_blobs
+
     def to_dict(self) -> Dict[str, Any]:
         """Serialize state to dictionary for persistence."""
+        blobs = self._history_blob_texts()
         return {
             "words": self.words,
             "dictionaries": self.dictionaries,
             "word_count": self.word_count,
             "dictionary_count": self.dictionary_count,
+            # Delta and keyframe blobs of word history, with their reference counts
+            "history_objects": {
+                hash_: [blobs[hash_], refs] for hash_, refs in self.history_objects.items()
+            },
             "accounts": {addr: {
                 "address": acc.address,
                 "balance": acc.balance,
                 "nonce": acc.nonce,
-                "storage": acc.storage
+                # 256-bit slots and values don't fit JSON/msgpack integers
+                "storage": {hex(k): hex(v) for k, v in acc.storage.items()},
+                "code": acc.code.hex()
             } for addr, acc in self.accounts.items()}
         }
     
     def from_dict(self, data: Dict[str, Any]):
         """Load state from dictionary."""
         self.words = data.get("words", {})
-        # Convert string keys back to int for words
-        self.words = {int(k): v for k, v in self.words.items()}
+        # Convert string keys back to int for words (JSON snapshots); lazily
+        # decoded maps from the binary format are already keyed by int
+        if isinstance(self.words, dict):
+            self.words = {int(k): v for k, v in self.words.items()}
         
         self.dictionaries = data.get("dictionaries", {})
         # Convert string keys back to int for dictionaries
-        self.dictionaries = {int(k): v for k, v in self.dictionaries.items()}
+        if isinstance(self.dictionaries, dict):
+            self.dictionaries = {int(k): v for k, v in self.dictionaries.items()}
         
         self.word_count = data.get("word_count", 0)
         self.dictionary_count = data.get("dictionary_count", 0)
+
+        saved = data.get("history_objects", {})
+        stored = objects.put_blobs([blob.encode() for blob, _ in saved.values()])
+        if stored != list(saved):
+            raise ValueError("Corrupt history objects in snapshot")
+        self.history_objects = {hash_: refs for hash_, (_, refs) in saved.items()}
+        self._history_blobs = {hash_: blob for hash_, (blob, _) in saved.items()}
         
         # Restore accounts
         accounts_data = data.get("accounts", {})
         for addr, acc_data in accounts_data.items():
             acc = Account(addr, acc_data.get("balance", 0))
             acc.nonce = acc_data.get("nonce", 0)
-            acc.storage = acc_data.get("storage", {})
+            acc.storage = {int(k, 16): int(v, 16) for k, v in acc_data.get("storage", {}).items()}
+            acc.code = bytes.fromhex(acc_data.get("code", ""))
             self.accounts[addr] = acc
+        
+        self._rebuild_indexes()
+        self._reset_state_tree()
+        self._changes_unknown = self._changes is not None
+        # Rebuilt on first search unless the caller restores a saved index
+        self.search_index = SearchIndex()
+        self.search_index_stale = True
@@ -0,0 +1,138 @@
+from typing import Callable, Dict, List, Set, Tuple
+
+# Journal entry kinds
+_SLOT = 0
+_WARM_SLOT = 1
+_WARM_ACCOUNT = 2
+
+
+class JournaledStorage:
+    """
+    Contract storage with a change journal.
+
+    Every write records the slot's previous value, so ``checkpoint()`` is
+    just the journal length and ``revert()`` undoes entries back to it:
+    both are independent of how much storage the contracts hold. Nested call
+    frames take nested checkpoints. Warm slots and accounts (EIP-2929) are
+    journaled too, since a reverted frame's accesses become cold again.
+
+    Slots live in the per-contract dicts returned by ``get_slots`` (the
+    accounts' ``storage``), keyed by int address. ``finish_transaction()``
+    collects the slots a transaction changed and adds them to ``dirty``.
+    """
+
+    def __init__(self, get_slots: Callable[[int], Dict[int, int]]):
+        self._get_slots = get_slots
+        self._slots: Dict[int, Dict[int, int]] = {}
+        self._journal: List[Tuple] = []
+        # Slot values at the start of the transaction, for SSTORE pricing
+        self._originals: Dict[Tuple[int, int], int] = {}
+        self.warm_slots: Set[Tuple[int, int]] = set()
+        self.warm_accounts: Set[int] = set()
+        # address -> slots changed by finished transactions
+        self.dirty: Dict[int, Set[int]] = {}
+
+    @classmethod
+    def for_slots(cls, address: int, slots: Dict[int, int]) -> "JournaledStorage":
+        """Journal a single contract's storage dict."""
+        return cls(lambda a: slots if a == address else {})
+
+    def slots(self, address: int) -> Dict[int, int]:
+        slots = self._slots.get(address)
+        if slots is None:
+            slots = self._slots[address] = self._get_slots(address)
+        return slots
+
+    def get(self, address: int, slot: int) -> int:
+        return self.slots(address).get(slot, 0)
+
+    def set(self, address: int, slot: int, value: int):
+        slots = self.slots(address)
+        previous = slots.get(slot, 0)
+        self._originals.setdefault((address, slot), previous)
+        self._journal.append((_SLOT, address, slot, previous))
+        if value:
+            slots[slot] = value
+        else:
+            slots.pop(slot, None)
+
+    def original(self, address: int, slot: int) -> int:
+        """Value of the slot when the current transaction started."""
+        key = (address, slot)
+        if key in self._originals:
+            return self._originals[key]
+        return self.get(address, slot)
+
+    def access_slot(self, address: int, slot: int) -> bool:
+        """Mark a slot warm; returns whether it already was."""
+        key = (address, slot)
+        if key in self.warm_slots:
+            return True
+        self.warm_slots.add(key)
+        self._journal.append((_WARM_SLOT, key))
+        return False
+
+    def access_account(self, address: int) -> bool:
+        """Mark an account warm; returns whether it already was."""
+        if address in self.warm_accounts:
+            return True
+        self.warm_accounts.add(address)
+        self._journal.append((_WARM_ACCOUNT, address))
+        return False
+
+    def checkpoint(self) -> int:
+        return len(self._journal)
+
+    def revert(self, checkpoint: int):
+        """Undo every change made since ``checkpoint``."""
+        journal = self._journal
+        while len(journal) > checkpoint:
+            entry = journal.pop()
+            kind = entry[0]
+            if kind == _SLOT:
+                _, address, slot, previous = entry
+                slots = self.slots(address)
+                if previous:
+                    slots[slot] = previous
+                else:
+                    slots.pop(slot, None)
+            elif kind == _WARM_SLOT:
+                self.warm_slots.discard(entry[1])
+            else:
+                self.warm_accounts.discard(entry[1])
+
+    def begin_transaction(self):
+        """Start a transaction: empty journal, everything cold."""
+        self._journal.clear()
+        self._originals.clear()
+        self.warm_slots.clear()
+        self.warm_accounts.clear()
+        # Accounts may have been reloaded since the last transaction
+        self._slots.clear()
+
+    def finish_transaction(self) -> Dict[int, Dict[int, int]]:
+        """
+        End a transaction, keeping its changes.
+
+        Returns:
+            The slots it changed with their final values (0 = cleared),
+            as {address: {slot: value}}; they are also added to ``dirty``
+        """
+        writes: Dict[int, Dict[int, int]] = {}
+        for entry in self._journal:
+            if entry[0] == _SLOT:
+                _, address, slot, _ = entry
+                writes.setdefault(address, {})[slot] = 0
+        for address, slots in writes.items():
+            current = self.slots(address)
+            for slot in slots:
+                slots[slot] = current.get(slot, 0)
+            self.dirty.setdefault(address, set()).update(slots)
+        self._journal.clear()
+        self._originals.clear()
+        return writes
+
+    def take_dirty(self) -> Dict[int, Set[int]]:
+        """Return and reset the slots changed since the last call."""
+        dirty, self.dirty = self.dirty, {}
+        return dirty
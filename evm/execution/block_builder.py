@@ -0,0 +1,132 @@
+"""
+Block production for the fallback EVM.
+
+Writes go to a Mempool and a background thread seals them into blocks:
+every ``block_interval`` seconds, or as soon as ``block_size`` transactions
+are waiting. Each block is executed under one lock acquisition and
+persisted with one journal append and one fsync (EVM.execute_block), so
+write throughput is bounded by block batching rather than by a journal
+round trip per transaction.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from evm.core.mempool import Mempool, PendingTransaction
+from evm.execution.evm import EVM
+from evm.execution.parallel import ParallelExecutor
+
+
+class BlockBuilder:
+    def __init__(
+        self,
+        evm: EVM,
+        block_interval: float = 0.05,
+        block_size: int = 500,
+        mempool: Optional[Mempool] = None,
+        executor: Optional[ParallelExecutor] = None
+    ):
+        self.evm = evm
+        self.block_interval = block_interval
+        self.block_size = block_size
+        self.mempool = mempool or Mempool()
+        # Speculative parallel execution of contract calls, if given
+        self.executor = executor
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the block production thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="digitionary-block-builder", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread after sealing whatever is still pending."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        while len(self.mempool):
+            self.build_block()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def submit(self, sender: str, data: Dict[str, Any]) -> PendingTransaction:
+        """
+        Queue a transaction for the next block.
+
+        Returns:
+            Handle to poll with ``get`` or await through ``tx.future``
+
+        Raises:
+            MempoolFull: If the mempool is at capacity
+        """
+        tx = self.mempool.add(sender, data)
+        pending = len(self.mempool)
+        # The first transaction starts the block timer; a full block goes out at once
+        if pending == 1 or pending >= self.block_size:
+            self._wake.set()
+        return tx
+
+    def get(self, tx_id: str) -> Optional[PendingTransaction]:
+        return self.mempool.get(tx_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self.mempool),
+            "block_number": self.evm.block_number,
+            "block_interval": self.block_interval,
+            "block_size": self.block_size,
+            "parallel": self.executor.stats() if self.executor is not None else None
+        }
+
+    def build_block(self) -> Optional[dict]:
+        """
+        Seal up to ``block_size`` pending transactions into a block now.
+
+        Returns:
+            The block header, or None if no transaction succeeded
+        """
+        txs = self.mempool.pop_batch(self.block_size)
+        if not txs:
+            return None
+        try:
+            results, header = (self.executor or self.evm).execute_block([(tx.sender, tx.data) for tx in txs])
+        except Exception as e:
+            results, header = [{"success": False, "error": str(e)}] * len(txs), None
+        self._finish(txs, results)
+        return header
+
+    def _finish(self, txs: List[PendingTransaction], results: List[dict]):
+        for tx, result in zip(txs, results):
+            tx.result = {k: v for k, v in result.items() if k not in ("success", "block_number", "block_hash")}
+            tx.block_number = result.get("block_number")
+            tx.block_hash = result.get("block_hash")
+            tx.status = "confirmed" if result.get("success") else "failed"
+            if not tx.future.done():
+                tx.future.set_result(tx.to_dict())
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not len(self.mempool):
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            # Collect transactions for one interval, unless the block fills up first
+            deadline = time.time() + self.block_interval
+            while len(self.mempool) < self.block_size and not self._stop.is_set():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._wake.wait(remaining)
+                self._wake.clear()
+            try:
+                self.build_block()
+            except Exception as e:
+                print(f"⚠️ Block builder error: {e}")
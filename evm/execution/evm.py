@@ -1,11 +1,37 @@
 from evm.core.state import StateManager
 from evm.core.blockchain_storage import BlockchainStorage
+from evm.core.merkle import SparseMerkleTree, EMPTY_HASH, keccak256
+from evm.core.search import SearchIndex
+from evm.core import gas as G
+from evm.execution.interpreter import Interpreter, ExecutionContext, DEFAULT_GAS_LIMIT, contract_address
+from collections import deque
 import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# Transactions that run bytecode instead of the built-in Digitionary logic
+CONTRACT_ACTIONS = ("deployContract", "callContract")
+# Journal record closing the transactions of a block
+SEAL_BLOCK = "sealBlock"
+# Block headers kept in memory and in snapshots
+MAX_RECENT_BLOCKS = 1024
 
 class EVM:
-    def __init__(self):
+    def __init__(self, storage: BlockchainStorage = None):
         self.state = StateManager()
-        self.storage = BlockchainStorage()
+        # Journal mode: one appended record per transaction, periodic snapshots
+        self.storage = storage if storage is not None else BlockchainStorage(journal=True)
+        # Guards state mutation and journal order; fsync happens outside it
+        self._lock = threading.RLock()
+        self._last_seq = 0
+        # Journal records collected by execute_batch, None outside a batch
+        self._batch_records = None
+        self.interpreter = Interpreter()
+        self.block_number = 0
+        self.blocks: deque = deque(maxlen=MAX_RECENT_BLOCKS)
+        # Called with StateManager.pop_changes() after each write
+        self._listeners: List[Callable[[Optional[Set[Tuple[str, Any]]]], None]] = []
         # Load existing blockchain state if available
         self._load_state()
 
@@ -13,7 +39,161 @@ class EVM:
         """
         Executes a transaction logic based on the 'data' payload.
         Simulates function calls to the Digitionary contract.
+
+        Safe to call from several threads: transactions are applied one at a
+        time, then each caller waits for its journal record to be fsynced.
+        Concurrent callers share a single fsync (group commit).
+        """
+        with self._lock:
+            self._last_seq = 0
+            result = self._apply_transaction(sender, data)
+            seq = self._last_seq
+            changes = self.state.pop_changes() if self._listeners else None
+        if seq and not self.storage.sync(seq):
+            print("Warning: Failed to sync blockchain journal")
+        self._notify(changes)
+        return result
+
+    def add_listener(self, listener: Callable[[Optional[Set[Tuple[str, Any]]]], None]):
+        """
+        Call ``listener`` after every transaction, batch or block with the
+        (kind, id) of what it changed (None: unknown, assume everything).
+        """
+        with self._lock:
+            self.state.watch_changes()
+            self._listeners.append(listener)
+
+    def _notify(self, changes: Optional[Set[Tuple[str, Any]]]):
+        if not self._listeners or changes == set():
+            return
+        for listener in self._listeners:
+            try:
+                listener(changes)
+            except Exception as e:
+                print(f"Warning: State change listener failed: {e}")
+
+    def execute_batch(self, sender: str, transactions: List[dict]) -> List[dict]:
+        """
+        Executes many transactions with a single persistence commit.
+
+        All transactions are applied under one lock acquisition, their journal
+        records are written with one append and fsynced once (or the state is
+        saved once, without a journal). A failing transaction does not stop
+        the others.
+
+        Returns:
+            One result per transaction, as execute_transaction would return
+        """
+        results, _ = self._execute_many([(sender, data) for data in transactions], seal=False)
+        return results
+
+    def execute_block(
+        self,
+        transactions: List[Tuple[str, dict]],
+        timestamp: Optional[int] = None,
+        speculations: Optional[list] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        """
+        Executes (sender, data) transactions as one block.
+
+        Like execute_batch, but the transactions share the block timestamp,
+        and the successful ones are sealed into a block whose header (number,
+        parent hash, state root, tx root) is journaled with them.
+
+        Args:
+            transactions: (sender, data) pairs, in block order
+            timestamp: Block timestamp, instead of the current time
+            speculations: Per transaction, a Speculation from
+                ParallelExecutor (or None); it is used instead of running the
+                code if the values it read are still current
+
+        Returns:
+            One result per transaction (successful ones carry block_number and
+            block_hash), and the block header, or None if none succeeded
         """
+        return self._execute_many(transactions, seal=True, timestamp=timestamp, speculations=speculations)
+
+    def _execute_many(
+        self,
+        transactions: List[Tuple[str, dict]],
+        seal: bool,
+        timestamp: Optional[int] = None,
+        speculations: Optional[list] = None
+    ) -> Tuple[List[dict], Optional[dict]]:
+        header = None
+        speculations = speculations or [None] * len(transactions)
+        with self._lock:
+            timestamp = timestamp or int(time.time())
+            self._batch_records = []
+            try:
+                results = []
+                for (sender, data), speculation in zip(transactions, speculations):
+                    if seal:
+                        data = {**data, "timestamp": timestamp}
+                    results.append(self._apply_transaction(sender, data, speculation))
+                records = self._batch_records
+            finally:
+                self._batch_records = None
+            if seal and records:
+                header = self._seal_block(records, timestamp)
+                records.append({"action": SEAL_BLOCK, "header": header})
+                for result in results:
+                    if result.get("success"):
+                        result.update({"block_number": header["number"], "block_hash": header["hash"]})
+            self._last_seq = 0
+            if records:
+                self._persist_batch(records)
+            seq = self._last_seq
+            changes = self.state.pop_changes() if self._listeners else None
+        if seq and not self.storage.sync(seq):
+            print("Warning: Failed to sync blockchain journal")
+        self._notify(changes)
+        return results, header
+
+    def _seal_block(self, records: List[dict], timestamp: int) -> dict:
+        """Build the header of a block holding ``records`` and make it the chain head."""
+        # The tx root commits to the journal records, keyed by position in the block
+        tx_tree = SparseMerkleTree.from_items({
+            keccak256(i.to_bytes(32, "big")): StateManager.record_hash(record)
+            for i, record in enumerate(records)
+        })
+        header = {
+            "number": self.block_number + 1,
+            "parentHash": self.blocks[-1]["hash"] if self.blocks else "0x" + EMPTY_HASH.hex(),
+            "timestamp": timestamp,
+            "stateRoot": self.state.state_root(),
+            "txRoot": "0x" + tx_tree.root_hash.hex(),
+            "txCount": len(records)
+        }
+        header["hash"] = "0x" + StateManager.record_hash(header).hex()
+        self._add_block(header)
+        return header
+
+    def _add_block(self, header: dict):
+        self.blocks.append(header)
+        self.block_number = header["number"]
+
+    def get_block(self, number: int) -> Optional[dict]:
+        """Header of block ``number``, if it is one of the last MAX_RECENT_BLOCKS."""
+        with self._lock:
+            if not self.blocks or not self.blocks[0]["number"] <= number <= self.block_number:
+                return None
+            return self.blocks[number - self.blocks[0]["number"]]
+
+    def _apply_transaction(self, sender: str, data: dict, speculation=None):
+        """Apply one transaction atomically: a failed transaction leaves no changes."""
+        checkpoint = self.state.checkpoint()
+        try:
+            result = self._dispatch_transaction(sender, data, speculation)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        if result.get("success"):
+            self.state.commit(checkpoint)
+        else:
+            self.state.revert(checkpoint)
+        return result
+
+    def _dispatch_transaction(self, sender: str, data: dict, speculation=None):
         action = data.get("action")
         
         if action == "addWord":
@@ -23,8 +203,8 @@ class EVM:
             if not term or not content:
                 return {"success": False, "error": "Missing inputs"}
                 
-            word_id = self.state.add_word(term, content, commit_msg, sender)
-            self._save_state()  # Persist after transaction
+            word_id = self.state.add_word(term, content, commit_msg, sender, data.get("timestamp"))
+            self._persist(self._journal_record(sender, data, word_id))
             return {"success": True, "wordId": word_id}
 
         elif action == "updateWord":
@@ -32,8 +212,8 @@ class EVM:
             content = data.get("content")
             commit_msg = data.get("commitMsg")
             try:
-                self.state.update_word(int(word_id), content, commit_msg, sender)
-                self._save_state()  # Persist after transaction
+                self.state.update_word(int(word_id), content, commit_msg, sender, data.get("timestamp"))
+                self._persist(self._journal_record(sender, data, int(word_id)))
                 return {"success": True, "wordId": word_id}
             except Exception as e:
                 return {"success": False, "error": str(e)}
@@ -52,35 +232,320 @@ class EVM:
             # if len(word_ids) < 100:
             #    return {"success": False, "error": "Need 100 words to publish"}
 
-            dict_id = self.state.create_dictionary(title, word_ids, sender)
-            self._save_state()  # Persist after transaction
+            dict_id = self.state.create_dictionary(title, word_ids, sender, data.get("timestamp"))
+            self._persist(self._journal_record(sender, data, dict_id))
             return {"success": True, "dictionaryId": dict_id}
 
+        elif action in CONTRACT_ACTIONS:
+            return self._apply_contract(sender, data, speculation=speculation)
+
         else:
             return {"success": False, "error": "Unknown action"}
 
+    def call_contract(self, sender: str, address: str, data: bytes, gas: int = DEFAULT_GAS_LIMIT) -> dict:
+        """
+        Run a deployed contract without committing anything (like eth_call).
+
+        Returns:
+            Result dict with success, output (hex), gasUsed and logs
+        """
+        with self._lock:
+            return self._apply_contract(sender, {
+                "action": "callContract", "address": address, "data": data.hex(), "gas": gas
+            }, commit=False)
+
+    def speculation_job(self, sender: str, data: dict, timestamp: int) -> Optional[dict]:
+        """
+        Inputs for running a callContract transaction ahead of its block
+        (see evm.execution.parallel); None for other transactions.
+
+        The job names the contract instead of carrying its state; the state
+        the block's calls may read comes from speculation_view.
+        """
+        if data.get("action") != "callContract":
+            return None
+        with self._lock:
+            target = self.state.accounts.get(str(data.get("address", "")).lower())
+            if target is None or not target.code:
+                return None
+            try:
+                caller = int(sender, 16)
+                calldata = bytes.fromhex(str(data.get("data", "")).removeprefix("0x"))
+            except (TypeError, ValueError):
+                return None
+            gas = int(data.get("gas", DEFAULT_GAS_LIMIT))
+            return {
+                "code": target.code,
+                "calldata": calldata,
+                "gas": gas - G.intrinsic_gas(calldata, create=False),
+                "gas_limit": gas,
+                "caller": caller,
+                "address": int(target.address, 16),
+                "timestamp": timestamp
+            }
+
+    def speculation_view(self, jobs: List[Optional[dict]]) -> Tuple[Dict[int, Dict[int, int]], Dict[int, int]]:
+        """
+        The state the speculation jobs of a block may read: the live storage
+        dict of every contract they call, and the balances of their callers
+        and contracts. Its size depends on the block, not on the state.
+
+        Returns:
+            (storage by contract address, balance by address)
+        """
+        storage: Dict[int, Dict[int, int]] = {}
+        balances: Dict[int, int] = {}
+        with self._lock:
+            for job in jobs:
+                if job is None:
+                    continue
+                for address in (job["caller"], job["address"]):
+                    account = self.state.accounts.get(f"0x{address:040x}")
+                    if account is not None:
+                        balances[address] = account.balance
+                        if address == job["address"]:
+                            storage[address] = account.storage
+                    else:
+                        balances[address] = 0
+        return storage, balances
+
+    def _apply_contract(self, sender: str, data: dict, commit: bool = True, replay: bool = False,
+                        speculation=None) -> dict:
+        """
+        Execute a deployContract/callContract transaction on the interpreter.
+
+        deployContract runs ``data`` as init code and stores the returned
+        runtime code at the CREATE address of the sender; callContract runs
+        the code at ``address`` with ``data`` as calldata. Storage writes go
+        through the state's journaled contract storage and are kept only if
+        execution succeeds; the journal record carries just the changed slots.
+        """
+        action = data.get("action")
+        deploy = action == "deployContract"
+        try:
+            caller = int(sender, 16)
+            payload = bytes.fromhex(str(data.get("data", "")).removeprefix("0x"))
+        except (TypeError, ValueError):
+            return {"success": False, "error": "Invalid sender or data"}
+
+        gas = int(data.get("gas", DEFAULT_GAS_LIMIT))
+        execution_gas = gas - G.intrinsic_gas(payload, create=deploy)
+        if execution_gas < 0:
+            return {"success": False, "error": "Intrinsic gas too low"}
+
+        if deploy:
+            sender_account = self.state.get_account(sender)
+            address = contract_address(caller, sender_account.nonce)
+            target_address = f"0x{address:040x}"
+            created = target_address not in self.state.accounts
+            target = self.state.get_account(target_address)
+            code, calldata = payload, b""
+        else:
+            target = self.state.accounts.get(str(data.get("address", "")).lower())
+            if target is None or not target.code:
+                return {"success": False, "error": "No contract at address"}
+            address = int(target.address, 16)
+            code, calldata = target.code, payload
+
+        timestamp = data.get("timestamp") or int(time.time())
+        context = ExecutionContext(
+            origin=caller,
+            timestamp=timestamp,
+            gas_limit=gas,
+            get_balance=lambda a: getattr(self.state.accounts.get(f"0x{a:040x}"), "balance", 0)
+        )
+        storage = self.state.contract_storage
+        storage.begin_transaction()
+        storage.access_account(caller)
+        storage.access_account(address)
+        if speculation is not None and speculation.is_valid(self.state):
+            result = speculation.apply(storage)
+        else:
+            result = self.interpreter.execute(code, calldata, execution_gas, storage, caller, address, 0, context)
+        gas_used = gas - result.gas_left
+        error = None
+        if not result.success:
+            error = {"success": False, "error": result.error, "output": "0x" + result.output.hex(), "gasUsed": gas_used}
+        elif deploy and result.gas_left < G.G_CODE_DEPOSIT * len(result.output):
+            error = {"success": False, "error": "Out of gas for code deposit", "gasUsed": gas}
+        if error or not commit:
+            storage.revert(0)
+            storage.finish_transaction()
+            if deploy and created:
+                del self.state.accounts[target.address]
+            if error:
+                return error
+        else:
+            writes = storage.finish_transaction()
+            if deploy:
+                target.code = result.output
+                sender_account.nonce += 1
+                self.state.touch_account(target.address)
+                self.state.touch_account(sender)
+            if not replay:
+                record = {"action": action, "sender": sender, "data": payload.hex(), "gas": gas, "timestamp": timestamp}
+                if deploy:
+                    record["code"] = result.output.hex()
+                else:
+                    record["address"] = target.address
+                # Only the slots this transaction changed
+                record["writes"] = {
+                    f"0x{a:040x}": {hex(slot): hex(value) for slot, value in slots.items()}
+                    for a, slots in writes.items()
+                }
+                self._persist(record)
+
+        response = {
+            "success": True,
+            "gasUsed": gas_used,
+            "logs": [{
+                "address": f"0x{log['address']:040x}",
+                "topics": [f"0x{topic:064x}" for topic in log["topics"]],
+                "data": "0x" + log["data"].hex()
+            } for log in result.logs]
+        }
+        if deploy:
+            response["address"] = target.address
+        else:
+            response["output"] = "0x" + result.output.hex()
+        return response
+
+    def _replay_contract_writes(self, record: dict):
+        """Apply a contract transaction's recorded effects without executing it."""
+        if record["action"] == "deployContract":
+            sender = self.state.get_account(record["sender"])
+            address = contract_address(int(record["sender"], 16), sender.nonce)
+            self.state.get_account(f"0x{address:040x}").code = bytes.fromhex(record["code"])
+            sender.nonce += 1
+            self.state.touch_account(f"0x{address:040x}")
+            self.state.touch_account(record["sender"])
+        for address, slots in record["writes"].items():
+            storage = self.state.get_account(address).storage
+            for slot, value in slots.items():
+                if int(value, 16):
+                    storage[int(slot, 16)] = int(value, 16)
+                else:
+                    storage.pop(int(slot, 16), None)
+                self.state.touch_slot(address, int(slot, 16))
+
     def get_state(self):
         return self.state
-    
+
+    def read_state(self, read: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run read(state, ...) under the state lock, so it never sees a
+        transaction or block half applied (e.g. StateManager.query_words).
+        """
+        with self._lock:
+            return read(self.state, *args, **kwargs)
+
     def _load_state(self):
         """Load blockchain state from persistent storage."""
         saved_data = self.storage.load_state()
         if saved_data:
             self.state.from_dict(saved_data)
+            for header in saved_data.get("blocks", []):
+                self._add_block(header)
+            self._load_search_index(saved_data.get("journal_seq", 0))
+        
+        if self.storage.journal_enabled:
+            records = self.storage.load_journal(saved_data.get("journal_seq", 0))
+            for record in records:
+                if record.get("action") == SEAL_BLOCK:
+                    self._add_block(record["header"])
+                elif record.get("action") in CONTRACT_ACTIONS and "writes" in record:
+                    self._replay_contract_writes(record)
+                elif record.get("action") in CONTRACT_ACTIONS:
+                    # Journaled before slot writes were recorded; re-execute
+                    self._apply_contract(record["sender"], record, replay=True)
+                else:
+                    self.state.apply_record(record)
+            if records:
+                print(f"Replayed {len(records)} journaled transactions")
+        
+        if saved_data or self.state.word_count or self.state.dictionary_count:
             print(f"Loaded blockchain state: {self.state.word_count} words, {self.state.dictionary_count} dictionaries")
     
+    def _load_search_index(self, journal_seq: int):
+        """Restore the persisted search index if it matches the snapshot."""
+        data = self.storage.load_index("search", journal_seq)
+        if data and data.get("word_count") == self.state.word_count:
+            self.state.search_index = SearchIndex.from_dict(data)
+            self.state.search_index_stale = False
+    
+    def _journal_record(self, sender: str, data: dict, target_id: int) -> dict:
+        """Build the replayable journal record for an applied transaction."""
+        action = data.get("action")
+        record = {"action": action, "sender": sender}
+        if action == "createDictionary":
+            d = self.state.dictionaries[target_id]
+            record.update({"title": d["title"], "wordIds": d["wordIds"], "timestamp": d["timestamp"]})
+        else:
+            word = self.state.words[target_id]
+            version = word["history"][-1]
+            record.update({
+                "wordId": target_id,
+                "content": version["content"],
+                "commitMsg": version["commitMsg"],
+                "timestamp": version["timestamp"]
+            })
+            if action == "addWord":
+                record["term"] = word["term"]
+        return record
+    
+    def _persist(self, record: dict):
+        """Persist a transaction: append to the journal, or rewrite the full state."""
+        if self._batch_records is not None:
+            # Inside execute_batch; committed together at the end
+            self._batch_records.append(record)
+            return
+        self._persist_batch([record])
+
+    def _persist_batch(self, records: List[dict]):
+        if not self.storage.journal_enabled:
+            self._save_state()
+            return
+        seq = self.storage.append_transactions(records)
+        if not seq:
+            print("Warning: Failed to journal blockchain transaction, writing full snapshot")
+            self._save_state()
+        elif self.storage.should_snapshot():
+            self._save_state()
+        else:
+            self._last_seq = seq
+    
     def _save_state(self):
         """Save blockchain state to persistent storage."""
-        state_data = self.state.to_dict()
+        state_data = {**self.state.to_dict(), "blocks": list(self.blocks)}
         success = self.storage.save_state(state_data)
         if not success:
             print("Warning: Failed to save blockchain state")
+        elif self.storage.journal_enabled and not self.state.search_index_stale:
+            # Saved with each compaction so startup can skip the rebuild
+            self.storage.save_index("search", {
+                **self.state.search_index.to_dict(),
+                "word_count": self.state.word_count
+            })
     
+    def get_state_root(self) -> str:
+        """Root hash over all words, dictionaries, accounts and contract storage."""
+        with self._lock:
+            return self.state.state_root()
+
+    def prove_word(self, word_id: int) -> Optional[dict]:
+        with self._lock:
+            return self.state.prove_word(word_id)
+
+    def get_state_node(self, path: str = "") -> dict:
+        with self._lock:
+            return self.state.state_node(path)
+
     def get_blockchain_stats(self):
         """Get current blockchain statistics."""
         return {
             "total_words": self.state.word_count,
             "total_dictionaries": self.state.dictionary_count,
             "total_accounts": len(self.state.accounts),
+            "block_number": self.block_number,
             "status": "connected"
         }
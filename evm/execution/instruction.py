@@ -0,0 +1,516 @@
+"""
+Opcode implementations and the precomputed dispatch table.
+
+Each instruction is a function of the executing ``Frame`` (see
+``evm.execution.interpreter``). The interpreter charges the static gas from
+``evm.constants.opcodes.OPCODES`` and advances ``frame.pc`` past the opcode
+before calling it; instructions charge their own dynamic gas and move
+``frame.pc`` further for PUSH immediates and jumps. The frame's stack is a
+``FastStack``, which wraps pushed values modulo 2^256, so arithmetic results
+are pushed unmasked.
+"""
+
+from typing import Callable, List, Tuple
+
+from Cryptodome.Hash import keccak
+
+from evm.constants import opcodes as op
+from evm.core import gas as G
+
+UINT_MAX = 2 ** 256 - 1
+ADDRESS_MASK = 2 ** 160 - 1
+SIGN_BIT = 2 ** 255
+
+
+class InvalidOpcode(Exception):
+    pass
+
+
+class InvalidJump(Exception):
+    pass
+
+
+def keccak256(data: bytes) -> bytes:
+    return keccak.new(digest_bits=256, data=data).digest()
+
+
+def to_signed(value: int) -> int:
+    return value - 2 ** 256 if value & SIGN_BIT else value
+
+
+def _pad(data: bytes, offset: int, size: int) -> bytes:
+    """``data[offset:offset + size]``, zero-padded on the right to ``size``."""
+    chunk = data[offset:offset + size] if offset < len(data) else b""
+    return chunk + bytes(size - len(chunk))
+
+
+# Stop and arithmetic
+
+def op_stop(f):
+    f.running = False
+
+
+def op_add(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(a + b)
+
+
+def op_mul(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(a * b)
+
+
+def op_sub(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(a - b)
+
+
+def op_div(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(a // b if b else 0)
+
+
+def op_sdiv(f):
+    s = f.stack
+    a, b = s.pop2()
+    a, b = to_signed(a), to_signed(b)
+    if b == 0:
+        s.push(0)
+        return
+    quotient = abs(a) // abs(b)
+    s.push(-quotient if (a < 0) != (b < 0) else quotient)
+
+
+def op_mod(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(a % b if b else 0)
+
+
+def op_smod(f):
+    s = f.stack
+    a, b = s.pop2()
+    a, b = to_signed(a), to_signed(b)
+    if b == 0:
+        s.push(0)
+        return
+    remainder = abs(a) % abs(b)
+    s.push(-remainder if a < 0 else remainder)
+
+
+def op_addmod(f):
+    s = f.stack
+    a, b, n = s.pop3()
+    s.push((a + b) % n if n else 0)
+
+
+def op_mulmod(f):
+    s = f.stack
+    a, b, n = s.pop3()
+    s.push((a * b) % n if n else 0)
+
+
+def op_exp(f):
+    s = f.stack
+    base, exponent = s.pop2()
+    if exponent:
+        f.use_gas(G.G_EXP_BYTE * ((exponent.bit_length() + 7) // 8))
+    s.push(pow(base, exponent, 2 ** 256))
+
+
+def op_signextend(f):
+    s = f.stack
+    b, x = s.pop2()
+    if b < 31:
+        sign_bit = 1 << (b * 8 + 7)
+        x = x | (2 ** 256 - sign_bit) if x & sign_bit else x & (sign_bit - 1)
+    s.push(x)
+
+
+# Comparison and bitwise logic
+
+def op_lt(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(1 if a < b else 0)
+
+
+def op_gt(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(1 if a > b else 0)
+
+
+def op_slt(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(1 if to_signed(a) < to_signed(b) else 0)
+
+
+def op_sgt(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(1 if to_signed(a) > to_signed(b) else 0)
+
+
+def op_eq(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(1 if a == b else 0)
+
+
+def op_iszero(f):
+    s = f.stack
+    s.push(0 if s.pop() else 1)
+
+
+def op_and(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(a & b)
+
+
+def op_or(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(a | b)
+
+
+def op_xor(f):
+    s = f.stack
+    a, b = s.pop2()
+    s.push(a ^ b)
+
+
+def op_not(f):
+    s = f.stack
+    s.push(UINT_MAX ^ s.pop())
+
+
+def op_byte(f):
+    s = f.stack
+    i, x = s.pop2()
+    s.push((x >> (248 - i * 8)) & 0xFF if i < 32 else 0)
+
+
+def op_shl(f):
+    s = f.stack
+    shift, value = s.pop2()
+    s.push(value << shift if shift < 256 else 0)
+
+
+def op_shr(f):
+    s = f.stack
+    shift, value = s.pop2()
+    s.push(value >> shift if shift < 256 else 0)
+
+
+def op_sar(f):
+    s = f.stack
+    shift, value = s.pop2()
+    s.push(to_signed(value) >> min(shift, 256))
+
+
+def op_sha3(f):
+    s = f.stack
+    offset, size = s.pop2()
+    f.use_gas(G.G_SHA3_WORD * G.to_words(size))
+    f.expand_memory(offset, size)
+    s.push(int.from_bytes(keccak256(f.memory.view(offset, size)), "big"))
+
+
+# Execution environment
+
+def op_address(f):
+    f.stack.push(f.address)
+
+
+def op_balance(f):
+    address = f.stack.pop() & ADDRESS_MASK
+    f.use_gas(G.G_WARM_ACCESS if f.storage.access_account(address) else G.G_COLD_ACCOUNT_ACCESS)
+    f.stack.push(f.context.get_balance(address))
+
+
+def op_origin(f):
+    f.stack.push(f.context.origin)
+
+
+def op_caller(f):
+    f.stack.push(f.caller)
+
+
+def op_callvalue(f):
+    f.stack.push(f.value)
+
+
+def op_calldataload(f):
+    f.stack.push(int.from_bytes(_pad(f.calldata, f.stack.pop(), 32), "big"))
+
+
+def op_calldatasize(f):
+    f.stack.push(len(f.calldata))
+
+
+def _copy_to_memory(f, source: bytes):
+    s = f.stack
+    mem_offset, offset, size = s.pop3()
+    f.use_gas(G.G_COPY * G.to_words(size))
+    f.expand_memory(mem_offset, size)
+    if size:
+        f.memory.copy_from(mem_offset, source, offset, size)
+
+
+def op_calldatacopy(f):
+    _copy_to_memory(f, f.calldata)
+
+
+def op_codesize(f):
+    f.stack.push(len(f.code))
+
+
+def op_codecopy(f):
+    _copy_to_memory(f, f.code)
+
+
+def op_gasprice(f):
+    f.stack.push(f.context.gas_price)
+
+
+def op_returndatasize(f):
+    f.stack.push(len(f.return_data))
+
+
+def op_returndatacopy(f):
+    s = f.stack
+    mem_offset, offset, size = s.pop3()
+    if offset + size > len(f.return_data):
+        raise InvalidOpcode("Return data out of bounds")
+    f.use_gas(G.G_COPY * G.to_words(size))
+    f.expand_memory(mem_offset, size)
+    if size:
+        f.memory.copy_from(mem_offset, f.return_data, offset, size)
+
+
+# Block information
+
+def op_coinbase(f):
+    f.stack.push(f.context.coinbase)
+
+
+def op_timestamp(f):
+    f.stack.push(f.context.timestamp)
+
+
+def op_number(f):
+    f.stack.push(f.context.number)
+
+
+def op_prevrandao(f):
+    f.stack.push(f.context.prevrandao)
+
+
+def op_gaslimit(f):
+    f.stack.push(f.context.gas_limit)
+
+
+def op_chainid(f):
+    f.stack.push(f.context.chain_id)
+
+
+def op_selfbalance(f):
+    f.stack.push(f.context.get_balance(f.address))
+
+
+def op_basefee(f):
+    f.stack.push(f.context.base_fee)
+
+
+# Stack, memory, storage and flow
+
+def op_pop(f):
+    f.stack.pop()
+
+
+def op_mload(f):
+    offset = f.stack.pop()
+    f.expand_memory(offset, 32)
+    f.stack.push(f.memory.read_word(offset))
+
+
+def op_mstore(f):
+    s = f.stack
+    offset, value = s.pop2()
+    f.expand_memory(offset, 32)
+    f.memory.write_word(offset, value)
+
+
+def op_mstore8(f):
+    s = f.stack
+    offset, value = s.pop2()
+    f.expand_memory(offset, 1)
+    f.memory.write_byte(offset, value)
+
+
+def op_sload(f):
+    key = f.stack.pop()
+    storage = f.storage
+    f.use_gas(G.G_WARM_ACCESS if storage.access_slot(f.address, key) else G.G_COLD_SLOAD)
+    f.stack.push(storage.get(f.address, key))
+
+
+def op_sstore(f):
+    key, value = f.stack.pop2()
+    if f.gas <= G.G_CALL_STIPEND:
+        raise G.OutOfGas("SSTORE with no more than the call stipend left")
+    storage = f.storage
+    address = f.address
+    # EIP-2929 cold surcharge plus EIP-2200 net metering (without refunds)
+    cost = 0 if storage.access_slot(address, key) else G.G_COLD_SLOAD
+    current = storage.get(address, key)
+    if value != current and storage.original(address, key) == current:
+        cost += G.G_SSTORE_SET if current == 0 else G.G_SSTORE_RESET
+    else:
+        cost += G.G_WARM_ACCESS
+    f.use_gas(cost)
+    if value != current:
+        storage.set(address, key, value)
+
+
+def op_jump(f):
+    dest = f.stack.pop()
+    if dest not in f.jumpdests:
+        raise InvalidJump(f"Invalid jump destination {dest}")
+    f.pc = dest
+
+
+def op_jumpi(f):
+    s = f.stack
+    dest, condition = s.pop2()
+    if condition:
+        if dest not in f.jumpdests:
+            raise InvalidJump(f"Invalid jump destination {dest}")
+        f.pc = dest
+
+
+def op_pc(f):
+    f.stack.push(f.pc - 1)
+
+
+def op_msize(f):
+    f.stack.push(f.memory.size)
+
+
+def op_gas(f):
+    f.stack.push(f.gas)
+
+
+def op_jumpdest(f):
+    pass
+
+
+def op_push0(f):
+    f.stack.push(0)
+
+
+def make_push(size: int) -> Callable:
+    def op_push(f):
+        pc = f.pc
+        # Immediates are decoded once per code hash by analyze_code
+        f.stack.push(f.immediates[pc - 1])
+        f.pc = pc + size
+    return op_push
+
+
+def make_dup(depth: int) -> Callable:
+    def op_dup(f):
+        f.stack.dup(depth)
+    return op_dup
+
+
+def make_swap(depth: int) -> Callable:
+    def op_swap(f):
+        f.stack.swap(depth)
+    return op_swap
+
+
+def make_log(topic_count: int) -> Callable:
+    def op_log(f):
+        s = f.stack
+        offset, size = s.pop2()
+        topics = s.pop_n(topic_count) if topic_count else []
+        f.use_gas(G.G_LOG_DATA * size)
+        f.expand_memory(offset, size)
+        f.logs.append({"address": f.address, "topics": topics, "data": f.memory.read(offset, size)})
+    return op_log
+
+
+# System operations
+
+def op_return(f):
+    s = f.stack
+    offset, size = s.pop2()
+    f.expand_memory(offset, size)
+    f.output = f.memory.read(offset, size)
+    f.running = False
+
+
+def op_revert(f):
+    op_return(f)
+    f.reverted = True
+
+
+def op_invalid(f):
+    raise InvalidOpcode("INVALID opcode")
+
+
+def make_undefined(opcode: int) -> Callable:
+    def op_undefined(f):
+        raise InvalidOpcode(f"Unsupported opcode 0x{opcode:02x}")
+    return op_undefined
+
+
+HANDLERS = {
+    op.STOP: op_stop, op.ADD: op_add, op.MUL: op_mul, op.SUB: op_sub, op.DIV: op_div,
+    op.SDIV: op_sdiv, op.MOD: op_mod, op.SMOD: op_smod, op.ADDMOD: op_addmod,
+    op.MULMOD: op_mulmod, op.EXP: op_exp, op.SIGNEXTEND: op_signextend,
+    op.LT: op_lt, op.GT: op_gt, op.SLT: op_slt, op.SGT: op_sgt, op.EQ: op_eq,
+    op.ISZERO: op_iszero, op.AND: op_and, op.OR: op_or, op.XOR: op_xor, op.NOT: op_not,
+    op.BYTE: op_byte, op.SHL: op_shl, op.SHR: op_shr, op.SAR: op_sar, op.SHA3: op_sha3,
+    op.ADDRESS: op_address, op.BALANCE: op_balance, op.ORIGIN: op_origin,
+    op.CALLER: op_caller, op.CALLVALUE: op_callvalue, op.CALLDATALOAD: op_calldataload,
+    op.CALLDATASIZE: op_calldatasize, op.CALLDATACOPY: op_calldatacopy,
+    op.CODESIZE: op_codesize, op.CODECOPY: op_codecopy, op.GASPRICE: op_gasprice,
+    op.RETURNDATASIZE: op_returndatasize, op.RETURNDATACOPY: op_returndatacopy,
+    op.COINBASE: op_coinbase, op.TIMESTAMP: op_timestamp, op.NUMBER: op_number,
+    op.PREVRANDAO: op_prevrandao, op.GASLIMIT: op_gaslimit, op.CHAINID: op_chainid,
+    op.SELFBALANCE: op_selfbalance, op.BASEFEE: op_basefee,
+    op.POP: op_pop, op.MLOAD: op_mload, op.MSTORE: op_mstore, op.MSTORE8: op_mstore8,
+    op.SLOAD: op_sload, op.SSTORE: op_sstore, op.JUMP: op_jump, op.JUMPI: op_jumpi,
+    op.PC: op_pc, op.MSIZE: op_msize, op.GAS: op_gas, op.JUMPDEST: op_jumpdest,
+    op.PUSH0: op_push0, op.RETURN: op_return, op.REVERT: op_revert, op.INVALID: op_invalid,
+}
+for _n in range(1, 33):
+    HANDLERS[op.PUSH1 + _n - 1] = make_push(_n)
+for _n in range(1, 17):
+    HANDLERS[op.DUP1 + _n - 1] = make_dup(_n)
+    HANDLERS[op.SWAP1 + _n - 1] = make_swap(_n)
+for _n in range(5):
+    HANDLERS[op.LOG0 + _n] = make_log(_n)
+
+
+def build_dispatch_table() -> List[Tuple[Callable, int]]:
+    """(handler, static gas) for every byte value, indexed by opcode."""
+    table = []
+    for opcode in range(256):
+        if opcode in op.OPCODES:
+            table.append((HANDLERS[opcode], op.OPCODES[opcode][1]))
+        else:
+            table.append((make_undefined(opcode), 0))
+    return table
+
+
+DISPATCH_TABLE = build_dispatch_table()
@@ -0,0 +1,224 @@
+"""
+Gas-metered EVM bytecode interpreter.
+
+Runs a single message call against journaled contract storage
+(``evm.core.storage.JournaledStorage``) or a plain slot -> value dict. Calls into other contracts and CREATE are not supported; everything
+Solidity emits for a self-contained contract is (arithmetic, memory,
+storage, keccak, events, calldata, block context, RETURN/REVERT).
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, List, Any, Optional, Union
+
+from evm.constants import opcodes as op
+from evm.core import gas as G
+from evm.core.memory import Memory
+from evm.core.stack import FastStack
+from evm.core.storage import JournaledStorage
+from evm.execution.instruction import DISPATCH_TABLE, keccak256
+
+DEFAULT_GAS_LIMIT = 30000000
+# Analyses kept for recently executed code hashes
+ANALYSIS_CACHE_SIZE = 256
+
+
+class CodeAnalysis:
+    """Valid jump destinations and decoded PUSH immediates of one code blob."""
+
+    def __init__(self, code: bytes):
+        self.jumpdests = set()
+        self.immediates: Dict[int, int] = {}
+        pc = 0
+        while pc < len(code):
+            opcode = code[pc]
+            if opcode == op.JUMPDEST:
+                self.jumpdests.add(pc)
+            size = op.push_size(opcode)
+            if size:
+                # Truncated trailing immediates read as zero-padded
+                data = code[pc + 1:pc + 1 + size]
+                self.immediates[pc] = int.from_bytes(data + bytes(size - len(data)), "big")
+            pc += 1 + size
+
+
+_analysis_cache: "OrderedDict[bytes, CodeAnalysis]" = OrderedDict()
+
+
+def analyze_code(code: bytes) -> CodeAnalysis:
+    """JUMPDEST analysis for ``code``, cached per code hash."""
+    code_hash = keccak256(code)
+    analysis = _analysis_cache.get(code_hash)
+    if analysis is None:
+        analysis = CodeAnalysis(code)
+        _analysis_cache[code_hash] = analysis
+        if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    else:
+        _analysis_cache.move_to_end(code_hash)
+    return analysis
+
+
+def contract_address(sender: int, nonce: int) -> int:
+    """CREATE address: keccak256(rlp([sender, nonce]))[12:]."""
+    if nonce == 0:
+        encoded_nonce = b"\x80"
+    elif nonce < 0x80:
+        encoded_nonce = bytes([nonce])
+    else:
+        raw = nonce.to_bytes((nonce.bit_length() + 7) // 8, "big")
+        encoded_nonce = bytes([0x80 + len(raw)]) + raw
+    payload = b"\x94" + sender.to_bytes(20, "big") + encoded_nonce
+    return int.from_bytes(keccak256(bytes([0xC0 + len(payload)]) + payload)[12:], "big")
+
+
+class ExecutionContext:
+    """Transaction and block values visible to the code."""
+
+    def __init__(
+        self,
+        origin: int = 0,
+        gas_price: int = 0,
+        coinbase: int = 0,
+        timestamp: int = 0,
+        number: int = 0,
+        prevrandao: int = 0,
+        gas_limit: int = DEFAULT_GAS_LIMIT,
+        chain_id: int = 31337,
+        base_fee: int = 0,
+        get_balance: Optional[Callable[[int], int]] = None
+    ):
+        self.origin = origin
+        self.gas_price = gas_price
+        self.coinbase = coinbase
+        self.timestamp = timestamp
+        self.number = number
+        self.prevrandao = prevrandao
+        self.gas_limit = gas_limit
+        self.chain_id = chain_id
+        self.base_fee = base_fee
+        self.get_balance = get_balance or (lambda address: 0)
+
+
+class Frame:
+    """Mutable state of one executing message call."""
+
+    __slots__ = (
+        "code", "jumpdests", "immediates", "pc", "gas", "stack", "memory", "storage",
+        "calldata", "caller", "address", "value", "context", "return_data",
+        "output", "logs", "running", "reverted"
+    )
+
+    def __init__(self, code: bytes, gas: int, storage: JournaledStorage, calldata: bytes,
+                 caller: int, address: int, value: int, context: ExecutionContext):
+        analysis = analyze_code(code)
+        self.code = code
+        self.jumpdests = analysis.jumpdests
+        self.immediates = analysis.immediates
+        self.pc = 0
+        self.gas = gas
+        self.stack = FastStack()
+        self.memory = Memory()
+        self.storage = storage
+        self.calldata = calldata
+        self.caller = caller
+        self.address = address
+        self.value = value
+        self.context = context
+        self.return_data = b""
+        self.output = b""
+        self.logs: List[Dict[str, Any]] = []
+        self.running = True
+        self.reverted = False
+
+    def use_gas(self, amount: int):
+        self.gas -= amount
+        if self.gas < 0:
+            raise G.OutOfGas("Out of gas")
+
+    def expand_memory(self, offset: int, size: int):
+        """Charge for and grow memory so ``[offset, offset + size)`` is addressable."""
+        if size and offset + size > self.memory.size:
+            memory = self.memory
+            self.use_gas(memory.expansion_cost(offset + size))
+            memory.grow(offset + size)
+
+
+class ExecutionResult:
+    def __init__(self, success: bool, output: bytes, gas_used: int, gas_left: int,
+                 logs: List[Dict[str, Any]], steps: int, error: Optional[str] = None):
+        self.success = success
+        self.output = output
+        self.gas_used = gas_used
+        self.gas_left = gas_left
+        self.logs = logs
+        self.steps = steps
+        self.error = error
+
+    def __repr__(self):
+        status = "success" if self.success else f"failed: {self.error}"
+        return f"<ExecutionResult {status}, gas used {self.gas_used}, {self.steps} steps>"
+
+
+class Interpreter:
+    def __init__(self, dispatch_table=None):
+        self.dispatch_table = dispatch_table or DISPATCH_TABLE
+
+    def execute(
+        self,
+        code: bytes,
+        calldata: bytes = b"",
+        gas: int = DEFAULT_GAS_LIMIT,
+        storage: Union[JournaledStorage, Dict[int, int], None] = None,
+        caller: int = 0,
+        address: int = 0,
+        value: int = 0,
+        context: Optional[ExecutionContext] = None
+    ) -> ExecutionResult:
+        """
+        Execute ``code`` as one message call.
+
+        The call runs inside a storage checkpoint: writes of calls that
+        revert or fail are undone, writes of successful calls stay in the
+        journal until the caller finishes the transaction.
+
+        Args:
+            code: Bytecode to run
+            calldata: Input data (CALLDATALOAD/CALLDATACOPY)
+            gas: Gas available to the call
+            storage: Journaled storage, or a slot -> value dict for this
+                contract alone (slots start cold on every call)
+
+        Returns:
+            ExecutionResult; failed calls (exceptional halt) consume all gas,
+            reverted calls keep their unused gas and return the revert data
+        """
+        if not isinstance(storage, JournaledStorage):
+            storage = JournaledStorage.for_slots(address, storage if storage is not None else {})
+        checkpoint = storage.checkpoint()
+        frame = Frame(
+            code, gas, storage, calldata,
+            caller, address, value, context or ExecutionContext(origin=caller)
+        )
+        table = self.dispatch_table
+        code_length = len(code)
+        steps = 0
+        try:
+            while frame.running:
+                pc = frame.pc
+                if pc >= code_length:
+                    break
+                handler, cost = table[code[pc]]
+                frame.gas -= cost
+                if frame.gas < 0:
+                    raise G.OutOfGas("Out of gas")
+                frame.pc = pc + 1
+                handler(frame)
+                steps += 1
+        except Exception as e:
+            storage.revert(checkpoint)
+            return ExecutionResult(False, b"", gas, 0, [], steps, str(e) or type(e).__name__)
+
+        if frame.reverted:
+            storage.revert(checkpoint)
+            return ExecutionResult(False, frame.output, gas - frame.gas, frame.gas, [], steps, "Execution reverted")
+        return ExecutionResult(True, frame.output, gas - frame.gas, frame.gas, frame.logs, steps)
@@ -0,0 +1,218 @@
+"""
+Optimistic parallel execution of a block, in the style of Block-STM.
+
+The contract calls of a block are first run speculatively in a worker pool,
+each against the state as it was before the block, recording every value
+it reads (storage slots, balances, the code itself) and buffering its
+writes. The block is then committed in order by EVM.execute_block: a
+speculation whose recorded reads still match the state left by the
+transactions before it is exactly what serial execution would compute, so
+its buffered writes and result are applied as they are; any other
+transaction (a conflict) is re-executed in place. Results are therefore
+deterministic and identical to serial execution.
+
+Built-in Digitionary actions are not speculated: they are constant-time
+state updates whose cost is the commit itself. Word ids and dictionary ids
+come from counters incremented at commit, so those transactions never
+conflict with each other through the counters.
+
+The jobs of a block share one StateView: the storage of the contracts
+they call and the balances of their callers and contracts. A speculation
+that reads any other balance is dropped and re-executed at commit.
+
+In CPython a thread pool only overlaps execution with the commit loop;
+pass a ProcessPoolExecutor to spread speculative execution across cores.
+Jobs then carry the id of the block's view instead of the view: it is
+written to a file once per block and loaded once per worker.
+"""
+
+import os
+import pickle
+import tempfile
+import time
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from evm.core.storage import JournaledStorage
+from evm.execution.evm import EVM
+from evm.execution.interpreter import ExecutionContext, ExecutionResult, Interpreter
+
+_interpreter = Interpreter()
+
+
+class _RecordingSlots:
+    """Read-through view of a contract's slots that records reads and buffers writes."""
+
+    def __init__(self, base: Dict[int, int]):
+        self.base = base
+        self.reads: Dict[int, int] = {}
+        self.writes: Dict[int, int] = {}
+
+    def get(self, slot: int, default: int = 0) -> int:
+        if slot in self.writes:
+            return self.writes[slot]
+        if slot not in self.reads:
+            self.reads[slot] = self.base.get(slot, 0)
+        return self.reads[slot]
+
+    def __setitem__(self, slot: int, value: int):
+        self.writes[slot] = value
+
+    def pop(self, slot: int, default: Any = None):
+        self.writes[slot] = 0
+
+
+class Speculation:
+    """Outcome of running one contract call ahead of its turn in the block."""
+
+    def __init__(self, address: int, code: bytes, reads: Dict[int, int], balance_reads: Dict[int, int],
+                 writes: Dict[int, int], result: ExecutionResult):
+        self.address = address
+        self.code = code
+        self.reads = reads
+        self.balance_reads = balance_reads
+        self.writes = writes
+        self.result = result
+        self.used = False
+
+    def is_valid(self, state) -> bool:
+        """Whether every value the speculation read is still current in ``state``."""
+        account = state.accounts.get(f"0x{self.address:040x}")
+        if account is None or account.code != self.code:
+            return False
+        storage = account.storage
+        if any(storage.get(slot, 0) != value for slot, value in self.reads.items()):
+            return False
+        for address, balance in self.balance_reads.items():
+            holder = state.accounts.get(f"0x{address:040x}")
+            if (holder.balance if holder is not None else 0) != balance:
+                return False
+        return True
+
+    def apply(self, storage: JournaledStorage) -> ExecutionResult:
+        """Replay the buffered writes into ``storage`` and return the speculated result."""
+        for slot, value in self.writes.items():
+            storage.set(self.address, slot, value)
+        self.used = True
+        return self.result
+
+
+class StateView:
+    """State a block's speculative calls read, from EVM.speculation_view."""
+
+    def __init__(self, storage: Dict[int, Dict[int, int]], balances: Dict[int, int]):
+        self.storage = storage
+        self.balances = balances
+
+
+# In a process pool worker: the view of the block it last ran jobs of
+_loaded_view: Dict[str, StateView] = {}
+
+
+def _resolve_view(view: Union[StateView, str]) -> StateView:
+    if isinstance(view, StateView):
+        return view
+    if view not in _loaded_view:
+        with open(view, "rb") as f:
+            loaded = pickle.load(f)
+        _loaded_view.clear()
+        _loaded_view[view] = loaded
+    return _loaded_view[view]
+
+
+def speculate_call(job: Dict[str, Any], view: Union[StateView, str]) -> Optional[Speculation]:
+    """
+    Run a job from EVM.speculation_job against the state its block was
+    built on: a StateView, or the path of one written by ParallelExecutor.
+    """
+    if job["gas"] < 0:
+        return None
+    view = _resolve_view(view)
+    address = job["address"]
+    if address not in view.storage:
+        return None
+    slots = _RecordingSlots(view.storage[address])
+    balance_reads: Dict[int, int] = {}
+    unknown_balances = []
+
+    def get_balance(a: int) -> int:
+        if a not in view.balances:
+            unknown_balances.append(a)
+            return 0
+        balance_reads[a] = view.balances[a]
+        return balance_reads[a]
+
+    storage = JournaledStorage(lambda a: slots if a == address else {})
+    context = ExecutionContext(
+        origin=job["caller"],
+        timestamp=job["timestamp"],
+        gas_limit=job["gas_limit"],
+        get_balance=get_balance
+    )
+    storage.access_account(job["caller"])
+    storage.access_account(address)
+    result = _interpreter.execute(job["code"], job["calldata"], job["gas"], storage,
+                                  job["caller"], address, 0, context)
+    if unknown_balances:
+        # Read state the view doesn't have: leave it to the commit
+        return None
+    # A failed call's writes were reverted; the commit discards them too
+    writes = slots.writes if result.success else {}
+    return Speculation(address, job["code"], slots.reads, balance_reads, writes, result)
+
+
+class ParallelExecutor:
+    """
+    Executes blocks on an EVM with speculative parallel contract execution.
+
+    Args:
+        evm: The EVM to commit to
+        pool: Executor for speculative runs; defaults to a thread pool
+        workers: Size of the default pool
+    """
+
+    def __init__(self, evm: EVM, pool: Optional[Executor] = None, workers: Optional[int] = None):
+        self.evm = evm
+        self.pool = pool or ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self.speculated = 0
+        self.reexecuted = 0
+
+    def execute_block(self, transactions: List[Tuple[str, dict]]) -> Tuple[List[dict], Optional[dict]]:
+        """Same contract as EVM.execute_block."""
+        timestamp = int(time.time())
+        jobs = [self.evm.speculation_job(sender, data, timestamp) for sender, data in transactions]
+        state = StateView(*self.evm.speculation_view(jobs))
+        view: Union[StateView, str] = state
+        path = None
+        if any(jobs) and not isinstance(self.pool, ThreadPoolExecutor):
+            # Pickled once for the block rather than once per job
+            path = view = os.path.join(tempfile.gettempdir(), f"speculation-{uuid.uuid4().hex}.pickle")
+            with open(path, "wb") as f:
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        try:
+            futures = [self.pool.submit(speculate_call, job, view) if job is not None else None for job in jobs]
+            speculations = []
+            for future in futures:
+                try:
+                    speculations.append(future.result() if future is not None else None)
+                except Exception as e:
+                    # Re-executed at commit like any other conflict
+                    print(f"⚠️ Speculative execution failed: {e}")
+                    speculations.append(None)
+        finally:
+            if path is not None:
+                os.remove(path)
+
+        results, header = self.evm.execute_block(transactions, timestamp=timestamp, speculations=speculations)
+        ran = [s for s in speculations if s is not None]
+        used = sum(s.used for s in ran)
+        self.speculated += used
+        self.reexecuted += len(ran) - used
+        return results, header
+
+    def stats(self) -> Dict[str, int]:
+        return {"speculated": self.speculated, "reexecuted": self.reexecuted}
+
+    def shutdown(self):
+        self.pool.shutdown()
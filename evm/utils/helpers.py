@@ -0,0 +1,70 @@
+import base64
+import json
+from typing import Any, Optional
+
+
+def encode_cursor(key: Any) -> str:
+    """Encode a pagination position as an opaque URL-safe cursor."""
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Any:
+    """Decode a cursor produced by ``encode_cursor`` (None for the first page)."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def assemble(source: str) -> bytes:
+    """
+    Assemble EVM mnemonics into bytecode.
+
+    Tokens are whitespace separated; ``;`` starts a comment. ``name:`` marks a
+    label (it emits nothing, so place a JUMPDEST after it) and ``@name`` as a
+    PUSH operand pushes the label's offset.
+
+        PUSH1 0x0a
+        loop: JUMPDEST
+        PUSH1 1 SWAP1 SUB DUP1 PUSH2 @loop JUMPI
+    """
+    from evm.constants.opcodes import MNEMONICS, push_size
+
+    tokens = []
+    for line in source.splitlines():
+        tokens.extend(line.split(";", 1)[0].split())
+
+    # First pass: label offsets; second pass: emit bytes
+    labels = {}
+    program = []  # (opcode, operand token)
+    offset = 0
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if token.endswith(":"):
+            labels[token[:-1]] = offset
+            continue
+        opcode = MNEMONICS.get(token.upper())
+        if opcode is None:
+            raise ValueError(f"Unknown mnemonic {token}")
+        operand = None
+        if push_size(opcode):
+            if i >= len(tokens):
+                raise ValueError(f"{token} needs an operand")
+            operand = tokens[i]
+            i += 1
+        program.append((opcode, operand))
+        offset += 1 + push_size(opcode)
+
+    code = bytearray()
+    for opcode, operand in program:
+        code.append(opcode)
+        if operand is not None:
+            value = labels[operand[1:]] if operand.startswith("@") else int(operand, 0)
+            code += value.to_bytes(push_size(opcode), "big")
+    return bytes(code)
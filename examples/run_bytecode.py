@@ -0,0 +1,33 @@
+import sys
+import os
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evm.execution.interpreter import Interpreter
+from evm.utils.helpers import assemble
+
+def main():
+    interpreter = Interpreter()
+
+    # (2 + 4) * 7, stored in memory and returned
+    code = assemble("PUSH1 2 PUSH1 4 ADD PUSH1 7 MUL PUSH1 0 MSTORE PUSH1 32 PUSH1 0 RETURN")
+    print(f"Bytecode: 0x{code.hex()}")
+    result = interpreter.execute(code)
+    print(result)
+    print(f"Returned: {int.from_bytes(result.output, 'big')}")
+
+    # A counter in storage slot 0, incremented on every call
+    storage = {}
+    counter = assemble("PUSH1 0 SLOAD PUSH1 1 ADD PUSH1 0 SSTORE")
+    for _ in range(3):
+        result = interpreter.execute(counter, storage=storage)
+        print(f"\nCounter call: {result}")
+    print(f"Storage after 3 calls: {storage}")
+
+    # Jumping into PUSH data is rejected by the JUMPDEST analysis
+    result = interpreter.execute(assemble("PUSH1 4 JUMP PUSH1 0x5b"), gas=1000)
+    print(f"\nBad jump: {result}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import sys
+import os
+
+# This line allows you to run the script from the root folder
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evm.core.memory import Memory
+
+def main():
+    m = Memory()
+
+    for end in (32, 64, 1024, 32 * 1024):
+        cost = m.expansion_cost(end)
+        m.grow(end)
+        print(f"Grow to {end:>6} bytes: {len(m):>6} active, expansion gas {cost:>5}, total {m.cost}")
+
+    print("\nStoring 0x2a at offset 0 (MSTORE)...")
+    m.write_word(0, 0x2a)
+    print(f"MLOAD 0: {m.read_word(0)}")
+    print(f"Bytes 28..32: {m.read(28, 4).hex()}")
+
+    view = m.view(0, 32)
+    m.write_byte(31, 0x2b)
+    print(f"\nZero-copy view sees the MSTORE8: {view.hex()}")
+
+if __name__ == "__main__":
+    main()
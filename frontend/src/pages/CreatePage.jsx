@@ -199,7 +199,7 @@ export default function CreatePage({ userAddress }) {
                                 >
                                     <div className="flex justify-between items-start mb-2">
                                         <span className="font-bold text-gray-900">{word.term}</span>
-                                        <span className="text-xs font-mono bg-gray-200 px-2 py-1 rounded text-gray-600">v{word.history.length}</span>
+                                        <span className="text-xs font-mono bg-gray-200 px-2 py-1 rounded text-gray-600">v{word.versionCount ?? word.history.length}</span>
                                     </div>
                                     <div className="text-xs text-gray-500 truncate">
                                         Last commit: {word.history[word.history.length - 1].commitMsg}
@@ -1,15 +1,29 @@
 from cffi import FFI
 import json
+import os
+import struct
 
 ffi = FFI()
 ffi.cdef("""
 char* put_blob(char* data);
 char* put_tree(char* jsonEntries);
 char* get_object(char* hash);
+int put_object(int type, char* data, size_t length, char* hash, size_t hashLength);
+char* get_object_n(char* hash, size_t hashLength, long long* length);
+int put_objects(int type, char** data, size_t* lengths, size_t count, char* hashes, size_t hashesLength);
+char* get_objects(char* hashes, size_t hashesLength, size_t count, unsigned char* types, long long* lengths);
+char* open_store(char* dir);
+char* flush_store();
+char* close_store();
 void free_string(char* s);
 """)
 
-lib = ffi.dlopen("./librepo.so")
+# Built from repo/capi (see capi.go); raises OSError if it has not been built
+lib = ffi.dlopen(os.path.join(os.path.dirname(os.path.abspath(__file__)), "librepo.so"))
+
+# Object types (repo.ObjectType) and the mode of tree entries that are trees
+BLOB, TREE = 0, 1
+TREE_MODE = 0o040000
 
 def _str(fn, *args):
     s = fn(*args)
@@ -19,19 +33,150 @@ def _str(fn, *args):
     lib.free_string(s)
     return py
 
-def put_blob(data: bytes) -> str:
-    return _str(lib.put_blob, ffi.new("char[]", data))
+def put_objects(type_: int, items: list[bytes]) -> list[str]:
+    """Store many objects in one call; the buffers are passed in place, NUL bytes included."""
+    if not items:
+        return []
+    views = [ffi.from_buffer(item) for item in items]
+    hashes = ffi.new("char[]", 64 * len(items))
+    if lib.put_objects(type_, views, [len(v) for v in views], len(items), hashes, len(hashes)) != 0:
+        raise ValueError(f"Unknown object type {type_}")
+    packed = ffi.buffer(hashes)[:].decode()
+    return [packed[i:i + 64] for i in range(0, len(packed), 64)]
 
-def put_tree(entries: list[dict]) -> str:
-    return _str(
-        lib.put_tree,
-        ffi.new("char[]", json.dumps(entries).encode())
-    )
+def _get_objects(hashes: list[str]) -> list[tuple[int, bytes] | None]:
+    if not hashes:
+        return []
+    # Anything that isn't a 64 character hash is reported missing
+    keys = "".join(h if len(h) == 64 and h.isascii() else "-" * 64 for h in hashes).encode()
+    types = ffi.new("unsigned char[]", len(hashes))
+    lengths = ffi.new("long long[]", len(hashes))
+    buf = lib.get_objects(ffi.from_buffer(keys), len(keys), len(hashes), types, lengths)
+    if buf == ffi.NULL:
+        raise ValueError("Hashes must be 64 characters each")
+    try:
+        data = ffi.buffer(buf, max(sum(n for n in lengths if n > 0), 1))
+        objects, offset = [], 0
+        for type_, length in zip(types, lengths):
+            if length < 0:
+                objects.append(None)
+                continue
+            objects.append((type_, data[offset:offset + length]))
+            offset += length
+        return objects
+    finally:
+        lib.free_string(buf)
+
+def get_objects(hashes: list[str]) -> list[bytes | None]:
+    """Fetch many objects in one call; None for missing ones."""
+    return [obj[1] if obj is not None else None for obj in _get_objects(hashes)]
+
+def put_blobs(blobs: list[bytes]) -> list[str]:
+    return put_objects(BLOB, blobs)
+
+def put_blob(data: bytes) -> str:
+    hash_ = ffi.new("char[64]")
+    if lib.put_object(BLOB, ffi.from_buffer(data), len(data), hash_, len(hash_)) != 0:
+        raise ValueError("Blob could not be stored")
+    return ffi.buffer(hash_)[:].decode()
 
 def get_object(hash_: str) -> bytes | None:
-    s = lib.get_object(ffi.new("char[]", hash_.encode()))
-    if s == ffi.NULL:
+    key = hash_.encode()
+    if len(key) != 64:
         return None
-    py = ffi.string(s)
-    lib.free_string(s)
-    return py
+    length = ffi.new("long long *")
+    buf = lib.get_object_n(key, len(key), length)
+    data = ffi.unpack(buf, length[0]) if length[0] >= 0 else None
+    lib.free_string(buf)
+    return data
+
+# Binary tree encoding (repo/tree.go): a 0 byte, then per entry
+# mode:u32le, name length:uvarint, name, raw 32 byte hash
+
+def encode_tree(entries: list[dict]) -> bytes:
+    out = bytearray(b"\x00")
+    for entry in entries:
+        name = entry["Name"].encode()
+        hash_ = bytes.fromhex(entry["Hash"])
+        if len(hash_) != 32:
+            raise ValueError(f"Not an object hash: {entry['Hash']}")
+        out += struct.pack("<I", entry["Mode"])
+        length = len(name)
+        while length >= 0x80:
+            out.append(length & 0x7F | 0x80)
+            length >>= 7
+        out.append(length)
+        out += name + hash_
+    return bytes(out)
+
+def decode_tree(data: bytes) -> list[dict]:
+    if not data or data[0] != 0:
+        # Stored as JSON by earlier versions
+        return json.loads(data)
+    entries, pos = [], 1
+    while pos < len(data):
+        (mode,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        length = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        name = data[pos:pos + length].decode()
+        hash_ = data[pos + length:pos + length + 32].hex()
+        pos += length + 32
+        entries.append({"Name": name, "Mode": mode, "Hash": hash_})
+    return entries
+
+def put_trees(trees: list[list[dict]]) -> list[str]:
+    return put_objects(TREE, [encode_tree(entries) for entries in trees])
+
+def put_tree(entries: list[dict]) -> str:
+    return put_trees([entries])[0]
+
+def read_trees(hashes: list[str]) -> list[list[dict] | None]:
+    """Entries of many trees in one call; None where a hash is missing or not a tree."""
+    return [
+        decode_tree(obj[1]) if obj is not None and obj[0] == TREE else None
+        for obj in _get_objects(hashes)
+    ]
+
+def walk_tree(root: str) -> list[tuple[str, dict]]:
+    """
+    Every (path, entry) under a tree, breadth first.
+
+    Subtrees (entries with TREE_MODE) are read one level per call, so a
+    walk costs one boundary crossing per level of depth.
+    """
+    walked = []
+    level = [("", root)]
+    while level:
+        trees = read_trees([hash_ for _, hash_ in level])
+        next_level = []
+        for (path, _), entries in zip(level, trees):
+            for entry in entries or []:
+                entry_path = f"{path}{entry['Name']}"
+                walked.append((entry_path, entry))
+                if entry["Mode"] & 0o170000 == TREE_MODE:
+                    next_level.append((entry_path + "/", entry["Hash"]))
+        level = next_level
+    return walked
+
+def _check(error):
+    if error is not None:
+        raise OSError(error)
+
+def open_store(path: str):
+    """Keep objects in a packfile under ``path`` instead of in memory."""
+    _check(_str(lib.open_store, ffi.new("char[]", os.fsencode(path))))
+
+def flush_store():
+    """Make every object stored so far durable."""
+    _check(_str(lib.flush_store))
+
+def close_store():
+    """Flush and close the packfile; objects are kept in memory again afterwards."""
+    _check(_str(lib.close_store))
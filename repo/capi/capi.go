@@ -0,0 +1,157 @@
+// C API of the object store, for repo.py:
+//
+//	go build -buildmode=c-shared -o ../librepo.so ./capi
+//
+// Every returned string is allocated in C memory and must be released with
+// free_string. Blobs cross the boundary as NUL-terminated strings. Objects
+// are kept in memory until open_store points the store at a packfile
+// directory (see ../pack.go).
+package main
+
+// #include <stdlib.h>
+import "C"
+
+import (
+	"encoding/json"
+	"unsafe"
+
+	repo "py_c_ffi_go.hack/m/v2"
+)
+
+//export put_blob
+func put_blob(data *C.char) *C.char {
+	return C.CString(repo.PutObject(repo.Blob, []byte(C.GoString(data))))
+}
+
+//export put_tree
+func put_tree(jsonEntries *C.char) *C.char {
+	var entries []repo.TreeEntry
+	if err := json.Unmarshal([]byte(C.GoString(jsonEntries)), &entries); err != nil {
+		return nil
+	}
+	return C.CString(repo.PutTree(entries))
+}
+
+//export get_object
+func get_object(hash *C.char) *C.char {
+	var s *C.char
+	// Copied once, straight from the pack mapping into C memory
+	repo.ViewObject(C.GoString(hash), func(obj repo.Object) {
+		s = (*C.char)(C.malloc(C.size_t(len(obj.Data) + 1)))
+		buf := unsafe.Slice((*byte)(unsafe.Pointer(s)), len(obj.Data)+1)
+		copy(buf, obj.Data)
+		buf[len(obj.Data)] = 0
+	})
+	return s
+}
+
+// put_object and get_object_n are the single-object forms of put_objects
+// and get_objects: binary safe, without the batch bookkeeping. hash holds
+// hashLength bytes, which must be 64; get_object_n sets length to -1 and
+// returns NULL otherwise.
+//
+//export put_object
+func put_object(t C.int, data *C.char, length C.size_t, hash *C.char, hashLength C.size_t) C.int {
+	return put_objects(t, &data, &length, 1, hash, hashLength)
+}
+
+//export get_object_n
+func get_object_n(hash *C.char, hashLength C.size_t, length *C.longlong) *C.char {
+	*length = -1
+	var t C.uchar
+	return get_objects(hash, hashLength, 1, &t, length)
+}
+
+// Batch, length-delimited calls: any bytes, one boundary crossing per batch.
+
+// put_objects stores count objects of one type. data[i] points to
+// lengths[i] bytes, which are read in place. The hex hash of object i is
+// written to hashes[64*i : 64*i+64] (not NUL-terminated), a buffer of
+// hashesLength bytes. Returns 0, -1 for an unknown type, or -2 if hashes
+// can't hold count hashes.
+//
+//export put_objects
+func put_objects(t C.int, data **C.char, lengths *C.size_t, count C.size_t, hashes *C.char, hashesLength C.size_t) C.int {
+	if t != C.int(repo.Blob) && t != C.int(repo.Tree) {
+		return -1
+	}
+	if hashesLength < 64*count {
+		return -2
+	}
+	n := int(count)
+	ptrs := unsafe.Slice(data, n)
+	sizes := unsafe.Slice(lengths, n)
+	out := unsafe.Slice((*byte)(unsafe.Pointer(hashes)), 64*n)
+	for i := 0; i < n; i++ {
+		obj := unsafe.Slice((*byte)(unsafe.Pointer(ptrs[i])), int(sizes[i]))
+		copy(out[64*i:], repo.PutObject(repo.ObjectType(t), obj))
+	}
+	return 0
+}
+
+// get_objects looks up count objects; hashes holds their hex hashes back to
+// back, hashesLength bytes in all. Object i's type goes to types[i] and its
+// length to lengths[i] (-1 if missing). Returns all found objects
+// concatenated in one buffer, to be released with free_string, or NULL if
+// hashesLength isn't 64*count.
+//
+//export get_objects
+func get_objects(hashes *C.char, hashesLength C.size_t, count C.size_t, types *C.uchar, lengths *C.longlong) *C.char {
+	if hashesLength != 64*count {
+		return nil
+	}
+	n := int(count)
+	keys := unsafe.Slice((*byte)(unsafe.Pointer(hashes)), 64*n)
+	kinds := unsafe.Slice(types, n)
+	sizes := unsafe.Slice(lengths, n)
+	capacity, total := 256*n, 0
+	buf := C.malloc(C.size_t(capacity))
+	for i := 0; i < n; i++ {
+		sizes[i] = -1
+		// Copied while the object is viewed; a mapped pack may move afterwards
+		repo.ViewObject(string(keys[64*i:64*i+64]), func(obj repo.Object) {
+			if total+len(obj.Data) > capacity {
+				for capacity < total+len(obj.Data) {
+					capacity *= 2
+				}
+				buf = C.realloc(buf, C.size_t(capacity))
+			}
+			copy(unsafe.Slice((*byte)(buf), capacity)[total:], obj.Data)
+			kinds[i] = C.uchar(obj.Type)
+			sizes[i] = C.longlong(len(obj.Data))
+			total += len(obj.Data)
+		})
+	}
+	return (*C.char)(buf)
+}
+
+// open_store, flush_store and close_store return NULL on success, else an error message.
+
+//export open_store
+func open_store(dir *C.char) *C.char {
+	return cError(repo.Open(C.GoString(dir)))
+}
+
+//export flush_store
+func flush_store() *C.char {
+	return cError(repo.Flush())
+}
+
+//export close_store
+func close_store() *C.char {
+	return cError(repo.Close())
+}
+
+func cError(err error) *C.char {
+	if err == nil {
+		return nil
+	}
+	return C.CString(err.Error())
+}
+
+//export free_string
+func free_string(s *C.char) {
+	C.free(unsafe.Pointer(s))
+}
+
+func main() {}
@@ -0,0 +1,17 @@
+//go:build windows
+
+package repo
+
+import "os"
+
+// mapFile reads the file instead: a mapped file can't be replaced on Windows.
+func mapFile(path string) ([]byte, func() error, error) {
+	data, err := os.ReadFile(path)
+	if err != nil {
+		return nil, nil, err
+	}
+	return data, noUnmap, nil
+}
+
+// The copy only shows what the file held when it was read.
+const sharedMapping = false
@@ -0,0 +1,540 @@
+package repo
+
+// Packfile storage: objects are appended to one pack file and found through
+// a sorted index, both read through mmap.
+//
+//	objects.pack  "DGPK" version:u32, then records
+//	              hash[32] type:u8 length:u32 data[length]
+//	objects.idx   "DGIX" version:u32 packLength:u64 fanout[256]:u32,
+//	              entries hash[32] offset:u64 sorted by hash, sha256 of all of the above
+//
+// fanout[b] is the number of entries whose hash starts with a byte <= b, so
+// a lookup binary-searches only the entries sharing its first byte. The
+// index covers the pack up to packLength; it is rewritten by Flush and
+// Close, and records appended after it are found by scanning the pack tail
+// on open (a torn record at the end is cut off). Until then they are kept
+// in sharded in-memory maps.
+//
+// Appends are serialized, so the pack never has holes: a failed write
+// leaves the append offset where it was. The pack is fsynced every
+// syncInterval while it has unsynced records (group commit), and grown
+// ahead of the appends by doubling, so the mapping that readers use is
+// replaced only when the pack outgrows it.
+
+import (
+	"bytes"
+	"crypto/sha256"
+	"encoding/binary"
+	"errors"
+	"fmt"
+	"io"
+	"os"
+	"path/filepath"
+	"sort"
+	"sync"
+	"time"
+)
+
+const (
+	packMagic    = "DGPK"
+	indexMagic   = "DGIX"
+	packVersion  = 1
+	packHeader   = 8
+	recordHeader = sha256.Size + 1 + 4
+	indexHeader  = 16 + shardCount*4
+	indexEntry   = sha256.Size + 8
+
+	// Longest time an appended record waits for its fsync
+	syncInterval = 50 * time.Millisecond
+	// Smallest step the pack file is grown by
+	minPackGrowth = 1 << 20
+)
+
+type packShard struct {
+	mu sync.RWMutex
+	// Offsets of records appended since the index was written
+	recent map[hashKey]int64
+}
+
+type PackStore struct {
+	dir    string
+	file   *os.File
+	shards [shardCount]packShard
+
+	// Guards appends: records are written one after another from end
+	writeMu  sync.Mutex
+	end      int64 // next append offset
+	capacity int64 // file size; zeros from end on
+	synced   int64 // pack prefix known to be on disk
+	stop     chan struct{}
+	syncDone chan struct{}
+
+	// Guards the mappings; held for writing only to replace them
+	mu        sync.RWMutex
+	data      []byte // mapped pack
+	index     []byte // mapped index entries
+	fanout    []uint32
+	unmapData func() error
+	unmapIdx  func() error
+	mappedAt  int64 // end of the pack when it was mapped
+}
+
+// OpenPack opens or creates the pack and index in dir.
+func OpenPack(dir string) (*PackStore, error) {
+	if err := os.MkdirAll(dir, 0o755); err != nil {
+		return nil, err
+	}
+	file, err := os.OpenFile(filepath.Join(dir, "objects.pack"), os.O_RDWR|os.O_CREATE, 0o644)
+	if err != nil {
+		return nil, err
+	}
+	p := &PackStore{dir: dir, file: file, unmapData: noUnmap, unmapIdx: noUnmap}
+	for i := range p.shards {
+		p.shards[i].recent = map[hashKey]int64{}
+	}
+	if err := p.load(); err != nil {
+		file.Close()
+		return nil, err
+	}
+	p.stop, p.syncDone = make(chan struct{}), make(chan struct{})
+	go p.syncLoop()
+	return p, nil
+}
+
+// syncLoop fsyncs the pack every syncInterval while records are unsynced,
+// so a crash loses at most that much, without an fsync per put.
+func (p *PackStore) syncLoop() {
+	defer close(p.syncDone)
+	ticker := time.NewTicker(syncInterval)
+	defer ticker.Stop()
+	for {
+		select {
+		case <-p.stop:
+			return
+		case <-ticker.C:
+			p.Sync()
+		}
+	}
+}
+
+// Sync fsyncs the records appended so far, if any are unsynced.
+func (p *PackStore) Sync() error {
+	p.writeMu.Lock()
+	end := p.end
+	p.writeMu.Unlock()
+	if end <= p.syncedEnd() {
+		return nil
+	}
+	// Appends continue meanwhile; the next Sync covers them
+	if err := p.file.Sync(); err != nil {
+		return err
+	}
+	p.writeMu.Lock()
+	if end > p.synced {
+		p.synced = end
+	}
+	p.writeMu.Unlock()
+	return nil
+}
+
+func (p *PackStore) syncedEnd() int64 {
+	p.writeMu.Lock()
+	defer p.writeMu.Unlock()
+	return p.synced
+}
+
+func noUnmap() error { return nil }
+
+func (p *PackStore) load() error {
+	info, err := p.file.Stat()
+	if err != nil {
+		return err
+	}
+	if info.Size() < packHeader {
+		header := make([]byte, packHeader)
+		copy(header, packMagic)
+		binary.LittleEndian.PutUint32(header[4:], packVersion)
+		if _, err := p.file.WriteAt(header, 0); err != nil {
+			return err
+		}
+		if err := p.file.Truncate(packHeader); err != nil {
+			return err
+		}
+	} else {
+		header := make([]byte, packHeader)
+		if _, err := p.file.ReadAt(header, 0); err != nil {
+			return err
+		}
+		if string(header[:4]) != packMagic || binary.LittleEndian.Uint32(header[4:]) != packVersion {
+			return fmt.Errorf("%s is not a version %d object pack", p.file.Name(), packVersion)
+		}
+	}
+
+	indexed, err := p.loadIndex()
+	if err != nil {
+		// A missing or damaged index is rebuilt from the pack
+		indexed = packHeader
+	}
+	end, err := p.scan(indexed)
+	if err != nil {
+		return err
+	}
+	p.end, p.capacity, p.synced = end, end, end
+	return p.remap(end)
+}
+
+func (p *PackStore) loadIndex() (int64, error) {
+	raw, err := os.ReadFile(filepath.Join(p.dir, "objects.idx"))
+	if err != nil {
+		return 0, err
+	}
+	if len(raw) < indexHeader+sha256.Size || (len(raw)-indexHeader-sha256.Size)%indexEntry != 0 {
+		return 0, errors.New("truncated index")
+	}
+	body := raw[:len(raw)-sha256.Size]
+	if sum := sha256.Sum256(body); !bytes.Equal(sum[:], raw[len(body):]) {
+		return 0, errors.New("index checksum mismatch")
+	}
+	if string(body[:4]) != indexMagic || binary.LittleEndian.Uint32(body[4:]) != packVersion {
+		return 0, errors.New("unknown index format")
+	}
+	index, unmap, err := mapFile(filepath.Join(p.dir, "objects.idx"))
+	if err != nil {
+		return 0, err
+	}
+	p.setIndex(index, unmap)
+	return int64(binary.LittleEndian.Uint64(body[8:])), nil
+}
+
+func (p *PackStore) setIndex(index []byte, unmap func() error) {
+	p.unmapIdx()
+	p.fanout = make([]uint32, shardCount)
+	for i := range p.fanout {
+		p.fanout[i] = binary.LittleEndian.Uint32(index[16+4*i:])
+	}
+	p.index = index[indexHeader : len(index)-sha256.Size]
+	p.unmapIdx = unmap
+}
+
+// scan adds the records from offset on to the recent maps and returns where
+// the last valid one ends, cutting off anything after it.
+func (p *PackStore) scan(offset int64) (int64, error) {
+	info, err := p.file.Stat()
+	if err != nil {
+		return 0, err
+	}
+	header := make([]byte, recordHeader)
+	for {
+		if _, err := p.file.ReadAt(header, offset); err != nil {
+			if err == io.EOF {
+				break
+			}
+			return 0, err
+		}
+		var hash hashKey
+		copy(hash[:], header)
+		length := int64(binary.LittleEndian.Uint32(header[sha256.Size+1:]))
+		if offset+recordHeader+length > info.Size() {
+			break
+		}
+		data := make([]byte, length)
+		if _, err := p.file.ReadAt(data, offset+recordHeader); err != nil {
+			break
+		}
+		if hashObject(ObjectType(header[sha256.Size]), data) != hash {
+			break
+		}
+		p.shards[hash[0]].recent[hash] = offset
+		offset += recordHeader + int64(len(data))
+	}
+	return offset, p.file.Truncate(offset)
+}
+
+func (p *PackStore) remap(size int64) error {
+	p.writeMu.Lock()
+	end := p.end
+	p.writeMu.Unlock()
+	data, unmap, err := mapFile(p.file.Name())
+	if err != nil {
+		return err
+	}
+	if int64(len(data)) < size {
+		unmap()
+		return errors.New("object pack shrank")
+	}
+	p.unmapData()
+	p.data, p.unmapData, p.mappedAt = data, unmap, end
+	return nil
+}
+
+func (p *PackStore) lookupIndex(hash hashKey) (int64, bool) {
+	if p.index == nil {
+		return 0, false
+	}
+	lo := 0
+	if hash[0] > 0 {
+		lo = int(p.fanout[hash[0]-1])
+	}
+	hi := int(p.fanout[hash[0]])
+	i := lo + sort.Search(hi-lo, func(i int) bool {
+		entry := p.index[(lo+i)*indexEntry:]
+		return bytes.Compare(entry[:sha256.Size], hash[:]) >= 0
+	})
+	if i == hi {
+		return 0, false
+	}
+	entry := p.index[i*indexEntry:]
+	if !bytes.Equal(entry[:sha256.Size], hash[:]) {
+		return 0, false
+	}
+	return int64(binary.LittleEndian.Uint64(entry[sha256.Size:])), true
+}
+
+func (p *PackStore) offset(hash hashKey) (int64, bool) {
+	shard := &p.shards[hash[0]]
+	shard.mu.RLock()
+	offset, ok := shard.recent[hash]
+	shard.mu.RUnlock()
+	if ok {
+		return offset, true
+	}
+	p.mu.RLock()
+	defer p.mu.RUnlock()
+	return p.lookupIndex(hash)
+}
+
+func (p *PackStore) put(t ObjectType, hash hashKey, data []byte) error {
+	shard := &p.shards[hash[0]]
+	shard.mu.Lock()
+	defer shard.mu.Unlock()
+	if _, ok := shard.recent[hash]; ok {
+		return nil
+	}
+	p.mu.RLock()
+	_, ok := p.lookupIndex(hash)
+	p.mu.RUnlock()
+	if ok {
+		return nil
+	}
+	record := make([]byte, recordHeader, recordHeader+len(data))
+	copy(record, hash[:])
+	record[sha256.Size] = byte(t)
+	binary.LittleEndian.PutUint32(record[sha256.Size+1:], uint32(len(data)))
+	record = append(record, data...)
+	offset, err := p.append(record)
+	if err != nil {
+		return err
+	}
+	shard.recent[hash] = offset
+	return nil
+}
+
+// append writes record at the end of the pack and returns its offset. On
+// failure the end stays put, so the next record overwrites whatever part
+// of this one was written.
+func (p *PackStore) append(record []byte) (int64, error) {
+	p.writeMu.Lock()
+	defer p.writeMu.Unlock()
+	offset := p.end
+	if need := offset + int64(len(record)); need > p.capacity {
+		capacity := p.capacity * 2
+		if capacity < p.capacity+minPackGrowth {
+			capacity = p.capacity + minPackGrowth
+		}
+		if capacity < need {
+			capacity = need
+		}
+		if err := p.file.Truncate(capacity); err != nil {
+			return 0, err
+		}
+		p.capacity = capacity
+	}
+	if _, err := p.file.WriteAt(record, offset); err != nil {
+		return 0, err
+	}
+	p.end = offset + int64(len(record))
+	return offset, nil
+}
+
+func (p *PackStore) view(hash hashKey, fn func(Object)) bool {
+	offset, ok := p.offset(hash)
+	if !ok {
+		return false
+	}
+	p.mu.RLock()
+	if !sharedMapping && p.mappedAt <= offset {
+		// Appended after the pack was copied: read it from the file instead
+		// of copying the whole pack again
+		p.mu.RUnlock()
+		return p.read(offset, fn)
+	}
+	if p.mappedEnd() < p.recordEnd(offset) {
+		// Appended past the mapping: the pack has grown since it was mapped
+		p.mu.RUnlock()
+		p.mu.Lock()
+		var err error
+		if p.mappedEnd() < p.recordEnd(offset) {
+			err = p.remap(0)
+		}
+		p.mu.Unlock()
+		if err != nil {
+			return false
+		}
+		p.mu.RLock()
+	}
+	defer p.mu.RUnlock()
+	end := p.recordEnd(offset)
+	if p.mappedEnd() < end {
+		return false
+	}
+	fn(Object{Type: ObjectType(p.data[offset+sha256.Size]), Data: p.data[offset+recordHeader : end]})
+	return true
+}
+
+func (p *PackStore) read(offset int64, fn func(Object)) bool {
+	var header [recordHeader]byte
+	if _, err := p.file.ReadAt(header[:], offset); err != nil {
+		return false
+	}
+	data := make([]byte, binary.LittleEndian.Uint32(header[sha256.Size+1:]))
+	if _, err := p.file.ReadAt(data, offset+recordHeader); err != nil {
+		return false
+	}
+	fn(Object{Type: ObjectType(header[sha256.Size]), Data: data})
+	return true
+}
+
+// mappedEnd is how much of the pack the mapping shows. A shared mapping
+// shows writes made after it was created; a copy (Windows) only what the
+// pack held when it was read.
+func (p *PackStore) mappedEnd() int64 {
+	if sharedMapping {
+		return int64(len(p.data))
+	}
+	return p.mappedAt
+}
+
+func (p *PackStore) recordEnd(offset int64) int64 {
+	if int64(len(p.data)) < offset+recordHeader {
+		return offset + recordHeader
+	}
+	return offset + recordHeader + int64(binary.LittleEndian.Uint32(p.data[offset+sha256.Size+1:]))
+}
+
+// Flush syncs the pack and rewrites the index to cover every object.
+func (p *PackStore) Flush() error {
+	// Puts wait until the index is written, so it covers the whole pack
+	for i := range p.shards {
+		p.shards[i].mu.Lock()
+		defer p.shards[i].mu.Unlock()
+	}
+	p.mu.Lock()
+	defer p.mu.Unlock()
+
+	p.writeMu.Lock()
+	end := p.end
+	p.writeMu.Unlock()
+	if err := p.Sync(); err != nil {
+		return err
+	}
+	count := len(p.index) / indexEntry
+	for i := range p.shards {
+		count += len(p.shards[i].recent)
+	}
+	entries := make([]byte, 0, count*indexEntry)
+	entries = append(entries, p.index...)
+	var record [indexEntry]byte
+	for i := range p.shards {
+		for hash, offset := range p.shards[i].recent {
+			copy(record[:], hash[:])
+			binary.LittleEndian.PutUint64(record[sha256.Size:], uint64(offset))
+			entries = append(entries, record[:]...)
+		}
+	}
+	sort.Sort(entrySorter(entries))
+
+	index := make([]byte, indexHeader, indexHeader+len(entries)+sha256.Size)
+	copy(index, indexMagic)
+	binary.LittleEndian.PutUint32(index[4:], packVersion)
+	binary.LittleEndian.PutUint64(index[8:], uint64(end))
+	var fanout [shardCount]uint32
+	for i := 0; i < count; i++ {
+		fanout[entries[i*indexEntry]]++
+	}
+	var total uint32
+	for b, n := range fanout {
+		total += n
+		binary.LittleEndian.PutUint32(index[16+4*b:], total)
+	}
+	index = append(index, entries...)
+	sum := sha256.Sum256(index)
+	index = append(index, sum[:]...)
+
+	path := filepath.Join(p.dir, "objects.idx")
+	if err := writeFileAtomic(path, index); err != nil {
+		return err
+	}
+	mapped, unmap, err := mapFile(path)
+	if err != nil {
+		return err
+	}
+	p.setIndex(mapped, unmap)
+	for i := range p.shards {
+		p.shards[i].recent = map[hashKey]int64{}
+	}
+	return nil
+}
+
+// Close flushes the store and releases its files.
+func (p *PackStore) Close() error {
+	close(p.stop)
+	<-p.syncDone
+	err := p.Flush()
+	p.mu.Lock()
+	defer p.mu.Unlock()
+	p.unmapData()
+	p.unmapIdx()
+	p.data, p.index = nil, nil
+	p.unmapData, p.unmapIdx = noUnmap, noUnmap
+	if err == nil {
+		// Drop the room grown ahead of the appends
+		err = p.file.Truncate(p.end)
+	}
+	if cerr := p.file.Close(); err == nil {
+		err = cerr
+	}
+	return err
+}
+
+type entrySorter []byte
+
+func (s entrySorter) Len() int { return len(s) / indexEntry }
+func (s entrySorter) Less(i, j int) bool {
+	return bytes.Compare(s[i*indexEntry:i*indexEntry+sha256.Size], s[j*indexEntry:j*indexEntry+sha256.Size]) < 0
+}
+func (s entrySorter) Swap(i, j int) {
+	var tmp [indexEntry]byte
+	copy(tmp[:], s[i*indexEntry:])
+	copy(s[i*indexEntry:(i+1)*indexEntry], s[j*indexEntry:(j+1)*indexEntry])
+	copy(s[j*indexEntry:], tmp[:])
+}
+
+func writeFileAtomic(path string, data []byte) error {
+	tmp := path + ".tmp"
+	f, err := os.Create(tmp)
+	if err != nil {
+		return err
+	}
+	if _, err := f.Write(data); err != nil {
+		f.Close()
+		return err
+	}
+	if err := f.Sync(); err != nil {
+		f.Close()
+		return err
+	}
+	if err := f.Close(); err != nil {
+		return err
+	}
+	return os.Rename(tmp, path)
+}
@@ -4,6 +4,7 @@ import (
 	"crypto/sha256"
 	"encoding/hex"
 	"sync"
+	"sync/atomic"
 )
 
 type ObjectType uint8
@@ -18,27 +19,185 @@ type Object struct {
 	Data []byte
 }
 
-var (
-	store = map[string]Object{}
-	mu    sync.RWMutex
-)
+type hashKey = [sha256.Size]byte
+
+// Objects are spread over shardCount locks by the first byte of their hash,
+// so puts and gets of different objects don't contend.
+const shardCount = 256
+
+// backend holds the objects: in memory until Open, then in a PackStore.
+type backend interface {
+	put(t ObjectType, hash hashKey, data []byte) error
+	view(hash hashKey, fn func(Object)) bool
+}
+
+var objects atomic.Value // backend
+
+func init() {
+	objects.Store(backendBox{newMemoryStore()})
+}
+
+// atomic.Value needs one concrete type for every Store
+type backendBox struct{ backend }
 
-func hashObject(t ObjectType, data []byte) string {
-	h := sha256.Sum256(append([]byte{byte(t)}, data...))
-	return hex.EncodeToString(h[:])
+func current() backend {
+	return objects.Load().(backendBox).backend
 }
 
+func hashObject(t ObjectType, data []byte) hashKey {
+	h := sha256.New()
+	h.Write([]byte{byte(t)})
+	h.Write(data)
+	var key hashKey
+	h.Sum(key[:0])
+	return key
+}
+
+func parseHash(hash string) (hashKey, bool) {
+	var key hashKey
+	if len(hash) != hex.EncodedLen(len(key)) {
+		return key, false
+	}
+	_, err := hex.Decode(key[:], []byte(hash))
+	return key, err == nil
+}
+
+// PutObject stores an object and returns its hash. Storing an object that
+// is already present is a no-op. data is not retained.
 func PutObject(t ObjectType, data []byte) string {
 	hash := hashObject(t, data)
-	mu.Lock()
-	store[hash] = Object{Type: t, Data: data}
-	mu.Unlock()
-	return hash
+	if err := current().put(t, hash, data); err != nil {
+		// Still readable: the memory store keeps what the pack could not
+		fallback.put(t, hash, data)
+	}
+	return hex.EncodeToString(hash[:])
 }
 
+// GetObject returns a copy of an object that is safe to keep.
 func GetObject(hash string) (Object, bool) {
-	mu.RLock()
-	obj, ok := store[hash]
-	mu.RUnlock()
+	var obj Object
+	ok := ViewObject(hash, func(o Object) {
+		obj = Object{Type: o.Type, Data: append([]byte(nil), o.Data...)}
+	})
 	return obj, ok
 }
+
+// ViewObject calls fn with an object without copying it. o.Data may point
+// into a memory-mapped pack and is only valid until fn returns.
+func ViewObject(hash string, fn func(o Object)) bool {
+	key, ok := parseHash(hash)
+	if !ok {
+		return false
+	}
+	if current().view(key, fn) {
+		return true
+	}
+	return fallback.view(key, fn)
+}
+
+// Open switches the store to the packfile in dir, creating it if needed.
+// Objects stored in memory so far are copied into the pack.
+func Open(dir string) error {
+	openMu.Lock()
+	defer openMu.Unlock()
+	pack, err := OpenPack(dir)
+	if err != nil {
+		return err
+	}
+	previous := current()
+	if err := copyObjects(previous, pack); err != nil {
+		pack.Close()
+		return err
+	}
+	objects.Store(backendBox{pack})
+	if p, ok := previous.(*PackStore); ok {
+		return p.Close()
+	}
+	return nil
+}
+
+// Flush makes every stored object durable and indexed.
+func Flush() error {
+	if p, ok := current().(*PackStore); ok {
+		return p.Flush()
+	}
+	return nil
+}
+
+// Close flushes and closes the pack; the store is in memory again afterwards.
+func Close() error {
+	openMu.Lock()
+	defer openMu.Unlock()
+	p, ok := current().(*PackStore)
+	if !ok {
+		return nil
+	}
+	objects.Store(backendBox{newMemoryStore()})
+	return p.Close()
+}
+
+var (
+	openMu sync.Mutex
+	// Objects a pack failed to write, so PutObject never loses one
+	fallback = newMemoryStore()
+)
+
+func copyObjects(from backend, to *PackStore) error {
+	mem, ok := from.(*memoryStore)
+	if !ok {
+		return nil
+	}
+	for i := range mem.shards {
+		shard := &mem.shards[i]
+		shard.mu.RLock()
+		for hash, obj := range shard.objects {
+			if err := to.put(obj.Type, hash, obj.Data); err != nil {
+				shard.mu.RUnlock()
+				return err
+			}
+		}
+		shard.mu.RUnlock()
+	}
+	return nil
+}
+
+type memoryShard struct {
+	mu      sync.RWMutex
+	objects map[hashKey]Object
+}
+
+type memoryStore struct {
+	shards [shardCount]memoryShard
+}
+
+func newMemoryStore() *memoryStore {
+	s := &memoryStore{}
+	for i := range s.shards {
+		s.shards[i].objects = map[hashKey]Object{}
+	}
+	return s
+}
+
+func (s *memoryStore) put(t ObjectType, hash hashKey, data []byte) error {
+	shard := &s.shards[hash[0]]
+	shard.mu.Lock()
+	if _, ok := shard.objects[hash]; ok {
+		shard.mu.Unlock()
+		return nil
+	}
+	// Callers may pass borrowed memory (the C API does), so keep a copy
+	shard.objects[hash] = Object{Type: t, Data: append([]byte(nil), data...)}
+	shard.mu.Unlock()
+	return nil
+}
+
+func (s *memoryStore) view(hash hashKey, fn func(Object)) bool {
+	shard := &s.shards[hash[0]]
+	shard.mu.RLock()
+	obj, ok := shard.objects[hash]
+	shard.mu.RUnlock()
+	if ok {
+		fn(obj)
+	}
+	return ok
+}
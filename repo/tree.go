@@ -1,6 +1,11 @@
 package repo
 
-import "encoding/json"
+import (
+	"encoding/binary"
+	"encoding/hex"
+	"encoding/json"
+	"errors"
+)
 
 type TreeEntry struct {
 	Name string
@@ -8,17 +13,79 @@ type TreeEntry struct {
 	Hash string
 }
 
+// Trees are stored in a binary encoding: a 0 byte, then one record per entry
+//
+//	mode:u32le nameLength:uvarint name hash[32]
+//
+// Trees stored as JSON by earlier versions are still read.
+const binaryTree = 0
+
+var errBadTree = errors.New("malformed tree")
+
+// EncodeTree returns the stored form of a tree.
+func EncodeTree(entries []TreeEntry) ([]byte, error) {
+	buf := []byte{binaryTree}
+	var header [4 + binary.MaxVarintLen64]byte
+	for _, e := range entries {
+		hash, ok := parseHash(e.Hash)
+		if !ok {
+			return nil, errBadTree
+		}
+		binary.LittleEndian.PutUint32(header[:], e.Mode)
+		n := binary.PutUvarint(header[4:], uint64(len(e.Name)))
+		buf = append(buf, header[:4+n]...)
+		buf = append(buf, e.Name...)
+		buf = append(buf, hash[:]...)
+	}
+	return buf, nil
+}
+
+// DecodeTree parses the stored form of a tree.
+func DecodeTree(data []byte) ([]TreeEntry, error) {
+	if len(data) == 0 || data[0] != binaryTree {
+		var entries []TreeEntry
+		err := json.Unmarshal(data, &entries)
+		return entries, err
+	}
+	entries := []TreeEntry{}
+	for data = data[1:]; len(data) > 0; {
+		if len(data) < 4 {
+			return nil, errBadTree
+		}
+		mode := binary.LittleEndian.Uint32(data)
+		n, size := binary.Uvarint(data[4:])
+		if size <= 0 || uint64(len(data)-4-size) < n+32 {
+			return nil, errBadTree
+		}
+		data = data[4+size:]
+		name := string(data[:n])
+		entries = append(entries, TreeEntry{Name: name, Mode: mode, Hash: hex.EncodeToString(data[n : n+32])})
+		data = data[n+32:]
+	}
+	return entries, nil
+}
+
+// PutTree stores a tree; it returns "" if an entry hash is not a valid object hash.
 func PutTree(entries []TreeEntry) string {
-	data, _ := json.Marshal(entries)
+	data, err := EncodeTree(entries)
+	if err != nil {
+		return ""
+	}
 	return PutObject(Tree, data)
 }
 
 func ReadTree(hash string) ([]TreeEntry, bool) {
-	obj, ok := GetObject(hash)
-	if !ok || obj.Type != Tree {
+	var entries []TreeEntry
+	var err error
+	ok := ViewObject(hash, func(obj Object) {
+		if obj.Type != Tree {
+			err = errBadTree
+			return
+		}
+		entries, err = DecodeTree(obj.Data)
+	})
+	if !ok || err != nil {
 		return nil, false
 	}
-	var entries []TreeEntry
-	json.Unmarshal(obj.Data, &entries)
 	return entries, true
 }
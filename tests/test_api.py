@@ -0,0 +1,502 @@
+import asyncio
+import json
+import sys
+import time
+
+import pytest
+import requests
+import rlp
+from eth_abi import encode as abi_encode
+from eth_utils import keccak
+from fastapi.testclient import TestClient
+
+from api.blockchain_client import BlockchainClient
+from api.bulk_import import estimate_add_word_gas, import_to_chain, supports_add_words
+from api import tx_pipeline
+from api.response_cache import ResponseCache, tags_for_changes
+from api.tx_pipeline import TxPipeline
+from evm.core.blockchain_storage import BlockchainStorage
+from evm.execution.evm import EVM
+from evm.utils.helpers import encode_cursor
+
+
+class FakeResponse:
+    def __init__(self, body: bytes):
+        self.status_code = 200
+        self.content = body
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeNode:
+    """
+    Stand-in for the node behind a client's HTTP session. Serves the
+    Digitionary calls from ``words``, a list of (term, [(content, commitMsg)]),
+    and mines every sent transaction at once.
+    """
+
+    def __init__(self, client, words, batch=True):
+        self.client = client
+        self.words = words
+        self.batch = batch
+        self.add_words = True
+        self.staked = True
+        self.mine = True
+        self.batch_failures = 0
+        self.down = False
+        self.posts = []
+        self.receipts = {}
+        self.nonce = 0
+        client.provider.backoff = 0
+        client.provider.session.post = self.post
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        if self.down:
+            raise requests.ConnectionError("connection refused")
+        request = json.loads(data)
+        self.posts.append(request)
+        if not isinstance(request, list):
+            reply = self.reply(request)
+        elif self.batch_failures:
+            self.batch_failures -= 1
+            raise requests.ConnectionError("connection reset by peer")
+        elif self.batch:
+            reply = [self.reply(r) for r in request]
+        else:
+            reply = {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch requests are not supported"}}
+        return FakeResponse(json.dumps(reply).encode())
+
+    def reply(self, request):
+        method, params = request["method"], request["params"]
+        reply = {"jsonrpc": "2.0", "id": request["id"]}
+        if method == "eth_blockNumber":
+            reply["result"] = hex(16 + len(self.receipts))
+        elif method == "eth_chainId":
+            reply["result"] = "0x7a69"
+        elif method == "eth_gasPrice":
+            reply["result"] = "0x3b9aca00"
+        elif method == "eth_getTransactionCount":
+            reply["result"] = hex(self.nonce)
+        elif method == "web3_clientVersion":
+            reply["result"] = "HardhatNetwork/2.22.0"
+        elif method == "eth_sendRawTransaction":
+            reply["result"] = self.send(params[0])
+        elif method in ("eth_getTransactionReceipt", "eth_getTransactionByHash"):
+            reply["result"] = self.receipts.get(params[0])
+        elif method != "eth_call":
+            reply["error"] = {"code": -32601, "message": f"Method {method} is not supported"}
+        elif params[0]["to"].lower() != self.client.contract_address.lower():
+            reply["result"] = "0x"  # No contract there
+        else:
+            function, args = self.client.contract.decode_function_input(params[0]["data"])
+            output = self.call(function.fn_name, *args.values())
+            if output is None:
+                reply["error"] = {"code": 3, "message": "execution reverted"}
+            elif isinstance(output, str):
+                # A failed require: revert data is Error(string)
+                data = "0x08c379a0" + abi_encode(["string"], [output]).hex()
+                reply["error"] = {"code": 3, "message": f"execution reverted: {output}", "data": data}
+            else:
+                types = self.client._output_types[function.fn_name]
+                reply["result"] = "0x" + abi_encode(types, output).hex()
+        return reply
+
+    def call(self, name, *args):
+        author = self.client.server_account.address
+        if name == "wordCount":
+            return [len(self.words)]
+        if name == "getStake":
+            return [10 ** 18 if self.staked else 0]
+        if name == "addWords":
+            if not self.add_words:
+                return None  # No such function: no revert reason
+            return [len(self.words) + 1] if self.staked else "Must stake to participate"
+        if not 1 <= args[0] <= len(self.words):
+            return None
+        term, versions = self.words[args[0] - 1]
+        if name == "getWord":
+            return [args[0], term, author, True, len(versions)]
+        if name == "getLatestWordContent":
+            return [term, *versions[-1], 1700000000, author]
+        if name == "getWordVersion" and args[1] < len(versions):
+            return [*versions[args[1]], 1700000000, author]
+        return None
+
+    def send(self, raw):
+        nonce, _, _, _, _, data = rlp.decode(bytes.fromhex(raw.removeprefix("0x")))[:6]
+        self.nonce = int.from_bytes(nonce, "big") + 1
+        tx_hash = "0x" + keccak(bytes.fromhex(raw.removeprefix("0x"))).hex()
+        logs = []
+        if data:
+            function, args = self.client.contract.decode_function_input(data)
+            if function.fn_name == "stake":
+                self.staked = True
+            elif function.fn_name == "addWord":
+                self.words.append((args["_term"], [(args["_content"], args["_commitMsg"])]))
+                logs.append({"topics": [WORD_CREATED, "0x%064x" % len(self.words)]})
+            elif function.fn_name == "addWords":
+                first = len(self.words) + 1
+                for term, content, msg in zip(*args.values()):
+                    self.words.append((term, [(content, msg)]))
+                logs.append({"topics": [WORD_CREATED, "0x%064x" % first]})
+        if not self.mine:
+            return tx_hash
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash,
+            "blockNumber": hex(17 + len(self.receipts)),
+            "gasUsed": "0x5208",
+            "status": "0x1",
+            "logs": logs
+        }
+        return tx_hash
+
+
+WORD_CREATED = "0x" + keccak(text="WordCreated(uint256,string,address)").hex()
+
+
+def make_client(words, **kwargs):
+    client = BlockchainClient(**kwargs)
+    return client, FakeNode(client, words)
+
+
+WORDS = [(f"term{i}", [("first", "add"), (f"content{i}", "edit")]) for i in range(1, 6)]
+
+
+def test_batched_reads_survive_transient_failures():
+    client, node = make_client(WORDS)
+    client.provider.retries = 0
+
+    node.batch_failures = 1
+    with pytest.raises(requests.ConnectionError):
+        client.get_words([1, 2, 3])
+    # A dropped connection says nothing about batch support
+    assert client.rpc_batch_enabled
+
+    node.posts.clear()
+    words = client.get_words([1, 2, 3])
+    assert [w["term"] for w in words] == ["term1", "term2", "term3"]
+    assert len(node.posts) == 1 and len(node.posts[0]) == 6
+
+
+def test_batched_reads_fall_back_when_unsupported():
+    client, node = make_client(WORDS, multicall_address="0x" + "11" * 20)
+    node.batch = False
+
+    words = client.get_words([1, 2, 9])
+    assert [w.get("term") for w in words] == ["term1", "term2", None]
+    # No Multicall3 code and no batch support: both are off for good
+    assert client.multicall is None and not client.rpc_batch_enabled
+
+    node.posts.clear()
+    client.get_words([4])
+    assert [p["method"] for p in node.posts] == ["eth_call", "eth_call"]
+
+
+def test_chain_history_page_reads_only_existing_versions():
+    client, node = make_client(WORDS)
+    items, next_cursor = client.get_word_history_page(3, limit=50)
+    assert [v["content"] for v in items] == ["first", "content3"] and next_cursor is None
+
+    calls = [r for post in node.posts for r in (post if isinstance(post, list) else [post]) if r["method"] == "eth_call"]
+    # getWord, then one getWordVersion per version rather than per page slot
+    assert len(calls) == 3
+
+
+def test_chain_pages_validate_cursors():
+    client, _ = make_client(WORDS)
+
+    page, cursor = client.get_words_page(limit=2)
+    assert [w["id"] for w in page] == [1, 2]
+    assert [w["id"] for w in client.get_words_page(cursor, limit=2)[0]] == [3, 4]
+    items, next_cursor = client.get_word_history_page(3, limit=1)
+    assert [v["content"] for v in items] == ["first"] and next_cursor is not None
+    assert [v["index"] for v in client.get_word_history_page(3, next_cursor)[0]] == [1]
+
+    # Malformed cursors and cursors of other listings (here the fallback EVM's)
+    for bad in ("garbage", encode_cursor(["id", 2]), encode_cursor(-1)):
+        with pytest.raises(ValueError):
+            client.get_words_page(bad)
+        with pytest.raises(ValueError):
+            client.get_word_history_page(3, bad)
+
+
+def test_add_words_support_does_not_depend_on_staking():
+    client, node = make_client([])
+    node.staked = False
+    assert supports_add_words(client)
+
+    # An older deployment, then a redeployed contract at the same address
+    node.add_words = False
+    assert not supports_add_words(client)
+    node.add_words = True
+    assert supports_add_words(client)
+
+
+def test_chain_import_rejects_rows_too_large_for_a_transaction():
+    client, node = make_client([])
+    pipeline = TxPipeline(client, poll_interval=0.01)
+    entries = [{"term": "ubuntu", "content": "humanity", "commitMsg": "m"}, {"term": "indaba", "content": "x" * 500, "commitMsg": "m"}]
+
+    async def rows():
+        for number, entry in enumerate(entries, 1):
+            yield number, entry, None
+
+    async def run():
+        return [event async for event in import_to_chain(rows(), client, pipeline, max_gas=estimate_add_word_gas(entries[0]))]
+
+    pipeline.start()
+    try:
+        events = asyncio.run(run())
+    finally:
+        pipeline.stop()
+    assert {"type": "error", "row": 2, "error": "Row too large"} in events
+    assert {k: events[-1][k] for k in ("processed", "imported", "failed")} == {"processed": 2, "imported": 1, "failed": 1}
+    assert [term for term, _ in node.words] == ["ubuntu"]
+
+
+def test_pipeline_keeps_batching_after_transient_failures():
+    client, node = make_client([])
+    pipeline = TxPipeline(client, poll_interval=0.01)
+    pipeline.start()
+    try:
+        # The send batch is dropped; this round goes out one request at a time
+        node.batch_failures = 1
+        handles = [pipeline.submit("addWord", [f"t{i}", "c", "m"]) for i in range(3)]
+        results = [handle.future.result(timeout=5) for handle in handles]
+    finally:
+        pipeline.stop()
+    assert all(result["success"] for result in results)
+    assert sorted(result["word_id"] for result in results) == [1, 2, 3]
+    assert client.rpc_batch_enabled
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_pipeline_stop_fails_transactions_awaiting_receipts():
+    client, node = make_client([])
+    node.mine = False
+    pipeline = TxPipeline(client, poll_interval=0.01)
+    pipeline.start()
+    handle = pipeline.submit("addWord", ["t", "c", "m"])
+    wait_for(lambda: pipeline.status(handle.id)["status"] == "pending")
+
+    pipeline.stop()
+    result = handle.future.result(timeout=1)
+    assert result["status"] == "failed" and result["error"] == "Pipeline stopped"
+    assert pipeline.stats() == {"queued": 0, "in_flight": 0}
+
+
+def test_pipeline_resyncs_nonces_after_a_receipt_timeout():
+    client, node = make_client([])
+    node.mine = False
+    pipeline = TxPipeline(client, poll_interval=0.01, receipt_timeout=0.05)
+    pipeline.start()
+    try:
+        lost = pipeline.submit("addWord", ["t", "c", "m"]).future.result(timeout=5)
+        assert lost["error"] == "Timed out waiting for receipt" and lost["nonce"] == 0
+        # The node saw more transactions from the account meanwhile
+        node.nonce, node.mine = 5, True
+        result = pipeline.submit("addWord", ["t", "c", "m"]).future.result(timeout=5)
+    finally:
+        pipeline.stop()
+    assert result["success"] and result["nonce"] == 5
+
+
+def test_pipeline_evicts_finished_handles_past_unfinished_ones(monkeypatch):
+    monkeypatch.setattr(tx_pipeline, "MAX_FINISHED_HANDLES", 2)
+    client, node = make_client([])
+    pipeline = TxPipeline(client, poll_interval=0.01)
+    pipeline.start()
+    try:
+        node.mine = False
+        stuck = pipeline.submit("addWord", ["stuck", "c", "m"])
+        wait_for(lambda: pipeline.status(stuck.id)["status"] == "pending")
+        node.mine = True
+        handles = [pipeline.submit("addWord", [f"t{i}", "c", "m"]) for i in range(4)]
+        for handle in handles:
+            handle.future.result(timeout=5)
+        assert pipeline.status(stuck.id)["status"] == "pending"
+        assert [pipeline.status(h.id) is not None for h in handles] == [False, False, True, True]
+    finally:
+        pipeline.stop()
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """
+    api.main imported afresh: its fallback EVM lives in tmp_path and applies
+    writes at once, and the node is only probed at startup and by the test.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DIGITIONARY_BLOCKS", "0")
+    monkeypatch.setenv("DIGITIONARY_REPLICA", "0")
+    monkeypatch.setenv("DIGITIONARY_HEALTH_INTERVAL", "3600")
+    monkeypatch.delitem(sys.modules, "api.main", raising=False)
+    import api.main
+    return api.main
+
+
+def test_health_answers_before_the_first_probe(server, monkeypatch):
+    async def hang():
+        await asyncio.Event().wait()
+    monkeypatch.setattr(server, "_probe_chain", hang)
+
+    with TestClient(server.app) as http:
+        assert http.get("/api/health").json() == {"status": "ok", "blockchain": False, "probed": False}
+
+
+def serve(server, monkeypatch, words, up=True):
+    """A TestClient whose node is a FakeNode serving ``words``."""
+    client, node = make_client(list(words))
+    node.down = not up
+    monkeypatch.setattr(server, "get_blockchain_client", lambda: client)
+    return TestClient(server.app), node
+
+
+def add_words(http, count, address="0xabc"):
+    for i in range(1, count + 1):
+        response = http.post("/api/chain/transaction", params={"address": address},
+                             json={"action": "addWord", "term": f"local{i}", "content": f"c{i}", "commitMsg": "m"})
+        assert response.status_code == 200
+
+
+def test_app_switches_backends_as_the_node_comes_and_goes(server, monkeypatch):
+    http, node = serve(server, monkeypatch, WORDS, up=False)
+    with http:
+        assert http.get("/api/chain/status").json()["blockchain_type"] == "fallback_evm"
+        add_words(http, 1)
+        assert http.get("/api/chain/word/1").json()["term"] == "local1"
+
+        node.down = False
+        http.portal.call(server._probe_chain)
+        assert http.get("/api/health").json()["blockchain"]
+        assert http.get("/api/chain/status").json()["blockchain_type"] == "hardhat"
+        assert http.get("/api/chain/word/1").json()["term"] == "term1"
+        response = http.post("/api/chain/transaction", params={"address": "0xabc"},
+                             json={"action": "addWord", "term": "onchain", "content": "c", "commitMsg": "m"})
+        assert response.json()["wordId"] == len(WORDS) + 1
+
+        node.down = True
+        http.portal.call(server._probe_chain)
+        assert not http.get("/api/health").json()["blockchain"]
+        assert http.get("/api/chain/word/1").json()["term"] == "local1"
+        assert http.get("/api/chain/word/2").status_code == 404
+
+
+def test_app_chain_reads_fall_back_to_single_requests(server, monkeypatch):
+    http, node = serve(server, monkeypatch, WORDS)
+    node.batch = False
+    with http:
+        page = http.get("/api/chain/words", params={"limit": 3}).json()
+        assert [w["term"] for w in page["items"]] == ["term1", "term2", "term3"]
+        assert not server.blockchain_client.rpc_batch_enabled
+
+        node.posts.clear()
+        word = http.get("/api/chain/word/4").json()
+        assert word["content"] == "content4" and word["version_count"] == 2
+        assert all(not isinstance(post, list) for post in node.posts)
+
+
+def test_app_streams_listings_as_ndjson(server, monkeypatch):
+    monkeypatch.setattr(server, "STREAM_PAGE_SIZE", 2)
+    http, _ = serve(server, monkeypatch, WORDS, up=False)
+    with http:
+        add_words(http, 5)
+        response = http.get("/api/chain/words", params={"stream": "true"})
+        assert response.headers["content-type"] == "application/x-ndjson"
+        # One JSON object per line, each line terminated, across page boundaries
+        assert response.text.endswith("\n")
+        lines = response.text.split("\n")[:-1]
+        assert [json.loads(line)["id"] for line in lines] == [1, 2, 3, 4, 5]
+
+        cursor = http.get("/api/chain/words", params={"limit": 2}).json()["next_cursor"]
+        response = http.get("/api/chain/words", params={"stream": "true", "cursor": cursor})
+        assert [json.loads(line)["id"] for line in response.text.splitlines()] == [3, 4, 5]
+        assert http.get("/api/chain/words", params={"stream": "true", "cursor": "garbage"}).status_code == 400
+
+
+def test_app_cached_reads_answer_304_until_the_state_changes(server, monkeypatch):
+    http, _ = serve(server, monkeypatch, WORDS, up=False)
+    with http:
+        add_words(http, 2)
+        first = http.get("/api/chain/words", params={"limit": 10})
+        etag = first.headers["etag"]
+        again = http.get("/api/chain/words", params={"limit": 10}, headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+
+        add_words(http, 1, address="0xdef")
+        changed = http.get("/api/chain/words", params={"limit": 10}, headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+        assert len(changed.json()["items"]) == 3
+
+
+@pytest.mark.parametrize("up", [False, True])
+def test_app_bulk_import_streams_progress(server, monkeypatch, up):
+    http, node = serve(server, monkeypatch, [], up=up)
+    body = "\n".join([
+        json.dumps({"term": "ubuntu", "content": "humanity"}),
+        json.dumps({"term": "", "content": "no term"}),
+        json.dumps({"term": "indaba", "content": "meeting", "commitMsg": "import"}),
+        "not json"
+    ]) + "\n"
+    with http:
+        response = http.post("/api/chain/import", params={"address": "0xabc"}, content=body)
+        assert response.headers["content-type"] == "application/x-ndjson"
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(e["row"] for e in events if e["type"] == "error") == [2, 4]
+        assert events[-1]["type"] == "done"
+        assert {k: events[-1][k] for k in ("processed", "imported", "failed")} == {"processed": 4, "imported": 2, "failed": 2}
+        terms = [w["term"] for w in http.get("/api/chain/words", params={"limit": 10}).json()["items"]]
+        assert terms == ["ubuntu", "indaba"]
+    if not up:
+        # Block production is off in these tests: no block is sealed
+        assert server.fallback_evm.block_number == 0
+    if up:
+        # Both rows went out in one addWords transaction
+        requests_sent = [r for post in node.posts for r in (post if isinstance(post, list) else [post])]
+        assert [r["method"] for r in requests_sent].count("eth_sendRawTransaction") == 1
+
+
+def test_app_starts_its_parallel_workers_on_startup(server, monkeypatch):
+    monkeypatch.setenv("DIGITIONARY_BLOCKS", "1")
+    monkeypatch.setenv("DIGITIONARY_PARALLEL_WORKERS", "1")
+    monkeypatch.delitem(sys.modules, "api.main")
+    import api.main as blocks_server
+    # No worker is forked from the importing process
+    assert blocks_server.block_builder.executor is None
+
+    http, _ = serve(blocks_server, monkeypatch, [], up=False)
+    with http:
+        executor = blocks_server.block_builder.executor
+        assert executor.pool._mp_context.get_start_method() == "spawn"
+        add_words(http, 1)
+    with pytest.raises(RuntimeError):
+        executor.pool.submit(abs, 1)
+
+
+def test_writes_invalidate_cached_responses(tmp_path):
+    evm = EVM(storage=BlockchainStorage(str(tmp_path / "chain.json"), journal=True))
+    cache = ResponseCache(max_entries=2)
+    evm.add_listener(lambda changes: cache.invalidate(tags_for_changes(changes)))
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "a", "content": "x", "commitMsg": "m"})
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "b", "content": "y", "commitMsg": "m"})
+
+    for key, tags in (("word1", ("word:1",)), ("word2", ("word:2",)), ("words", ("words",))):
+        cache.put(key, tags, json.dumps(key).encode(), cache.version)
+    assert cache.get("word1") is None  # evicted, least recently used
+    assert cache.get("word2").matches(cache.get("word2").etag)
+
+    # A response computed before a write is not stored after it
+    version = cache.version
+    evm.execute_transaction("0xabc", {"action": "updateWord", "wordId": 1, "content": "z", "commitMsg": "m"})
+    cache.put("word1", ("word:1",), b"stale", version)
+    assert cache.get("word1") is None
+    # Only responses depending on what changed are dropped
+    assert cache.get("word2") is not None and cache.get("words") is None
+    assert cache.stats()["evictions"] == 1 and cache.stats()["invalidations"] == 1
@@ -0,0 +1,222 @@
+import pytest
+
+from evm.core.merkle import SparseMerkleTree
+from evm.core.state import StateManager
+from evm.execution.interpreter import Interpreter, analyze_code
+from evm.utils.helpers import assemble, encode_cursor
+
+
+def make_state():
+    state = StateManager()
+    state.add_word("Ubuntu", "humanity", "init", "0xAAA", timestamp=100)
+    state.add_word("umuntu", "person", "init", "0xbbb", timestamp=200)
+    state.add_word("indaba", "meeting", "init", "0xaaa", timestamp=300)
+    state.add_word("ubuntu", "humaneness", "init", "0xbbb", timestamp=400)
+    state.update_word(1, "humanity towards others", "edit", "0xbbb", timestamp=500)
+    return state
+
+
+def ids(words):
+    return [w["id"] for w in words]
+
+
+def test_query_words_by_term_prefix_and_author():
+    state = make_state()
+
+    assert ids(state.query_words(term="UBUNTU")[0]) == [1, 4]
+    assert ids(state.query_words(prefix="um")[0]) == [2]
+    assert ids(state.query_words(prefix="u")[0]) == [1, 4, 2]
+    assert ids(state.query_words(author="0xaaa")[0]) == [1, 3]
+    assert ids(state.query_words(author="0xbbb", prefix="ub")[0]) == [4]
+
+
+def test_query_words_by_latest_version_time():
+    state = make_state()
+
+    assert ids(state.query_words(since=300)[0]) == [3, 4, 1]
+    assert ids(state.query_words(since=150, until=400)[0]) == [2, 3, 4]
+
+
+def test_query_words_cursor_pagination():
+    state = make_state()
+
+    page, cursor = state.query_words(limit=3)
+    assert ids(page) == [1, 2, 3]
+    page, cursor = state.query_words(limit=3, cursor=cursor)
+    assert ids(page) == [4]
+    assert cursor is None
+
+    page, cursor = state.query_words(prefix="u", limit=2)
+    assert ids(page) == [1, 4]
+    assert ids(state.query_words(prefix="u", limit=2, cursor=cursor)[0]) == [2]
+
+
+def test_query_words_cursor_keeps_its_index():
+    state = make_state()
+    state.add_word("uzalo", "story", "init", "0xaaa", timestamp=600)
+
+    # Read from the author index, the smallest when the first page is read
+    page, cursor = state.query_words(author="0xaaa", prefix="u", limit=1)
+    assert ids(page) == [1]
+    for term in ("isizwe", "inkosi", "indlela"):
+        state.add_word(term, "x", "init", "0xaaa", timestamp=700)
+    assert ids(state.query_words(author="0xaaa", prefix="u", limit=1, cursor=cursor)[0]) == [5]
+
+    with pytest.raises(ValueError):
+        state.query_words(prefix="u", cursor=cursor)
+    with pytest.raises(ValueError):
+        state.query_words(cursor=encode_cursor(["prefix", 3]))
+    with pytest.raises(ValueError):
+        state.query_words(cursor="not a cursor")
+
+
+def test_query_dictionaries_by_author():
+    state = make_state()
+    state.create_dictionary("isiXhosa", [1, 2], "0xaaa")
+    state.create_dictionary("isiZulu", [3], "0xbbb")
+    state.create_dictionary("Nguni", [1, 3], "0xAAA")
+
+    assert ids(state.query_dictionaries(author="0xaaa")[0]) == [1, 3]
+    page, cursor = state.query_dictionaries(limit=2)
+    assert ids(page) == [1, 2]
+    assert ids(state.query_dictionaries(cursor=cursor)[0]) == [3]
+
+
+def test_indexes_survive_snapshot_round_trip():
+    state = make_state()
+    restored = StateManager()
+    restored.from_dict(state.to_dict())
+
+    assert ids(restored.query_words(prefix="u")[0]) == [1, 4, 2]
+    assert ids(restored.query_words(since=450)[0]) == [1]
+
+
+def test_search_ranks_term_matches_first():
+    state = make_state()
+    state.add_word("imbizo", "a meeting called by a chief", "init", "0xaaa", timestamp=600)
+
+    results = state.search_words("meeting")
+    assert {w["id"] for w in results} == {3, 5}
+    assert state.search_words("indaba")[0]["id"] == 3
+
+
+def test_search_prefix_fuzzy_and_incremental_update():
+    state = make_state()
+
+    assert {w["id"] for w in state.search_words("ubun")} == {1, 4}
+    assert {w["id"] for w in state.search_words("ubnutu", prefix=False)} == {1, 4}
+    assert state.search_words("ubnutu", prefix=False, fuzzy=False) == []
+
+    # Word 1's latest content replaced "humanity" with "humanity towards others"
+    assert {w["id"] for w in state.search_words("towards")} == {1}
+    state.update_word(1, "compassion", "rewrite", "0xaaa", timestamp=700)
+    assert state.search_words("towards") == []
+    [hit] = state.search_words("compassion")
+    # A summary: the latest version only
+    assert hit["id"] == 1 and hit["versionCount"] == 3
+    assert [v["content"] for v in hit["history"]] == ["compassion"]
+
+
+def test_revert_operations_restore_indexes():
+    state = make_state()
+    state.create_dictionary("isiXhosa", [1, 2], "0xaaa")
+
+    state.revert_create_dictionary(1)
+    state.revert_update_word(1)
+    state.revert_add_word(4)
+
+    assert state.word_count == 3 and state.dictionary_count == 0
+    assert state.words[1]["history"][-1]["content"] == "humanity"
+    assert ids(state.query_words(term="ubuntu")[0]) == [1]
+    assert ids(state.query_words(since=150)[0]) == [2, 3]
+    assert ids(state.query_dictionaries(author="0xaaa")[0]) == []
+    assert {w["id"] for w in state.search_words("humanity")} == {1}
+    assert state.search_words("towards") == []
+
+
+def test_interpreter_runs_loop_and_returns_word():
+    code = assemble("""
+        PUSH1 10
+        loop: JUMPDEST
+        PUSH1 1 SWAP1 SUB DUP1 PUSH2 @loop JUMPI
+        PUSH1 7 PUSH1 6 MUL PUSH1 0 MSTORE
+        PUSH1 32 PUSH1 0 RETURN
+    """)
+    result = Interpreter().execute(code)
+
+    assert result.success
+    assert int.from_bytes(result.output, "big") == 42
+    # Loop body is 7 instructions, run 10 times
+    assert result.steps == 1 + 7 * 10 + 8
+    assert analyze_code(code) is analyze_code(bytes(code))
+
+
+def test_interpreter_failures_consume_gas_and_reverts_do_not():
+    interpreter = Interpreter()
+
+    # 0x04 is PUSH1's immediate, not a JUMPDEST
+    bad_jump = interpreter.execute(assemble("PUSH1 4 JUMP PUSH1 0x5b"), gas=1000)
+    assert not bad_jump.success and bad_jump.gas_used == 1000
+
+    out_of_gas = interpreter.execute(assemble("PUSH1 1 PUSH1 0 SSTORE"), gas=5000)
+    assert not out_of_gas.success and out_of_gas.gas_left == 0
+
+    reverted = interpreter.execute(assemble("PUSH1 0xaa PUSH1 0 MSTORE8 PUSH1 1 PUSH1 0 REVERT"), gas=1000)
+    assert not reverted.success and reverted.output == b"\xaa" and reverted.gas_left > 0
+
+
+def test_state_root_is_incremental_and_proves_words():
+    state = make_state()
+    root = state.state_root()
+    state.add_word("sawubona", "hello", "init", "0xaaa", timestamp=600)
+    state.create_dictionary("isiZulu", [1, 5], "0xaaa")
+    assert state.state_root() != root
+
+    # Same root as hashing the final state from scratch
+    rebuilt = StateManager()
+    rebuilt.from_dict(state.to_dict())
+    assert rebuilt.state_root() == state.state_root()
+
+    state.revert_create_dictionary(1)
+    state.revert_add_word(5)
+    assert state.state_root() == root
+
+    proof = state.prove_word(2)
+    valid = SparseMerkleTree.verify(
+        bytes.fromhex(proof["stateRoot"][2:]), bytes.fromhex(proof["key"][2:]),
+        StateManager.record_hash(proof["record"]), [bytes.fromhex(s[2:]) for s in proof["siblings"]]
+    )
+    assert valid and proof["record"]["term"] == "umuntu"
+    assert state.prove_word(99) is None
+
+
+def test_diff_state_finds_changed_entries():
+    ours, theirs = make_state(), make_state()
+    assert ours.diff_state(theirs.state_node) == []
+
+    theirs.update_word(3, "gathering", "edit", "0xaaa", timestamp=600)
+    theirs.add_word("sawubona", "hello", "init", "0xaaa", timestamp=700)
+
+    assert sorted((d["kind"], d["id"]) for d in ours.diff_state(theirs.state_node)) == [("word", 3), ("word", 5)]
+
+
+def test_diff_state_labels_entries_only_the_peer_holds():
+    ours, theirs = make_state(), make_state()
+    theirs.words[5000] = dict(theirs.words[1], id=5000)
+    theirs._touch("word", 5000)
+    theirs.get_account("0x" + "ab" * 20).storage[7] = 1
+    theirs._touch("slot", ("0x" + "ab" * 20, 7))
+    node = theirs.state_node
+
+    diffs = ours.diff_state(node)
+    assert ("word", 5000) in [(d["kind"], d["id"]) for d in diffs]
+    assert ("slot", ["0x" + "ab" * 20, 7]) in [(d["kind"], d["id"]) for d in diffs]
+
+    # A label that doesn't hash to the leaf's key is not trusted
+    def forged(path):
+        summary = node(path)
+        if summary["type"] == "leaf" and summary["id"] == 5000:
+            summary["id"] = 5001
+        return summary
+    assert ("word", 5000) not in [(d["kind"], d["id"]) for d in ours.diff_state(forged)]
+    assert (None, None) in [(d["kind"], d["id"]) for d in ours.diff_state(forged)]
@@ -0,0 +1,107 @@
+import json
+
+import pytest
+
+from evm.core import history, objects
+from evm.core.blockchain_storage import StorageCorruptedError
+from evm.core.state import StateManager
+
+
+def test_word_history_is_stored_as_deltas():
+    state = StateManager()
+    base = "umuntu ngumuntu ngabantu " * 40
+    contents = [f"{base}(revision {i})" for i in range(40)]
+    word_id = state.add_word("ubuntu", contents[0], "init", "0xabc", timestamp=1)
+    for i, content in enumerate(contents[1:], start=1):
+        state.update_word(word_id, content, f"edit {i}", "0xabc", timestamp=1 + i)
+
+    stored = state.words[word_id]["history"]
+    assert stored[-1]["content"] == contents[-1]
+    assert all("content" not in entry for entry in stored[:-1])
+    # One full copy (the 32nd version) besides the latest; the rest are deltas
+    assert sum("blob" in entry for entry in stored) == 1
+    assert [v["content"] for v in state.word_history(word_id)] == contents
+    assert state.get_version(word_id, 5) == {
+        "content": contents[5], "commitMsg": "edit 5", "timestamp": 6, "author": "0xabc"
+    }
+    assert state.get_version(word_id, -1)["content"] == contents[-1]
+    assert state.get_version(word_id, 40) is None
+
+    copy = StateManager()
+    copy.from_dict(json.loads(json.dumps(state.to_dict())))
+    assert copy.word_history(word_id) == state.word_history(word_id)
+    assert copy.state_root() == state.state_root()
+
+
+def test_history_pages_read_only_their_versions(monkeypatch):
+    state = StateManager()
+    contents = [f"definition, revision {i}" for i in range(40)]
+    word_id = state.add_word("ubuntu", contents[0], "init", "0xabc", timestamp=1)
+    for i, content in enumerate(contents[1:], start=1):
+        state.update_word(word_id, content, f"edit {i}", "0xabc", timestamp=1 + i)
+
+    assert state.get_all_words() == [{
+        "id": word_id, "term": "ubuntu", "owner": "0xabc", "active": True, "versionCount": 40,
+        "history": [{"content": contents[-1], "commitMsg": "edit 39", "timestamp": 40, "author": "0xabc"}]
+    }]
+    assert state.query_words(term="ubuntu")[0] == state.get_all_words()
+
+    reads = []
+    get_blobs = history.get_blobs
+    monkeypatch.setattr(history, "get_blobs", lambda hashes: reads.append(len(hashes)) or get_blobs(hashes))
+    pages, cursor = [], None
+    while True:
+        page, cursor = state.history_page(word_id, cursor, limit=15)
+        pages.append(page)
+        if cursor is None:
+            break
+    assert [[v["index"] for v in page] for page in pages] == [list(range(0, 15)), list(range(15, 30)), list(range(30, 40))]
+    assert [v["content"] for page in pages for v in page] == contents
+    # Each page walks back from the keyframe (index 31) or the latest version, not from the end
+    assert reads == [32, 17, 9]
+    assert state.history_page(99) is None
+
+
+def test_reverted_update_restores_inline_history():
+    state = StateManager()
+    word_id = state.add_word("indaba", "meeting", "init", "0xabc")
+    checkpoint = state.checkpoint()
+    state.update_word(word_id, "gathering", "edit", "0xabc")
+    assert len(state.history_objects) == 1
+    state.revert(checkpoint)
+
+    assert state.words[word_id]["history"][0]["content"] == "meeting"
+    assert len(state.words[word_id]["history"]) == 1
+    assert state.history_objects == {}
+
+
+def test_snapshots_only_read_new_history_objects(monkeypatch):
+    state = StateManager()
+    word_id = state.add_word("indaba", "meeting", "init", "0xabc")
+    state.update_word(word_id, "gathering", "edit", "0xabc")
+    reads = []
+    get_blobs = objects.get_blobs
+    monkeypatch.setattr(objects, "get_blobs", lambda hashes: reads.append(list(hashes)) or get_blobs(hashes))
+
+    first = state.to_dict()
+    assert state.to_dict() == first
+    state.update_word(word_id, "council", "edit", "0xabc")
+    state.to_dict()
+    assert [len(hashes) for hashes in reads] == [1, 0, 1]
+
+    # Blobs restored from a snapshot are not read back from the store either
+    restored = StateManager()
+    restored.from_dict(first)
+    reads.clear()
+    assert restored.to_dict()["history_objects"] == first["history_objects"]
+    assert reads == [[]]
+
+
+def test_missing_history_object_is_a_storage_error(monkeypatch):
+    state = StateManager()
+    word_id = state.add_word("indaba", "meeting", "init", "0xabc")
+    state.update_word(word_id, "gathering", "edit", "0xabc")
+    monkeypatch.setattr(objects, "get_blobs", lambda hashes: [None] * len(hashes))
+
+    with pytest.raises(StorageCorruptedError):
+        state.to_dict()
@@ -0,0 +1,48 @@
+from evm.core.gas import memory_cost
+from evm.core.memory import Memory
+
+
+def test_growth_is_word_aligned_and_zero_filled():
+    memory = Memory()
+    memory.grow(33)
+
+    assert len(memory) == 64
+    assert memory.read(0, 64) == bytes(64)
+    memory.write_byte(63, 0x1ff)
+    memory.grow(65)
+    assert memory.read(60, 8) == b"\x00\x00\x00\xff\x00\x00\x00\x00"
+
+
+def test_expansion_cost_is_incremental():
+    memory = Memory()
+    total = 0
+    for end in (32, 32, 100, 1024, 1000, 70000):
+        cost = memory.expansion_cost(end)
+        memory.grow(end)
+        total += cost
+
+    assert memory.expansion_cost(10) == 0
+    assert total == memory.cost == memory_cost(70016 // 32)
+
+
+def test_view_is_zero_copy_and_survives_growth():
+    memory = Memory()
+    memory.grow(32)
+    memory.write_word(0, 42)
+    view = memory.view(0, 32)
+
+    memory.write_byte(0, 7)
+    assert view[0] == 7
+    # Growing while a view is alive moves memory to a new buffer
+    memory.grow(4096)
+    memory.write_byte(0, 9)
+    assert memory.read_word(0) >> 248 == 9 and int.from_bytes(view[1:], "big") == 42
+
+
+def test_copy_from_pads_past_the_source():
+    memory = Memory()
+    memory.grow(64)
+    memory.write(0, b"\xff" * 64)
+    memory.copy_from(8, b"abcdef", 4, 8)
+
+    assert memory.read(0, 20) == b"\xff" * 8 + b"ef" + bytes(6) + b"\xff" * 4
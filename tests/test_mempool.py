@@ -0,0 +1,51 @@
+import os
+
+from evm.core.blockchain_storage import BlockchainStorage
+from evm.core.mempool import Mempool
+from evm.execution.block_builder import BlockBuilder
+from evm.execution.evm import EVM
+
+
+def make_evm(tmp_path, **kwargs):
+    storage = BlockchainStorage(str(tmp_path / "chain.json"), journal=True, **kwargs)
+    return EVM(storage=storage)
+
+
+def test_mempool_orders_by_sender_nonce():
+    pool = Mempool()
+    a1, a2, a3 = (pool.add("0xaaa", {"action": "addWord", "n": i}) for i in range(3))
+    b1 = pool.add("0xbbb", {"action": "addWord"})
+
+    assert [tx.nonce for tx in (a1, a2, a3, b1)] == [0, 1, 2, 0]
+    assert pool.pop_batch(3) == [a1, b1, a2]
+    assert pool.pop_batch(3) == [a3] and len(pool) == 0
+
+    # A sender's confirmed transactions don't count against it later
+    flood = [pool.add("0xccc", {"action": "addWord"}) for _ in range(5)]
+    a4 = pool.add("0xaaa", {"action": "addWord"})
+    assert pool.pop_batch(2) == flood[:1] + [a4]
+
+
+def test_blocks_are_sealed_and_replayed(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+    evm = make_evm(tmp_path)
+    builder = BlockBuilder(evm, block_size=3)
+    txs = [builder.submit("0xabc", {"action": "addWord", "term": f"w{i}", "content": "c", "commitMsg": "m"}) for i in range(4)]
+    bad = builder.submit("0xdef", {"action": "updateWord", "wordId": 99, "content": "c"})
+
+    first, second = builder.build_block(), builder.build_block()
+    assert builder.build_block() is None
+    assert len(fsyncs) == 2
+    assert [tx.block_number for tx in txs] == [1, 1, 2, 2] and txs[3].result["wordId"] == 4
+    assert bad.status == "failed" and bad.block_number is None
+    # bad has nonce 0, so it went into the first block with w0 and w1
+    assert second["parentHash"] == first["hash"] and first["txCount"] == second["txCount"] == 2
+    assert second["stateRoot"] == evm.state.state_root()
+    timestamps = {word["history"][0]["timestamp"] for word in list(evm.state.words.values())[:2]}
+    assert timestamps == {first["timestamp"]}
+
+    reloaded = make_evm(tmp_path)
+    assert reloaded.block_number == 2 and reloaded.get_block(2) == second
+    assert reloaded.state.state_root() == second["stateRoot"]
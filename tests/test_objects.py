@@ -0,0 +1,92 @@
+import pytest
+
+from evm.core import dictionary_tree
+from evm.core.state import StateManager
+
+
+def test_object_store_packfile_survives_reopen(tmp_path):
+    try:
+        import repo
+    except (ImportError, OSError):
+        pytest.skip("librepo.so is not built")
+    path = str(tmp_path / "objects")
+    repo.open_store(path)
+    try:
+        hashes = [repo.put_blob(f"blob {i}".encode()) for i in range(100)]
+        assert repo.put_blob(b"blob 0") == hashes[0]
+        repo.flush_store()
+        late = repo.put_blob(b"written after the index")
+    finally:
+        repo.close_store()
+    # Back in memory: nothing from the pack is visible
+    assert repo.get_object(late) is None
+
+    repo.open_store(path)
+    try:
+        assert repo.get_object(hashes[42]) == b"blob 42"
+        assert repo.get_object(late) == b"written after the index"
+    finally:
+        repo.close_store()
+
+
+def test_object_store_batches_are_binary_safe():
+    try:
+        import repo
+    except (ImportError, OSError):
+        pytest.skip("librepo.so is not built")
+    blobs = [b"a\x00b", b"", bytes(range(256))]
+    hashes = repo.put_blobs(blobs)
+    assert hashes[0] == repo.put_blob(b"a\x00b")
+    assert repo.get_objects(hashes + ["0" * 64]) == blobs + [None]
+
+    leaf = repo.put_tree([{"Name": "a", "Mode": 0o100644, "Hash": hashes[0]}])
+    root = repo.put_tree([
+        {"Name": "sub", "Mode": repo.TREE_MODE, "Hash": leaf},
+        {"Name": "b", "Mode": 0o100644, "Hash": hashes[1]}
+    ])
+    assert [path for path, _ in repo.walk_tree(root)] == ["sub", "b", "sub/a"]
+
+
+def test_object_store_checks_hash_lengths():
+    try:
+        import repo
+    except (ImportError, OSError):
+        pytest.skip("librepo.so is not built")
+    hash_ = repo.put_blob(b"checked")
+    length = repo.ffi.new("long long *")
+    # Too short a buffer is rejected instead of read past its end
+    assert repo.lib.get_object_n(hash_[:10].encode(), 10, length) == repo.ffi.NULL
+    assert length[0] == -1
+    types, lengths = repo.ffi.new("unsigned char[]", 2), repo.ffi.new("long long[]", 2)
+    assert repo.lib.get_objects(hash_.encode(), 64, 2, types, lengths) == repo.ffi.NULL
+    out = repo.ffi.new("char[32]")
+    assert repo.lib.put_object(repo.BLOB, b"x", 1, out, len(out)) != 0
+    # 64 characters, but not 64 bytes
+    assert repo.get_object("é" * 32 + "0" * 32) is None
+    assert repo.get_object(hash_) == b"checked"
+
+
+def test_dictionary_diff_reads_only_changed_subtrees(monkeypatch):
+    monkeypatch.setattr(dictionary_tree, "BUCKET_SIZE", 4)
+    state = StateManager()
+    ids = [state.add_word(f"term{i}", f"content {i}", "init", "0xabc", timestamp=1) for i in range(200)]
+    first = state.create_dictionary("v1", ids, "0xabc", timestamp=2)
+    state.update_word(ids[7], "revised", "edit", "0xabc", timestamp=3)
+    added = state.add_word("fresh", "new entry", "init", "0xabc", timestamp=4)
+    second = state.create_dictionary("v2", ids[1:] + [added], "0xabc", timestamp=5)
+
+    diff = state.diff_dictionaries(first, second)
+    assert diff["added"] == [{"term": "fresh", "words": [{"id": added, "version": 1}]}]
+    assert diff["removed"] == [{"term": "term0", "words": [{"id": ids[0], "version": 1}]}]
+    assert diff["changed"] == [{
+        "term": "term7",
+        "before": [{"id": ids[7], "version": 1}],
+        "after": [{"id": ids[7], "version": 2}]
+    }]
+    # A few paths from the root, not the ~100 trees of each release
+    assert diff["treesRead"] < 30
+    assert state.diff_dictionaries(first, first)["treesRead"] == 0
+
+    # Same terms and versions, same tree
+    again = state.create_dictionary("v2 again", list(reversed(ids[1:] + [added])), "0xabc")
+    assert state.dictionaries[again]["tree"] == state.dictionaries[second]["tree"]
@@ -0,0 +1,42 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from evm.core.blockchain_storage import BlockchainStorage
+from evm.execution.evm import EVM
+from evm.execution.parallel import ParallelExecutor
+from evm.utils.helpers import assemble
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_parallel_block_matches_serial_execution(tmp_path, processes):
+    # Runtime: slot[calldata[0]] += 1, return the new value
+    runtime = assemble("""
+        PUSH1 0 CALLDATALOAD DUP1 SLOAD PUSH1 1 ADD
+        DUP1 PUSH1 0 MSTORE SWAP1 SSTORE PUSH1 32 PUSH1 0 RETURN
+    """)
+    init = assemble(f"PUSH1 {len(runtime)} PUSH1 12 PUSH1 0 CODECOPY PUSH1 {len(runtime)} PUSH1 0 RETURN") + runtime
+    sender = "0x" + "ab" * 20
+    # Slot 0 is shared by every other call; the rest touch their own slot
+    keys = [0 if i % 2 else i + 1 for i in range(10)]
+
+    def run(path, parallel):
+        evm = EVM(storage=BlockchainStorage(str(path), journal=True))
+        address = evm.execute_transaction(sender, {"action": "deployContract", "data": init.hex()})["address"]
+        block = [(sender, {"action": "callContract", "address": address, "data": f"{k:064x}"}) for k in keys]
+        block.insert(3, (sender, {"action": "addWord", "term": "t", "content": "c", "commitMsg": "m"}))
+        pool = ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) if processes else None
+        executor = ParallelExecutor(evm, pool, workers=4) if parallel else None
+        results, _ = (executor or evm).execute_block(block, **({} if parallel else {"timestamp": 1}))
+        return evm, executor, [(r["success"], r.get("output"), r.get("gasUsed")) for r in results], address
+
+    serial, _, serial_results, address = run(tmp_path / "serial.json", False)
+    parallel, executor, parallel_results, _ = run(tmp_path / "parallel.json", True)
+
+    assert parallel_results == serial_results
+    assert parallel.state.accounts[address].storage == serial.state.accounts[address].storage
+    assert parallel.state.accounts[address].storage[0] == 5
+    # The first call to slot 0 speculates correctly; the other four conflict
+    assert executor.stats() == {"speculated": 6, "reexecuted": 4}
+    executor.shutdown()
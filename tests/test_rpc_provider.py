@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from api.rpc_provider import PooledHTTPProvider
+
+
+class StubResponse:
+    def __init__(self, status_code: int, body: dict = None):
+        self.status_code = status_code
+        self.content = json.dumps(body or {}).encode()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+class StubEndpoint:
+    """
+    Stand-in for the node behind a provider's session. ``replies`` maps a
+    method to a list of outcomes used in turn (the last one repeats): a
+    result, an HTTP status, or an exception to raise.
+    """
+
+    def __init__(self, provider, replies):
+        self.replies = {method: list(outcomes) for method, outcomes in replies.items()}
+        self.posts = []
+        self.gate = None  # threading.Event posts wait on, if set
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        provider.backoff = 0
+        provider.session.post = self.post
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        request = json.loads(data)
+        with self._lock:
+            self.posts.append(request["method"])
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if self.gate is not None:
+                self.gate.wait(5)
+            outcomes = self.replies[request["method"]]
+            outcome = outcomes.pop(0) if len(outcomes) > 1 else outcomes[0]
+            if isinstance(outcome, Exception):
+                raise outcome
+            if isinstance(outcome, int):
+                return StubResponse(outcome)
+            return StubResponse(200, {"jsonrpc": "2.0", "id": request["id"], "result": outcome})
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def make_provider(replies, **kwargs):
+    provider = PooledHTTPProvider("http://node.invalid", **kwargs)
+    return provider, StubEndpoint(provider, replies)
+
+
+def test_reads_are_retried():
+    provider, node = make_provider({"eth_getBalance": [503, requests.Timeout("slow"), 429, "0x10"]})
+
+    assert provider.make_request("eth_getBalance", ["0xabc", "latest"])["result"] == "0x10"
+    assert node.posts == ["eth_getBalance"] * 4
+    assert provider.retried == 3
+
+    provider, node = make_provider({"eth_getBalance": [503]}, retries=2)
+    with pytest.raises(requests.HTTPError):
+        provider.make_request("eth_getBalance", ["0xabc", "latest"])
+    assert len(node.posts) == 3
+
+
+def test_sends_are_not_retried():
+    provider, node = make_provider({"eth_sendRawTransaction": [503, "0xhash"]})
+    with pytest.raises(requests.HTTPError):
+        provider.make_request("eth_sendRawTransaction", ["0x00"])
+
+    provider, node = make_provider({"eth_sendRawTransaction": [requests.ConnectionError("reset"), "0xhash"]})
+    with pytest.raises(requests.ConnectionError):
+        provider.make_request("eth_sendRawTransaction", ["0x00"])
+    assert node.posts == ["eth_sendRawTransaction"] and provider.retried == 0
+
+
+def test_identical_concurrent_reads_share_one_request():
+    provider, node = make_provider({"eth_call": [{"value": 1}]})
+    node.gate = threading.Event()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(provider.make_request("eth_call", [{"to": "0x1"}, "latest"])))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while provider.coalesced < 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    node.gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert node.posts == ["eth_call"]
+    assert provider.coalesced == 1
+    assert [r["result"] for r in results] == [{"value": 1}] * 2
+    # Each caller gets its own copy
+    assert results[0] is not results[1]
+
+
+def test_concurrency_is_capped():
+    provider, node = make_provider({"eth_getBalance": ["0x1"]}, max_concurrency=2)
+    node.gate = threading.Event()
+    threads = [
+        threading.Thread(target=provider.make_request, args=("eth_getBalance", [f"0x{i}", "latest"]))
+        for i in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    node.gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(node.posts) == 5
+    assert node.max_active == 2
+
+
+def test_block_scoped_memo_is_dropped_on_a_new_block():
+    provider, node = make_provider({
+        "eth_blockNumber": ["0x10"],
+        "eth_getTransactionReceipt": [{"blockNumber": "0x11"}, {"blockNumber": "0x2"}],
+        "eth_gasPrice": ["0x1", "0x2", "0x3"],
+        "eth_chainId": ["0x7a69", "0x7a69", "0x539"]
+    }, block_ttl=60)
+
+    assert provider.make_request("eth_blockNumber", [])["result"] == "0x10"
+    assert provider.make_request("eth_chainId", [])["result"] == "0x7a69"
+    assert provider.make_request("eth_gasPrice", [])["result"] == "0x1"
+    assert provider.make_request("eth_gasPrice", [])["result"] == "0x1"
+    assert provider.make_request("eth_blockNumber", [])["result"] == "0x10"
+    assert node.posts.count("eth_gasPrice") == 1 and provider.memo_hits == 2
+
+    # A receipt from a new block: block-scoped reads go to the node again
+    provider.make_request("eth_getTransactionReceipt", ["0xa"])
+    assert provider.make_request("eth_gasPrice", [])["result"] == "0x2"
+    assert provider.make_request("eth_chainId", [])["result"] == "0x7a69"
+
+    # A lower block number is a restarted chain, not a stale reply
+    provider.make_request("eth_getTransactionReceipt", ["0xb"])
+    assert provider.make_request("eth_chainId", [])["result"] == "0x539"
+    assert provider.make_request("eth_gasPrice", [])["result"] == "0x3"
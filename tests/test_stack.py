@@ -0,0 +1,55 @@
+import pytest
+
+from evm.constants.limits import MAX_STACK_SIZE
+from evm.core.stack import Stack, FastStack, StackOverflow, StackUnderflow
+
+
+def test_fast_stack_wraps_values_mod_2_256():
+    s = FastStack()
+    s.push(2 ** 256 + 5)
+    s.push(-1)
+
+    assert s.pop() == 2 ** 256 - 1
+    assert s.pop() == 5
+
+
+def test_fast_stack_dup_swap_peek_and_multi_pop():
+    s = FastStack()
+    for value in (1, 2, 3):
+        s.push(value)
+
+    s.dup(3)
+    assert s.items == [1, 2, 3, 1]
+    s.swap(2)
+    assert s.items == [1, 1, 3, 2]
+    assert s.peek() == 2 and s.peek(4) == 1
+    assert s.pop2() == (2, 3)
+    s.push(9)
+    assert s.pop3() == (9, 1, 1)
+    assert len(s) == 0
+
+
+def test_fast_stack_raises_typed_errors():
+    s = FastStack()
+    with pytest.raises(StackUnderflow):
+        s.pop()
+    s.push(1)
+    with pytest.raises(StackUnderflow):
+        s.pop2()
+    with pytest.raises(StackUnderflow):
+        s.swap(1)
+
+    for value in range(MAX_STACK_SIZE - 1):
+        s.push(value)
+    with pytest.raises(StackOverflow):
+        s.push(0)
+    with pytest.raises(StackOverflow):
+        s.dup(1)
+    # Failed operations leave the stack unchanged
+    assert len(s) == MAX_STACK_SIZE and s.peek() == MAX_STACK_SIZE - 2
+
+
+def test_stack_errors_are_typed():
+    s = Stack()
+    with pytest.raises(StackUnderflow, match="Stack underflow"):
+        s.pop()
@@ -0,0 +1,261 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from evm.core.binary_storage import BinaryBlockchainStorage, LazyRecordMap
+from evm.core.blockchain_storage import BlockchainStorage, StorageCorruptedError
+from evm.core.state import StateManager
+from evm.core.storage import JournaledStorage
+from evm.execution.evm import EVM
+from evm.utils.helpers import assemble
+
+
+def make_evm(tmp_path, **kwargs):
+    storage = BlockchainStorage(str(tmp_path / "chain.json"), journal=True, **kwargs)
+    return EVM(storage=storage)
+
+
+def test_journal_appends_one_record_per_transaction(tmp_path):
+    evm = make_evm(tmp_path)
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "ubuntu", "content": "humanity", "commitMsg": "init"})
+    evm.execute_transaction("0xabc", {"action": "updateWord", "wordId": 1, "content": "humanity to others", "commitMsg": "edit"})
+
+    assert not (tmp_path / "chain.json").exists()
+    lines = (tmp_path / "chain.json.journal").read_text().splitlines()
+    assert [json.loads(line)["action"] for line in lines] == ["addWord", "updateWord"]
+
+
+def test_replay_on_load_restores_state(tmp_path):
+    evm = make_evm(tmp_path)
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "ubuntu", "content": "humanity", "commitMsg": "init"})
+    evm.execute_transaction("0xdef", {"action": "updateWord", "wordId": 1, "content": "humanity to others", "commitMsg": "edit"})
+    evm.execute_transaction("0xabc", {"action": "createDictionary", "title": "isiXhosa", "wordIds": [1]})
+
+    reloaded = make_evm(tmp_path)
+    assert reloaded.state.words == evm.state.words
+    assert reloaded.state.dictionaries == evm.state.dictionaries
+    assert reloaded.state.word_count == 1
+    assert reloaded.state.dictionary_count == 1
+
+
+def test_snapshot_compacts_journal(tmp_path):
+    evm = make_evm(tmp_path, snapshot_interval=3)
+    for i in range(4):
+        evm.execute_transaction("0xabc", {"action": "addWord", "term": f"w{i}", "content": "c", "commitMsg": "m"})
+
+    snapshot = json.loads((tmp_path / "chain.json").read_text())
+    assert snapshot["word_count"] == 3
+    assert snapshot["journal_seq"] == 3
+    assert len((tmp_path / "chain.json.journal").read_text().splitlines()) == 1
+
+    reloaded = make_evm(tmp_path, snapshot_interval=3)
+    assert reloaded.state.word_count == 4
+    assert reloaded.state.words[4]["term"] == "w3"
+
+
+def test_torn_journal_tail_is_discarded(tmp_path):
+    evm = make_evm(tmp_path)
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "ubuntu", "content": "humanity", "commitMsg": "init"})
+    with open(tmp_path / "chain.json.journal", "a") as f:
+        f.write('{"seq":2,"action":"addWo')
+
+    reloaded = make_evm(tmp_path)
+    assert reloaded.state.word_count == 1
+    reloaded.execute_transaction("0xabc", {"action": "addWord", "term": "sawubona", "content": "hello", "commitMsg": "init"})
+
+    again = make_evm(tmp_path)
+    assert again.state.words[2]["term"] == "sawubona"
+
+
+def test_snapshot_write_is_atomic(tmp_path):
+    storage = BlockchainStorage(str(tmp_path / "chain.json"))
+    assert storage.save_state({"word_count": 1})
+    assert storage.save_state({"word_count": 2})
+
+    assert storage.load_state() == {"word_count": 2}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["chain.json"]
+
+
+def test_corrupt_snapshot_is_not_treated_as_empty(tmp_path):
+    (tmp_path / "chain.json").write_text('{"words": {"1": ')
+    storage = BlockchainStorage(str(tmp_path / "chain.json"))
+
+    with pytest.raises(StorageCorruptedError):
+        storage.load_state()
+
+
+def test_group_commit_batches_concurrent_fsyncs(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+    evm = make_evm(tmp_path, group_commit_window=0.05)
+
+    def add(i):
+        return evm.execute_transaction("0xabc", {"action": "addWord", "term": f"w{i}", "content": "c", "commitMsg": "m"})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(add, range(8)))
+
+    assert all(r["success"] for r in results)
+    assert 1 <= len(fsyncs) < 8
+    assert make_evm(tmp_path).state.word_count == 8
+
+
+def test_execute_batch_commits_once(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, "fsync", lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+    evm = make_evm(tmp_path)
+
+    results = evm.execute_batch("0xabc", [
+        {"action": "addWord", "term": "ubuntu", "content": "humanity", "commitMsg": "init"},
+        {"action": "addWord", "term": "", "content": "missing term"},
+        {"action": "addWord", "term": "indaba", "content": "meeting", "commitMsg": "init"},
+    ])
+
+    assert [r["success"] for r in results] == [True, False, True]
+    assert len(fsyncs) == 1
+    assert len((tmp_path / "chain.json.journal").read_text().splitlines()) == 2
+    assert make_evm(tmp_path).state.words[2]["term"] == "indaba"
+
+
+def test_binary_snapshot_round_trip_is_lazy(tmp_path):
+    storage = BinaryBlockchainStorage(str(tmp_path / "chain.bin"), journal=True, snapshot_interval=2)
+    evm = EVM(storage=storage)
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "ubuntu", "content": "humanity", "commitMsg": "init"})
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "indaba", "content": "meeting", "commitMsg": "init"})
+    evm.execute_transaction("0xabc", {"action": "updateWord", "wordId": 2, "content": "gathering", "commitMsg": "edit"})
+
+    reloaded = EVM(storage=BinaryBlockchainStorage(str(tmp_path / "chain.bin"), journal=True, snapshot_interval=2))
+    words = reloaded.state.words
+    assert isinstance(words, LazyRecordMap)
+    assert not words.is_loaded(1)
+    assert words[1]["term"] == "ubuntu"
+    assert words.is_loaded(1)
+    assert [v["content"] for v in reloaded.state.word_history(2)] == ["meeting", "gathering"]
+    assert reloaded.state.word_count == 2
+
+
+def test_binary_snapshot_copies_untouched_records(tmp_path):
+    path = str(tmp_path / "chain.bin")
+    storage = BinaryBlockchainStorage(path)
+    state = StateManager()
+    state.add_word("a", "first", "init", "0xabc")
+    state.add_word("b", "second", "init", "0xabc")
+    storage.save_state(state.to_dict())
+
+    data = storage.load_state()
+    data["words"][2] = {**data["words"][2], "term": "c"}
+    assert storage.save_state(data)
+
+    words = storage.load_state()["words"]
+    assert words.summary(1) == ("a", "0xabc", state.words[1]["history"][0]["timestamp"])
+    assert dict(words) == {1: state.words[1], 2: {**state.words[2], "term": "c"}}
+
+
+def test_binary_state_exports_as_json(tmp_path):
+    storage = BinaryBlockchainStorage(str(tmp_path / "chain.bin"), journal=True, snapshot_interval=1)
+    evm = EVM(storage=storage)
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "ubuntu", "content": "humanity", "commitMsg": "init"})
+
+    assert isinstance(storage.load_state()["words"], LazyRecordMap)
+    exported = json.loads(storage.export_state())
+    assert exported["words"]["1"]["term"] == "ubuntu"
+
+
+def test_search_index_is_persisted_with_snapshots(tmp_path):
+    evm = make_evm(tmp_path, snapshot_interval=2)
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "ubuntu", "content": "humanity", "commitMsg": "init"})
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "indaba", "content": "meeting", "commitMsg": "init"})
+    evm.execute_transaction("0xabc", {"action": "updateWord", "wordId": 2, "content": "gathering", "commitMsg": "edit"})
+    assert (tmp_path / "chain.json.search").exists()
+
+    reloaded = make_evm(tmp_path, snapshot_interval=2)
+    assert not reloaded.state.search_index_stale
+    assert [w["id"] for w in reloaded.state.search_words("gathering")] == [2]
+    assert reloaded.state.search_words("meeting", fuzzy=False) == []
+
+
+def test_contract_storage_survives_replay(tmp_path):
+    # Runtime: slot0 += 1, return the new value
+    runtime = assemble("PUSH1 0 SLOAD PUSH1 1 ADD DUP1 PUSH1 0 SSTORE PUSH1 0 MSTORE PUSH1 32 PUSH1 0 RETURN")
+    init = assemble(f"PUSH1 {len(runtime)} PUSH1 12 PUSH1 0 CODECOPY PUSH1 {len(runtime)} PUSH1 0 RETURN") + runtime
+    sender = "0x" + "ab" * 20
+
+    evm = make_evm(tmp_path)
+    deployed = evm.execute_transaction(sender, {"action": "deployContract", "data": init.hex()})
+    address = deployed["address"]
+    for _ in range(2):
+        evm.execute_transaction(sender, {"action": "callContract", "address": address, "data": ""})
+
+    records = [json.loads(line) for line in (tmp_path / "chain.json.journal").read_text().splitlines()]
+    assert records[-1]["writes"] == {address: {"0x0": "0x2"}}
+
+    reloaded = make_evm(tmp_path)
+    assert reloaded.state.accounts[address].code == runtime
+    assert reloaded.state.accounts[address].storage == {0: 2}
+    # Read-only calls leave storage untouched
+    view = reloaded.call_contract(sender, address, b"")
+    assert int(view["output"], 16) == 3
+    assert reloaded.state.accounts[address].storage == {0: 2}
+
+
+def test_journaled_storage_nested_checkpoints():
+    slots = {1: 10}
+    storage = JournaledStorage.for_slots(0xC0, slots)
+    storage.begin_transaction()
+
+    assert not storage.access_slot(0xC0, 1) and storage.access_slot(0xC0, 1)
+    storage.set(0xC0, 1, 11)
+    outer = storage.checkpoint()
+    storage.set(0xC0, 2, 20)
+    storage.access_slot(0xC0, 3)
+    inner = storage.checkpoint()
+    storage.set(0xC0, 1, 0)
+    storage.revert(inner)
+    assert slots == {1: 11, 2: 20}
+    storage.revert(outer)
+
+    assert slots == {1: 11}
+    assert (0xC0, 3) not in storage.warm_slots and (0xC0, 1) in storage.warm_slots
+    assert storage.original(0xC0, 1) == 10
+    # Reverted writes are not dirty
+    assert storage.finish_transaction() == {0xC0: {1: 11}}
+    assert storage.take_dirty() == {0xC0: {1}}
+
+
+def test_failed_transaction_leaves_no_changes(tmp_path, monkeypatch):
+    evm = make_evm(tmp_path)
+    evm.execute_transaction("0xabc", {"action": "addWord", "term": "ubuntu", "content": "humanity", "commitMsg": "init"})
+    evm.execute_transaction("0xabc", {"action": "updateWord", "wordId": 1, "content": "humanness", "commitMsg": "edit", "timestamp": 5})
+    state = evm.state
+
+    def snapshot():
+        return json.loads(json.dumps({
+            "words": state.words, "word_count": state.word_count, "history_objects": state.history_objects,
+            "dictionaries": state.dictionaries, "dictionary_count": state.dictionary_count,
+            "indexes": [state._word_meta, state._term_ids, state._terms_sorted, state._author_words, state._updated_sorted,
+                        state._author_dictionaries],
+            "search": [state.search_index.postings, state.search_index.doc_lengths, state.search_index.total_length]
+        }))
+    before = snapshot()
+
+    # Journaling fails after the state, its indexes and the search postings were updated
+    def fail(record):
+        raise OSError("disk full")
+    monkeypatch.setattr(evm, "_persist", fail)
+    updated = evm.execute_transaction("0xdef", {"action": "updateWord", "wordId": 1, "content": "kindness", "commitMsg": "edit", "timestamp": 9})
+    added = evm.execute_transaction("0xdef", {"action": "addWord", "term": "indaba", "content": "meeting", "commitMsg": "init"})
+    created = evm.execute_transaction("0xdef", {"action": "createDictionary", "title": "isiZulu", "wordIds": [1]})
+
+    assert not any(r["success"] for r in (updated, added, created))
+    assert snapshot() == before
+    assert not state.search_index_stale
+    assert [w["id"] for w in state.search_words("humanness")] == [1]
+    assert state.search_words("kindness") == [] and state.search_words("meeting") == []
+    assert [w["id"] for w in state.query_words(author="0xabc")[0]] == [1]
+    assert state.query_words(since=9)[0] == [] and state.query_words(term="indaba")[0] == []
+    lines = (tmp_path / "chain.json.journal").read_text().splitlines()
+    assert len(lines) == 2